@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """
+    Menor tempo [s] de execução da função em um número de repetições.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def executar(repeticoes: int, semente: int) -> dict:
+    """
+    Mede as operações principais sobre a base encontrada em "./base". Executado em um processo separado,
+    pois src._database carrega a base ao ser importado.
+    """
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        import main
+        from src._dataclasses import CriarRede, Chave, Alimentador, Subestacao
+
+    rng = np.random.default_rng(semente)
+    resultados = {}
+    resultados["CriarRede"] = medir(CriarRede, repeticoes)
+
+    rede = CriarRede()
+    nos = rede.dft()
+    chaves = [no for no in nos if isinstance(no, Chave)]
+    alimentadores = [no for no in nos if isinstance(no, Alimentador) and no.children]
+    subestacoes = sorted(
+        [no for no in nos if isinstance(no, Subestacao) and no.children],
+        key=lambda se: sum(len(alm.lista_chaves) for alm in se.children),
+    )
+    main.CELESC = rede
+
+    nomes = [str(chaves[i]) for i in rng.choice(len(chaves), min(100, len(chaves)), replace=False)]
+    resultados["TreeNode.find"] = medir(lambda: [rede.find(nome) for nome in nomes], repeticoes)
+    termos = [nome[:-1] for nome in nomes]
+    resultados["TreeNode.sugestoes"] = medir(lambda: [rede.sugestoes(termo) for termo in termos], repeticoes)
+
+    cabecas = [chave for alm in alimentadores for chave in alm.children if isinstance(chave, Chave)]
+    amostra = [cabecas[i] for i in rng.choice(len(cabecas), min(20, len(cabecas)), replace=False)]
+    resultados["Chave.dic_acumulado"] = medir(lambda: [chave.dic_acumulado() for chave in amostra], repeticoes)
+
+    amostra = [alimentadores[i] for i in rng.choice(len(alimentadores), min(2, len(alimentadores)), replace=False)]
+    resultados["Alimentador.chaves_candidatas_ts"] = medir(
+        lambda: [alm.chaves_candidatas_ts() for alm in amostra], repeticoes
+    )
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        resultados["por_alimentador"] = medir(lambda: main.por_alimentador(amostra[0]), repeticoes)
+        se = subestacoes[len(subestacoes) // 2]
+        resultados["por_subestacao"] = medir(lambda: main.por_subestacao(se), repeticoes)
+    return resultados
+
+
+def comparar(resultados: dict, baseline: dict, tolerancia: float, minimo: float) -> list:
+    """
+    Compara os tempos com a baseline salva. Retorna a lista de regressões, operações mais lentas que
+    baseline * (1 + tolerancia) e com diferença absoluta maior que o mínimo [s], para ignorar ruído em operações rápidas.
+    """
+    regressoes = []
+    print(f"{'Operação':<36}{'Tempo [s]':>12}{'Baseline [s]':>14}{'Razão':>8}")
+    for nome, tempo in resultados.items():
+        referencia = baseline.get(nome)
+        if referencia is None:
+            print(f"{nome:<36}{tempo:>12.4f}{'-':>14}{'-':>8}")
+            continue
+        razao = tempo / referencia if referencia else float("inf")
+        print(f"{nome:<36}{tempo:>12.4f}{referencia:>14.4f}{razao:>8.2f}")
+        if razao > 1 + tolerancia and tempo - referencia > minimo:
+            regressoes.append(nome)
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da ferramenta sobre uma rede sintética.")
+    parser.add_argument("--escala", type=float, default=0.05, help="Tamanho da rede sintética, 1.0 ~ rede estadual.")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--base", default=None,
+                        help="Pasta com uma base já gerada (contendo base/). Por padrão gera uma nova base temporária.")
+    parser.add_argument("--saida", default="benchmark_resultados.json")
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Aumento relativo de tempo tolerado.")
+    parser.add_argument("--minimo", type=float, default=0.05, help="Diferença absoluta mínima [s] para uma regressão.")
+    parser.add_argument("--salvar-baseline", action="store_true")
+    parser.add_argument("--executar", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.executar:
+        json.dump(executar(args.repeticoes, args.semente), sys.stdout)
+        return
+
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta = args.base or temporario
+        resumo = None
+        if args.base is None:
+            from src._sintetico import gerar_base
+            resumo = gerar_base(pasta, escala=args.escala, semente=args.semente)
+            print(f"Base sintética: {resumo}")
+        processo = subprocess.run(
+            [sys.executable, os.path.join(RAIZ, "benchmark.py"), "--executar",
+             "--repeticoes", str(args.repeticoes), "--semente", str(args.semente)],
+            cwd=pasta,
+            env={**os.environ, "PYTHONPATH": RAIZ, "DEC_CACHE": "0"},
+            capture_output=True,
+            text=True,
+        )
+    if processo.returncode:
+        sys.stderr.write(processo.stderr)
+        sys.exit(processo.returncode)
+
+    resultados = json.loads(processo.stdout)
+    registro = {
+        "data": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "escala": args.escala,
+        "semente": args.semente,
+        "base": resumo,
+        "resultados": resultados,
+    }
+    with open(args.saida, "w") as arquivo:
+        json.dump(registro, arquivo, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.salvar_baseline:
+        with open(args.baseline) as arquivo:
+            salva = json.load(arquivo)
+        if (salva.get("escala"), salva.get("semente")) != (args.escala, args.semente):
+            print("Baseline gerada com outra escala ou semente, comparação ignorada.")
+        else:
+            baseline = salva["resultados"]
+    regressoes = comparar(resultados, baseline, args.tolerancia, args.minimo)
+
+    if args.salvar_baseline:
+        with open(args.baseline, "w") as arquivo:
+            json.dump(registro, arquivo, indent=2)
+        print(f"Baseline salva em {args.baseline}")
+    if regressoes:
+        print(f"Regressões de desempenho: {', '.join(regressoes)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
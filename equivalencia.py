@@ -0,0 +1,414 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+SENSIBILIDADES = (1, 2, 3)
+CHAVES_ESTUDADAS = 20  # estudos de chave comparados por alimentador
+# Filtros de causas (src._causas) comparados nos estudos de alimentador.
+FILTROS_CAUSAS = ({"causas": ("VEGETACAO", "CLIMA")}, {"excluir_causas": ("PROGRAMADAS",)})
+
+
+def caminho_no(no) -> str:
+    """
+    Caminho do nó a partir da raiz, ex.: CELESC/NUCAP/CQS/CQS01/FNS_1702.
+    """
+    return "/".join(str(item) for item in [*no.get_heritage(), no])
+
+
+class Comparador:
+    """
+    Executa a referência (todos os caminhos rápidos desativados) e um caminho rápido sobre o mesmo nó, compara os
+    resultados com tolerância e acumula, por caminho, o número de comparações, as diferenças e os tempos.
+    """
+
+    def __init__(self, tolerancia: float, absoluta: float, limite: int):
+        from src._rapidos import CAMINHOS
+
+        self.tolerancia = tolerancia
+        self.absoluta = absoluta
+        self.limite = limite
+        self.resultados = {
+            caminho: {"comparacoes": 0, "diferencas": [], "total_diferencas": 0,
+                      "tempo_referencia": 0.0, "tempo_rapido": 0.0}
+            for caminho in [*CAMINHOS, "estudos"]
+        }
+
+    def executar(self, caminho: str, rapido: bool, funcao, tempo_em=()):
+        """
+        Executa a função com apenas o caminho ativo (rapido=True) ou com todos desativados (referência), somando o
+        tempo ao caminho e aos caminhos em tempo_em (referências compartilhadas entre caminhos).
+        "estudos" ativa juntos todos os caminhos da árvore.
+        """
+        from src._rapidos import CAMINHOS, forcar
+
+        ativos = [c for c in CAMINHOS if c != "rede_compacta"] if caminho == "estudos" else [caminho]
+        with forcar(False), forcar(True, ativos if rapido else []):
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempo = time.perf_counter() - inicio
+        for nome in [caminho, *tempo_em]:
+            self.resultados[nome]["tempo_rapido" if rapido else "tempo_referencia"] += tempo
+        return resultado
+
+    def iguais(self, referencia, rapido) -> bool:
+        if isinstance(referencia, list):
+            # Listas de nós: os mesmos objetos, na mesma ordem.
+            return len(referencia) == len(rapido) and all(
+                a is b or (isinstance(a, str) and a == b) for a, b in zip(referencia, rapido)
+            )
+        if isinstance(referencia, dict):
+            return referencia.keys() == rapido.keys() and all(self.iguais(v, rapido[k]) for k, v in referencia.items())
+        try:
+            return bool(np.isclose(float(referencia), float(rapido), rtol=self.tolerancia, atol=self.absoluta,
+                                   equal_nan=True))
+        except (TypeError, ValueError):
+            return str(referencia) == str(rapido)
+
+    def conferir(self, caminho: str, no: str, grandeza: str, referencia, rapido):
+        resultado = self.resultados[caminho]
+        resultado["comparacoes"] += 1
+        if self.iguais(referencia, rapido):
+            return
+        resultado["total_diferencas"] += 1
+        if len(resultado["diferencas"]) < self.limite:
+            if isinstance(referencia, list):
+                referencia, rapido = [str(x) for x in referencia], [str(x) for x in rapido]
+            resultado["diferencas"].append({
+                "no": no, "grandeza": grandeza, "referencia": _serializavel(referencia), "rapido": _serializavel(rapido),
+            })
+
+    def comparar(self, caminho: str, no, grandeza: str, funcao, referencia=None):
+        """
+        Compara funcao(no) pela referência e pelo caminho rápido. A referência já calculada pode ser informada.
+        """
+        if referencia is None:
+            referencia = self.executar(caminho, False, lambda: funcao(no))
+        rapido = self.executar(caminho, True, lambda: funcao(no))
+        self.conferir(caminho, caminho_no(no), grandeza, referencia, rapido)
+        return referencia
+
+    def comparar_tabelas(self, caminho: str, no, referencia: pd.DataFrame, rapido: pd.DataFrame, chaves: list):
+        """
+        Compara dois estudos, casando as linhas pelas colunas-chave. Uma coluna presente em apenas um dos estudos é
+        uma diferença, e as colunas em comum são comparadas linha a linha.
+        """
+        referencia = referencia.assign(**{c: referencia[c].astype(str) for c in chaves}).set_index(chaves)
+        rapido = rapido.assign(**{c: rapido[c].astype(str) for c in chaves}).set_index(chaves)
+        base = caminho_no(no)
+        for linha in referencia.index.symmetric_difference(rapido.index):
+            lado, presente = ("rapido", referencia) if linha in referencia.index else ("referencia", rapido)
+            # Os estudos descartam as chaves com redução nula: uma linha com redução residual de arredondamento
+            # de um lado e descartada do outro não é uma diferença.
+            reducoes = [c for c in presente.columns if c.startswith("Redução") and pd.api.types.is_float_dtype(presente[c])]
+            residual = bool(reducoes) and np.allclose(presente.loc[[linha], reducoes].to_numpy(dtype=float), 0.0,
+                                                      rtol=0.0, atol=self.absoluta)
+            self.conferir(caminho, f"{base} [{', '.join(np.atleast_1d(linha).astype(str))}]", "linha",
+                          "", "" if residual else f"ausente: {lado}")
+        for coluna in referencia.columns.symmetric_difference(rapido.columns, sort=False):
+            lado = "rapido" if coluna in referencia.columns else "referencia"
+            self.conferir(caminho, base, f"coluna {coluna}", "", f"ausente: {lado}")
+        comuns = referencia.index.intersection(rapido.index)
+        for coluna in [c for c in referencia.columns if c in rapido.columns]:
+            for linha, a, b in zip(comuns, referencia.loc[comuns, coluna], rapido.loc[comuns, coluna]):
+                self.conferir(caminho, f"{base} [{', '.join(np.atleast_1d(linha).astype(str))}]", coluna, a, b)
+
+
+def _tipo(chave):
+    # Chaves sem tipo no RDC e fora das faixas de código levantam ValueError nos dois caminhos.
+    try:
+        return chave.tipo
+    except ValueError:
+        return "ValueError"
+
+
+def _serializavel(valor):
+    if isinstance(valor, (np.integer, np.floating)):
+        return valor.item()
+    if isinstance(valor, dict):
+        return {str(k): _serializavel(v) for k, v in valor.items()}
+    return valor
+
+
+def executar(alimentadores: int, subestacoes: int, semente: int, tolerancia: float, absoluta: float,
+             limite: int) -> dict:
+    """
+    Compara os caminhos rápidos com a referência na base encontrada em "./base". Executado em um processo separado,
+    pois src._database carrega a base ao ser importado.
+    """
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        from src._dataclasses import CriarRede, atualizar_rdc, Chave, Alimentador, Subestacao
+        from src import _database
+        from src._rede_compacta import RedeCompacta
+        from src._rapidos import CAMINHOS, assinatura
+        from src import _estudos
+        from src._causas import resolver_causas
+
+    rng = np.random.default_rng(semente)
+    comparador = Comparador(tolerancia, absoluta, limite)
+    rede = CriarRede()
+    nos = rede.dft()
+    todos_alimentadores = [no for no in nos if isinstance(no, Alimentador)
+                           and no.children and all(isinstance(filho, Chave) for filho in no.children)]
+    todas_subestacoes = [no for no in nos if isinstance(no, Subestacao) and no.children
+                         and all(isinstance(filho, Alimentador) for filho in no.children)]
+    amostra = [todos_alimentadores[i] for i in
+               rng.choice(len(todos_alimentadores), min(alimentadores, len(todos_alimentadores)), replace=False)]
+    amostra_se = [todas_subestacoes[i] for i in
+                  rng.choice(len(todas_subestacoes), min(subestacoes, len(todas_subestacoes)), replace=False)]
+
+    ancestrais = {}
+    for no in nos:
+        if isinstance(no, (Subestacao, Alimentador)):
+            acima = no.parent
+            while isinstance(acima, Chave):
+                ancestrais[id(acima)] = acima
+                acima = acima.parent
+    com_nos_a_jusante = [chave for chave in ancestrais.values()
+                         if any(not isinstance(no, Chave) for no in chave.chaves_jusante())]
+
+    inicio = time.perf_counter()
+    compacta = RedeCompacta.de_arvore(rede)
+    preparo_compacta = time.perf_counter() - inicio
+
+    def comparar_chave(chave):
+        comparador.comparar("indice_euler", chave, "get_level", lambda no: no.get_level())
+        comparador.comparar("indice_euler", chave, "tipo", _tipo)
+        comparador.comparar("indice_euler", chave, "ucs", lambda no: no.ucs)
+        comparador.comparar("indice_euler", chave, "chaves_jusante", lambda no: no.chaves_jusante())
+        comparador.comparar("indice_euler", chave, "dic_acumulado", lambda no: no.dic_acumulado())
+        comparador.comparar("indice_euler", chave, "fic_acumulado", lambda no: no.fic_acumulado())
+        # Passagem única pelas chaves a jusante.
+        comparador.comparar("acumulados", chave, "acumulados", lambda no: no.acumulados(SENSIBILIDADES))
+
+    def estudar_chave(chave):
+        referencia = comparador.executar(
+            "estudos", False, lambda: _estudos.estudo_chave(chave, sensibilidades=SENSIBILIDADES),
+            tempo_em=["rede_compacta"],
+        )
+        rapido = comparador.executar(
+            "estudos", True, lambda: _estudos.estudo_chave(chave, sensibilidades=SENSIBILIDADES)
+        )
+        comparador.comparar_tabelas("estudos", chave, referencia, rapido, ["Chave"])
+        estudo_compacta = comparador.executar(
+            "rede_compacta", True,
+            lambda: compacta.estudo_chave(compacta.buscar(str(chave)), sensibilidades=SENSIBILIDADES),
+        )
+        comparador.comparar_tabelas("rede_compacta", chave, referencia, estudo_compacta, ["Chave"])
+
+    for alimentador in amostra:
+        chaves = [chave for chave in alimentador.lista_chaves if isinstance(chave, Chave)]
+        # Índice de pré-ordem: listas e somas a jusante.
+        comparador.comparar("indice_euler", alimentador, "ucs", lambda no: no.ucs)
+        comparador.comparar("indice_euler", alimentador, "dic", lambda no: no.dic)
+        comparador.comparar("indice_euler", alimentador, "lista_chaves", lambda no: no.lista_chaves)
+        # Índice de nomes: busca a partir da raiz e da subárvore do alimentador, inclusive de nomes ausentes.
+        for nome in [str(alimentador), *[str(chave) for chave in chaves[:CHAVES_ESTUDADAS]], f"{alimentador}_X"]:
+            comparador.comparar("indice_nomes", rede, f"find {nome}", lambda no: [no.find(nome)])
+            comparador.comparar("indice_nomes", alimentador, f"find {nome}", lambda no: [no.find(nome)])
+        for chave in chaves:
+            comparar_chave(chave)
+
+        # Estudos: a mesma referência é comparada com todos os caminhos da árvore juntos e com a rede compacta.
+        referencia = comparador.executar(
+            "estudos", False, lambda: _estudos.estudo_alimentador(alimentador, sensibilidades=SENSIBILIDADES),
+            tempo_em=["rede_compacta"],
+        )
+        rapido = comparador.executar(
+            "estudos", True, lambda: _estudos.estudo_alimentador(alimentador, sensibilidades=SENSIBILIDADES)
+        )
+        comparador.comparar_tabelas("estudos", alimentador, referencia, rapido, ["Chave"])
+        for filtro in FILTROS_CAUSAS:
+            filtro = {parametro: resolver_causas(valores) for parametro, valores in filtro.items()}
+            referencia_filtrada = comparador.executar(
+                "estudos", False, lambda: _estudos.estudo_alimentador(alimentador, **filtro), tempo_em=["rede_compacta"]
+            )
+            rapido = comparador.executar("estudos", True, lambda: _estudos.estudo_alimentador(alimentador, **filtro))
+            comparador.comparar_tabelas("estudos", alimentador, referencia_filtrada, rapido, ["Chave"])
+            estudo_compacta = comparador.executar(
+                "rede_compacta", True, lambda: compacta.estudo_alimentador(compacta.buscar(str(alimentador)), **filtro)
+            )
+            comparador.comparar_tabelas("rede_compacta", alimentador, referencia_filtrada, estudo_compacta, ["Chave"])
+        posicao = compacta.buscar(str(alimentador))
+        estudo_compacta = comparador.executar(
+            "rede_compacta", True, lambda: compacta.estudo_alimentador(posicao, sensibilidades=SENSIBILIDADES)
+        )
+        comparador.comparar_tabelas("rede_compacta", alimentador, referencia, estudo_compacta, ["Chave"])
+        candidatas = comparador.executar("rede_compacta", False, alimentador.chaves_candidatas_ts)
+        candidatas_compacta = comparador.executar("rede_compacta", True, lambda: compacta.chaves_candidatas_ts(posicao))
+        comparador.conferir("rede_compacta", caminho_no(alimentador), "chaves_candidatas_ts",
+                            [str(c) for c in candidatas], [str(compacta.nome[i]) for i in candidatas_compacta])
+
+        for chave in chaves[:CHAVES_ESTUDADAS]:
+            estudar_chave(chave)
+
+    # Chaves que mantêm a jusante um nó que não é chave (ver IndiceEuler.intervalos_jusante), sempre comparadas.
+    for chave in com_nos_a_jusante:
+        comparar_chave(chave)
+        estudar_chave(chave)
+
+    for subestacao in amostra_se:
+        comparador.comparar("indice_euler", subestacao, "ucs", lambda no: no.ucs)
+        referencia = comparador.executar(
+            "estudos", False, lambda: _estudos.estudo_subestacao(subestacao), tempo_em=["rede_compacta"]
+        )
+        rapido = comparador.executar("estudos", True, lambda: _estudos.estudo_subestacao(subestacao))
+        comparador.comparar_tabelas("estudos", subestacao, referencia, rapido, ["Alimentador", "Chave"])
+        posicao = compacta.buscar(str(subestacao))
+        estudo_compacta = comparador.executar("rede_compacta", True, lambda: compacta.estudo_subestacao(posicao))
+        comparador.comparar_tabelas("rede_compacta", subestacao, referencia, estudo_compacta, ["Alimentador", "Chave"])
+
+    # Atualização incremental do RDC: UCs e tipos de metade das linhas das chaves da amostra são alterados e
+    # aplicados à rede já indexada; o índice atualizado é comparado com a referência, que lê o novo RDC.
+    nomes = {str(chave) for alimentador in amostra for chave in alimentador.lista_chaves if isinstance(chave, Chave)}
+    rdc = _database.RDC.copy()
+    linhas = np.flatnonzero(rdc["Chave"].isin(nomes).to_numpy())
+    alteradas = rdc.index[rng.choice(linhas, len(linhas) // 2, replace=False)]
+    rdc.loc[alteradas, "Consumidores a jusante"] += 1
+    rdc.loc[alteradas[::5], "Tipo"] = "RA"
+    atualizar_rdc(rede, rdc)
+    for alimentador in amostra:
+        comparador.comparar("indice_euler", alimentador, "ucs (RDC atualizado)", lambda no: no.ucs)
+        for chave in [chave for chave in alimentador.lista_chaves if isinstance(chave, Chave)]:
+            comparador.comparar("indice_euler", chave, "tipo (RDC atualizado)", _tipo)
+            comparador.comparar("indice_euler", chave, "ucs (RDC atualizado)", lambda no: no.ucs)
+
+    resultados = comparador.resultados
+    resultados["rede_compacta"]["tempo_preparo"] = preparo_compacta
+    for caminho in CAMINHOS:
+        resultados[caminho]["assinatura"] = assinatura(caminho)
+    return {
+        "amostra": {"alimentadores": [str(no) for no in amostra], "subestacoes": [str(no) for no in amostra_se]},
+        "resultados": resultados,
+    }
+
+
+def resumir(execucoes: dict) -> dict:
+    """
+    Soma os resultados de cada caminho nas bases executadas. Um caminho é aprovado quando foi comparado e não teve
+    diferenças em nenhuma base; os caminhos da árvore também dependem dos estudos completos ("estudos").
+    """
+    from src._rapidos import CAMINHOS
+
+    resumo = {}
+    for caminho in [*CAMINHOS, "estudos"]:
+        partes = [execucao["resultados"][caminho] for execucao in execucoes.values()]
+        referencia = sum(parte["tempo_referencia"] for parte in partes)
+        rapido = sum(parte["tempo_rapido"] for parte in partes)
+        resumo[caminho] = {
+            "comparacoes": sum(parte["comparacoes"] for parte in partes),
+            "diferencas": sum(parte["total_diferencas"] for parte in partes),
+            "tempo_referencia": referencia,
+            "tempo_rapido": rapido,
+            "razao": referencia / rapido if rapido else None,
+        }
+        assinaturas = {parte.get("assinatura") for parte in partes}
+        if caminho in CAMINHOS and len(assinaturas) == 1:
+            resumo[caminho]["assinatura"] = assinaturas.pop()
+    estudos_ok = resumo["estudos"]["diferencas"] == 0
+    for caminho in CAMINHOS:
+        aprovado = resumo[caminho]["comparacoes"] > 0 and resumo[caminho]["diferencas"] == 0
+        if caminho != "rede_compacta":
+            aprovado = aprovado and estudos_ok
+        resumo[caminho]["aprovado"] = aprovado and "assinatura" in resumo[caminho]
+    return resumo
+
+
+def imprimir(resumo: dict, execucoes: dict):
+    print(f"{'Caminho':<16}{'Comparações':>13}{'Diferenças':>12}{'Ref. [s]':>11}{'Rápido [s]':>12}{'Razão':>9}  Aprovado")
+    for caminho, linha in resumo.items():
+        razao = f"{linha['razao']:.1f}" if linha["razao"] else "-"
+        aprovado = {True: "sim", False: "não"}.get(linha.get("aprovado"), "-")
+        print(f"{caminho:<16}{linha['comparacoes']:>13}{linha['diferencas']:>12}{linha['tempo_referencia']:>11.2f}"
+              f"{linha['tempo_rapido']:>12.2f}{razao:>9}  {aprovado}")
+    for base, execucao in execucoes.items():
+        for caminho, resultado in execucao["resultados"].items():
+            for diferenca in resultado["diferencas"][:5]:
+                print(f"  [{base}] {caminho}: {diferenca['no']} {diferenca['grandeza']}: "
+                      f"referência {repr(diferenca['referencia'])[:80]}, rápido {repr(diferenca['rapido'])[:80]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara os caminhos rápidos com a implementação de referência (nó a nó) e libera os aprovados."
+    )
+    parser.add_argument("--base", default=RAIZ, help="Pasta contendo base/ (por padrão a base real do projeto).")
+    parser.add_argument("--sem-base", action="store_true", help="Não executa na base real, apenas na sintética.")
+    parser.add_argument("--sintetica", type=float, default=0.02,
+                        help="Escala da rede sintética também comparada (0 para não gerar).")
+    parser.add_argument("--alimentadores", type=int, default=6, help="Alimentadores sorteados por base.")
+    parser.add_argument("--subestacoes", type=int, default=1, help="Subestações sorteadas por base.")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--tolerancia", type=float, default=1e-9, help="Tolerância relativa.")
+    parser.add_argument("--absoluta", type=float, default=1e-6, help="Tolerância absoluta.")
+    parser.add_argument("--limite", type=int, default=200, help="Diferenças detalhadas guardadas por caminho.")
+    parser.add_argument("--saida", default="equivalencia_resultados.json")
+    parser.add_argument("--liberar", action="store_true",
+                        help="Grava em equivalencia.json a liberação dos caminhos aprovados (e revoga os reprovados).")
+    parser.add_argument("--executar", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    parametros = [
+        "--alimentadores", str(args.alimentadores), "--subestacoes", str(args.subestacoes),
+        "--semente", str(args.semente), "--tolerancia", str(args.tolerancia), "--absoluta", str(args.absoluta),
+        "--limite", str(args.limite),
+    ]
+    if args.executar:
+        json.dump(executar(args.alimentadores, args.subestacoes, args.semente, args.tolerancia, args.absoluta,
+                           args.limite), sys.stdout, default=str)
+        return
+
+    execucoes = {}
+    with tempfile.TemporaryDirectory() as temporario:
+        pastas = {} if args.sem_base else {"real": args.base}
+        if args.sintetica:
+            from src._sintetico import gerar_base
+            print(f"Base sintética: {gerar_base(temporario, escala=args.sintetica, semente=args.semente)}")
+            pastas["sintetica"] = temporario
+        for nome, pasta in pastas.items():
+            processo = subprocess.run(
+                [sys.executable, os.path.join(RAIZ, "equivalencia.py"), "--executar", *parametros],
+                cwd=pasta,
+                env={**os.environ, "PYTHONPATH": RAIZ, "DEC_CACHE": "0"},
+                capture_output=True,
+                text=True,
+            )
+            if processo.returncode:
+                sys.stderr.write(processo.stderr)
+                sys.exit(processo.returncode)
+            execucoes[nome] = json.loads(processo.stdout)
+
+    resumo = resumir(execucoes)
+    imprimir(resumo, execucoes)
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump({"data": time.strftime("%Y-%m-%d %H:%M:%S"), "resumo": resumo, "execucoes": execucoes},
+                  arquivo, ensure_ascii=False, indent=1)
+
+    if args.liberar:
+        from src._rapidos import CAMINHOS, liberar
+        data = time.strftime("%Y-%m-%d %H:%M:%S")
+        liberar({
+            caminho: {
+                "aprovado": resumo[caminho]["aprovado"],
+                "assinatura": resumo[caminho].get("assinatura"),
+                "data": data,
+                "bases": list(execucoes),
+                "comparacoes": resumo[caminho]["comparacoes"],
+                "razao": resumo[caminho]["razao"],
+            }
+            for caminho in CAMINHOS
+        })
+        print("Liberação gravada em equivalencia.json")
+    if any(linha["diferencas"] for linha in resumo.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,55 @@
 # Data:     30/03/2023
 #--------------------------------------- 
 import os
+import re
+import math
+import heapq
+import argparse
 import pandas as pd
-from src._database import importar_arquivos, OCORRENCIAS
-from src._dataclasses import CriarRede, Subestacao, Alimentador, Chave
+from openpyxl import Workbook
+from src._database import (
+    importar_arquivos, ler_base, ler_relatorio_de_chaves, registrar_relatorio_de_chaves, ler_historico_rdc,
+    periodo_ocorrencias, CAUSAS, PARTICOES,
+)
+from src._dataclasses import (
+    CriarRede, atualizar_rdc, carregar_para, reparticionar, Nucleo, Empresa, Subestacao, Alimentador, Chave,
+)
+from src._estudos import (
+    estudo_chave, estudo_alimentador, estudo_subestacao, estudo_agregado, estudo_lote, estudo_periodo,
+)
+from src._periodos import Periodos, ler_periodo
+from src._topologia import diferencas
+from src._validacao import validar_conversoes
+from src._consistencia import verificar_base, salvar_relatorio, imprimir_resumo
+from src._causas import resolver_causas, normalizar_filtro, descrever_filtro
+from src._progresso import acompanhar, cancelar_com_ctrl_c, formatar_duracao, EstudoCancelado
+from src._arquivos import escrita_atomica, gravar_planilha
+from src import _perfil as perfil
+from src import _cache as cache
+
+try:
+    import readline
+except ImportError:  # Windows sem pyreadline: os prompts ficam sem autocompletar
+    readline = None
 
 CELESC = None
 
+# Modo de reamostragem (bootstrap): 0 desativa os intervalos de confiança.
+REAMOSTRAGENS = 0
+SEMENTE = None
+CONFIANCA = 0.90
+
+# Sensibilidades do religador (níveis de chaves alcançados) comparadas nos estudos, em colunas acrescentadas às tabelas.
+# Vazio não acrescenta colunas.
+SENSIBILIDADES = ()
+
+# Filtro de causas do 1025 (códigos): causas estudadas (vazio para todas) e causas excluídas dos estudos.
+CAUSAS_INCLUIDAS = ()
+CAUSAS_EXCLUIDAS = ()
+
+# Períodos de ocorrências comparados nos estudos em lote (src._periodos), na ordem informada. Vazio usa a base.
+PERIODOS = None
+
 def filtro(entry: str):
     """
     Filtra entradas de usuario para que a os objetos estudados sejam coerentes com o estudo selecionado. 
@@ -17,13 +60,29 @@ def filtro(entry: str):
     while True:
         if entry == "":
             return False
+        carregar_para(CELESC, entry)
         busca = CELESC.find(entry)
         if busca is None:
-            print(f'Nenhum objeto "{entry}" encontrado na rede.\nTente novamente ou "Enter" para encerrar:')
+            print(f'Nenhum objeto "{entry}" encontrado na rede.')
+            sugestoes = CELESC.sugestoes(entry)
+            if sugestoes:
+                print(f'Você quis dizer: {", ".join(sugestoes)}?')
+            print('Tente novamente ou "Enter" para encerrar:')
             entry = input().upper()
             continue
         return busca
 
+def completar(texto: str, estado: int):
+    """
+    Completa com Tab os nomes da rede nos prompts (readline), pelo índice de nomes da rede criada.
+    """
+    indice = getattr(CELESC, "euler", None)
+    if indice is None:
+        return None
+    opcoes = indice.nomes.prefixo(texto, 50)
+    return opcoes[estado] if estado < len(opcoes) else None
+
+
 def continuar():
     print('\nPara continuar entre o próximo valor. Para encerrar o estudo pressione "ENTER".')
     entry = input().upper()
@@ -31,100 +90,221 @@ def continuar():
 
 
 def por_chave(chave: Chave):
-    dic_acumulado = chave.dic_acumulado()
-    dic_acumulado_pos_rl = chave.dic_acumulado_pos_rl()
-    reducao_dic_acumulado = (
-        round(100 * (1 - dic_acumulado_pos_rl / dic_acumulado), 2)
-        if dic_acumulado
-        else "NA"
+    chaves_nf = estudo_chave(
+        chave, REAMOSTRAGENS, SEMENTE, CONFIANCA, SENSIBILIDADES, CAUSAS_INCLUIDAS, CAUSAS_EXCLUIDAS
     )
-    chaves_nf = pd.DataFrame({
-        "Núcleo / Unidade": str(chave.get_nucleo()),
-        "Subestação": str(chave.get_subestacao()),
-        "Alimentador": str(chave.get_alimentador()),
-        "Chave": chave,
-        "Unidade Consumidoras": chave.ucs,
-        "DIC Chave [h*ucs]": chave.dic,
-        "DIC Acumulado [h * ucs]": dic_acumulado,
-        "DIC Estimado após substituição [h * ucs]": chave.dic_pos_rl,
-        "DIC Acumulado estimado pós substituição [h * ucs]": dic_acumulado_pos_rl,
-        "Redução DIC Acumulado estimada [%]": reducao_dic_acumulado,
-    }, index = ['0'])
 
     print(chaves_nf.tail(1).transpose().to_string(header=None))
-    if not os.path.exists("Estudo Ganho RLs NF.xlsx"):
-        pd.DataFrame().to_excel("Estudo Ganho RLs NF.xlsx", index=False)
-    with pd.ExcelWriter("Estudo Ganho RLs NF.xlsx", engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
-        chaves_nf.to_excel(writer, index=False , sheet_name= "Estudo por Chave", startrow=writer.sheets["Estudo por Chave"].max_row, header= None)
+    with perfil.etapa("escrever Excel"):
+        gravar_planilha("Estudo Ganho RLs NF.xlsx", chaves_nf, "Estudo por Chave", acrescentar=True)
     return
 
 def por_alimentador(alm : Alimentador):
     print("Calculando valores, isso pode levar alguns segundos", end= "\r")
-    df = pd.DataFrame(alm.get_chaves_candidatas_ts(), columns= ["Chave"])
-    ucs = alm.ucs
-    df["Redução DEC estimada [HI]"] = df["Chave"].apply(lambda x: (x.dic - x.dic_pos_rl)/ucs)
-    df["Interrupções no periodo"] = df["Chave"].apply(lambda x: x.qtd_ocorrencias)
-    df["Unidades consumidoras a jusante da Chave"] = df["Chave"].apply(lambda x: x.ucs)
-    df = df[(df["Redução DEC estimada [HI]"]) != 0]
+    df = estudo_alimentador(
+        alm, REAMOSTRAGENS, SEMENTE, CONFIANCA, SENSIBILIDADES, CAUSAS_INCLUIDAS, CAUSAS_EXCLUIDAS
+    )
 
     if df.empty:
         print("Nenhuma chave encontrada para substituição!")
 
-    df.sort_values(["Redução DEC estimada [HI]",
-                    "Unidades consumidoras a jusante da Chave"], inplace=True, ascending=False)
-
-    print(f"Unidades Consumidoras {alm}: {ucs}")
+    print(f"Unidades Consumidoras {alm}: {df.attrs['ucs']}")
     print(df.to_string(index=False)) if not df.empty else None
 
-    if not os.path.exists("Estudo Ganho RLs NF.xlsx"):
-        pd.DataFrame().to_excel("Estudo Ganho RLs NF.xlsx", index=False)
-
-    with pd.ExcelWriter("Estudo Ganho RLs NF.xlsx", engine = 'openpyxl', mode = 'a', if_sheet_exists='replace') as writer:
-        df.to_excel(writer, index=False, sheet_name=f'Estudo Aliementador {str(alm)}')
+    with perfil.etapa("escrever Excel"):
+        gravar_planilha("Estudo Ganho RLs NF.xlsx", df, f'Estudo Aliementador {str(alm)}')
     return
 
+def mostrar_progresso(evento: dict):
+    """
+    Callback de progresso dos estudos longos: alimentadores concluídos, tempo decorrido e estimativa do restante.
+    """
+    print(f"{evento['estudo']}: {evento['feitos']}/{evento['total']} alimentadores, "
+          f"{formatar_duracao(evento['decorrido'])} decorridos, faltam {formatar_duracao(evento['restante'])}".ljust(79),
+          end="\r", flush=True)
+
+def avisar_cancelamento():
+    print("\nCancelando após o alimentador em andamento (Ctrl-C de novo interrompe imediatamente).", flush=True)
+
 def por_subestacao(se: Subestacao):
-    print("Calculando. Este processo pode levar alguns minutos.", end = '\r')
-    df = pd.DataFrame(se.get_chaves_candidatas_ts(), columns= ["Chave"])
-    ucs = se.ucs
-    df["Alimentador"] = df["Chave"].apply(lambda x: x.get_alimentador())
-    df = df[["Alimentador", "Chave"]]
-    df["Redução DEC SE estimada [HI]"] = df.apply(lambda x:  (x["Chave"].dic - x["Chave"].dic_pos_rl)/ucs, axis=1)
-    df["Redução DEC Alimentador estimada [HI]"] = df.apply(lambda x: (
-        x["Chave"].dic - x["Chave"].dic_pos_rl)/x["Alimentador"].ucs, axis=1)
-    df["Interrupções"] = df["Chave"].apply(lambda x: x.qtd_ocorrencias)
-    df["UCs a jusante da Chave"] = df["Chave"].apply(lambda x: x.ucs)
-    df = df[df["Redução DEC Alimentador estimada [HI]"] != 0]
+    print('Calculando. Ctrl-C cancela o estudo e salva os alimentadores concluídos.')
+    try:
+        with acompanhar(mostrar_progresso) as acompanhamento, cancelar_com_ctrl_c(acompanhamento, avisar_cancelamento):
+            df = estudo_subestacao(
+                se, REAMOSTRAGENS, SEMENTE, CONFIANCA, SENSIBILIDADES, CAUSAS_INCLUIDAS, CAUSAS_EXCLUIDAS
+            )
+        planilha = f'Estudo Subestação {str(se)}'
+    except EstudoCancelado as cancelamento:
+        df = cancelamento.parcial
+        planilha = f'Parcial Subestação {str(se)}'
+        print(f"\nEstudo cancelado. Resultado parcial salvo na planilha {planilha}.")
+    print()
     if df.empty:
         print("Nenhuma chave encontrada para substituição!")
-    df.sort_values(["Redução DEC SE estimada [HI]",], inplace=True, ascending=False)
-    print(f"Unidades Consumidoras {se}: {ucs}")
+    print(f"Unidades Consumidoras {se}: {df.attrs['ucs']}")
     print(df.to_string(index=False)) if not df.empty else None
 
-    if not os.path.exists("Estudo Ganho RLs NF.xlsx"):
-        pd.DataFrame().to_excel("Estudo Ganho RLs NF.xlsx", index=False)
+    with perfil.etapa("escrever Excel"):
+        gravar_planilha("Estudo Ganho RLs NF.xlsx", df, planilha)
+    return
+
+def ler_lista_chaves(caminho: str) -> list:
+    """
+    Nomes das chaves de um arquivo: a primeira coluna de uma planilha Excel, ou o primeiro campo de cada linha de um
+    csv / texto (separado por ";", "," ou tabulação). Linhas vazias e o cabeçalho "Chave" são ignorados.
+    """
+    if caminho.lower().endswith((".xlsx", ".xls")):
+        linhas = pd.read_excel(caminho, header=None, dtype=str).iloc[:, 0].dropna().tolist()
+    else:
+        with open(caminho, encoding="utf-8-sig", errors="replace") as arquivo:
+            linhas = [re.split(r"[;,\t]", linha)[0] for linha in arquivo]
+    nomes = [linha.strip().strip('"').upper() for linha in linhas]
+    return [nome for nome in nomes if nome and nome != "CHAVE"]
 
-    with pd.ExcelWriter("Estudo Ganho RLs NF.xlsx", engine= 'openpyxl', mode = 'a', if_sheet_exists= 'replace') as writer:
-        df.to_excel(writer, index=False, sheet_name=f'Estudo Subestação {str(se)}')
+
+def por_lote(caminho: str):
+    """
+    Estudo por chave de todas as chaves listadas no arquivo, salvo em "Estudo Ganho RLs NF <arquivo>.xlsx" com as
+    entradas não encontradas em outra planilha.
+    """
+    nomes = ler_lista_chaves(caminho)
+    if PERIODOS is not None:
+        return por_lote_periodos(caminho, nomes)
+    with perfil.estudo(f"Lote {os.path.basename(caminho)}"):
+        df, nao_encontradas = estudo_lote(CELESC, nomes, SENSIBILIDADES, CAUSAS_INCLUIDAS, CAUSAS_EXCLUIDAS)
+        saida = f"Estudo Ganho RLs NF {os.path.splitext(os.path.basename(caminho))[0]}.xlsx"
+        with perfil.etapa("escrever Excel"):
+            with escrita_atomica(saida) as temporario, pd.ExcelWriter(temporario) as arquivo:
+                df.to_excel(arquivo, index=False, sheet_name="Estudo por Chave")
+                nao_encontradas.to_excel(arquivo, index=False, sheet_name="Não encontradas")
+    print(f"{len(df)} chaves estudadas, {len(nao_encontradas)} entradas não encontradas. Estudo salvo em {saida}")
+    if not nao_encontradas.empty:
+        print(nao_encontradas.to_string(index=False))
+
+
+def por_lote_periodos(caminho: str, nomes: list):
+    """
+    Estudo por chave das chaves (ou das chaves dos alimentadores, SEs e núcleos) listadas no arquivo em cada período
+    de PERIODOS, sobre a mesma rede, com a variação de cada período em relação ao primeiro. Salvo em
+    "Estudo Ganho RLs NF <arquivo> por período.xlsx", uma planilha por período e por variação.
+    """
+    planilhas = {}
+    with perfil.estudo(f"Lote {os.path.basename(caminho)} por período"):
+        primeiro, *demais = list(PERIODOS)
+        for periodo in PERIODOS:
+            planilhas[f"Estudo {periodo}"], nao_encontradas = estudo_periodo(
+                PERIODOS, nomes, periodo, None, SENSIBILIDADES, CAUSAS_INCLUIDAS, CAUSAS_EXCLUIDAS
+            )
+        for periodo in demais:
+            planilhas[f"Variação {periodo} - {primeiro}"], _ = estudo_periodo(
+                PERIODOS, nomes, periodo, primeiro, SENSIBILIDADES, CAUSAS_INCLUIDAS, CAUSAS_EXCLUIDAS
+            )
+        planilhas["Não encontradas"] = nao_encontradas
+        saida = f"Estudo Ganho RLs NF {os.path.splitext(os.path.basename(caminho))[0]} por período.xlsx"
+        with perfil.etapa("escrever Excel"):
+            with escrita_atomica(saida) as temporario, pd.ExcelWriter(temporario) as arquivo:
+                for nome, df in planilhas.items():
+                    # O Excel limita o nome da planilha a 31 caracteres, sem barras.
+                    df.to_excel(arquivo, index=False, sheet_name=re.sub(r"[\\/*?:\[\]]", "_", nome)[:31])
+    print(f"{len(planilhas[f'Estudo {primeiro}'])} chaves estudadas em {len(PERIODOS)} períodos, "
+          f"{len(nao_encontradas)} entradas não encontradas. Estudo salvo em {saida}")
+    if not nao_encontradas.empty:
+        print(nao_encontradas.to_string(index=False))
+
+
+def _celula(valor):
+    """
+    Valor gravável em uma célula do Excel: NaN fica vazio e infinitos viram texto, como em DataFrame.to_excel.
+    """
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None if math.isnan(valor) else str(valor)
+    return valor
+
+def por_agregado(no: Nucleo | Empresa, ranking: int = 20):
+    """
+    Estudo de todas as SEs de um Núcleo ou da Empresa. As linhas de cada alimentador são gravadas assim que calculadas
+    em "Estudo Ganho RLs NF <nome>.xlsx" (pasta de trabalho em modo de escrita contínua, salva em um temporário e
+    renomeada ao final), e apenas as melhores chaves são mantidas em memória para o resumo final.
+    Ctrl-C cancela o estudo entre alimentadores e salva os alimentadores concluídos em "... <nome> (parcial).xlsx".
+    """
+    arquivo = f"Estudo Ganho RLs NF {no}.xlsx"
+    pasta = Workbook(write_only=True)
+    planilha = pasta.create_sheet(f"Estudo {no}")
+    melhores = []  # heap com as maiores reduções de DIC: (redução, contador, linha)
+    cabecalho = None
+    coluna_ganho = None  # posição da redução de DIC nas linhas, pelo nome da coluna
+    ucs = candidatas = 0
+    try:
+        with acompanhar(mostrar_progresso) as acompanhamento, cancelar_com_ctrl_c(acompanhamento, avisar_cancelamento):
+            for df in estudo_agregado(
+                no, REAMOSTRAGENS, SEMENTE, CONFIANCA, SENSIBILIDADES, CAUSAS_INCLUIDAS, CAUSAS_EXCLUIDAS
+            ):
+                ucs += df.attrs["ucs"]
+                if cabecalho is None:
+                    cabecalho = list(df.columns)
+                    coluna_ganho = cabecalho.index("Redução DIC estimada [h * ucs]")
+                    planilha.append(cabecalho)
+                with perfil.etapa("escrever Excel"):
+                    for linha in df.itertuples(index=False):
+                        planilha.append([_celula(valor) for valor in linha])
+                        candidatas += 1
+                        item = (linha[coluna_ganho], candidatas, linha)
+                        if not math.isfinite(linha[coluna_ganho]):
+                            continue
+                        if len(melhores) < ranking:
+                            heapq.heappush(melhores, item)
+                        else:
+                            heapq.heappushpop(melhores, item)
+    except EstudoCancelado:
+        arquivo = f"Estudo Ganho RLs NF {no} (parcial).xlsx"
+        print(f"\nEstudo cancelado. Resultado dos alimentadores concluídos salvo em {arquivo}")
+    with perfil.etapa("escrever Excel"), escrita_atomica(arquivo) as temporario:
+        pasta.save(temporario)
+
+    print(f"\nUnidades Consumidoras {no}: {ucs}".ljust(40))
+    if not candidatas:
+        print("Nenhuma chave encontrada para substituição!")
+        return
+    df = pd.DataFrame([linha for *_, linha in sorted(melhores, reverse=True)], columns=cabecalho)
+    df.insert(6, f"Redução DEC {no} estimada [HI]", df["Redução DIC estimada [h * ucs]"] / ucs if ucs else float("nan"))
+    df.insert(7, f"Redução FEC {no} estimada [interrupções]", df["Redução FIC estimada [ucs]"] / ucs if ucs else float("nan"))
+    print(f"{candidatas} chaves candidatas, as {len(df)} maiores reduções:")
+    print(df.to_string(index=False))
+    print(f"Estudo salvo em {arquivo}")
     return
 
+def por_nucleo(nucleo: Nucleo):
+    print("Calculando por alimentador. Este processo pode levar algumas horas.")
+    por_agregado(nucleo)
+
+def por_empresa(empresa: Empresa):
+    print("Calculando por alimentador em todos os núcleos. Este processo pode levar muitas horas.")
+    por_agregado(empresa)
+
 def estudo_ganho_rls_nf():
     """
     Gerenciador de estudos RL NF
     """
-    print('Estudo Ganho RL NF:\nEntre com uma Chave, Alimentador, ou SE para começar a análise.\nPara voltar pressione "Enter"')
+    print('Estudo Ganho RL NF:\nEntre com uma Chave, Alimentador, SE, Núcleo ou CELESC para começar a análise.\nPara voltar pressione "Enter"')
     entry = filtro(input().upper())
     while True:
         if not entry:
             return
-        if entry.__class__.__name__ == "Chave":
-            por_chave(entry)
-            
-        if entry.__class__.__name__ == "Alimentador":
-            por_alimentador(entry)
-            
-        if entry.__class__.__name__ == "Subestacao":
-            por_subestacao(entry)
+        with perfil.estudo(f"{entry.__class__.__name__} {entry}"):
+            if entry.__class__.__name__ == "Chave":
+                por_chave(entry)
+
+            if entry.__class__.__name__ == "Alimentador":
+                por_alimentador(entry)
+
+            if entry.__class__.__name__ == "Subestacao":
+                por_subestacao(entry)
+
+            if entry.__class__.__name__ == "Nucleo":
+                por_nucleo(entry)
+
+            if entry.__class__.__name__ == "Empresa":
+                por_empresa(entry)
 
         print(f"Estudo de {entry} Finalizado!")
         print('Entre com outro objeto para continuar, ou "Enter" para voltar')
@@ -141,24 +321,116 @@ def estudo_transferencia_automatica():
     return
 
 
+def validar_base(caminho: str = "Consistência da base.json"):
+    """
+    Cruza RHC, RDC e 1025 da base importada e salva o relatório de inconsistências. Com a rede criada, também
+    compara o DIC de cada alimentador da rede com o do cubo de confiabilidade.
+    """
+    with perfil.estudo("Consistência da base"):
+        relatorio = verificar_base(rede=CELESC)
+        salvar_relatorio(relatorio, caminho)
+    imprimir_resumo(relatorio)
+    print(f"Relatório de consistência salvo em {caminho}")
+
+
+def comparar_topologia(caminho: str = "Diferenças RHC.xlsx"):
+    """
+    Compara a rede do RHC anterior com a do RHC importado e salva os nós adicionados, removidos e movidos.
+    """
+    if not os.path.exists("base/RHC_ANTERIOR"):
+        return
+    with perfil.estudo("Diferenças RHC"):
+        df = diferencas(CriarRede(ler_base("RHC_ANTERIOR")), CriarRede(ler_base("RHC")))
+        if df.empty:
+            print("Topologia da rede sem alterações.")
+            return
+        with escrita_atomica(caminho) as temporario:
+            df.to_excel(temporario, index=False)
+    print(df["Mudança"].value_counts().to_string(header=False))
+    print(f"{df['Alimentador'].nunique()} alimentadores alterados. Diferenças salvas em {caminho}")
+
+
+def aplicar_relatorio_de_chaves(caminho: str = "Alterações RDC.xlsx"):
+    """
+    Aplica o Relatório de Chaves importado à rede carregada, sem recriá-la, e salva os alimentadores alterados.
+    """
+    with perfil.estudo("Atualizar RDC"):
+        df = atualizar_rdc(CELESC, ler_base("RDC"))
+        if df.empty:
+            print("Relatório de Chaves sem alterações.")
+            return
+        with escrita_atomica(caminho) as temporario:
+            df.to_excel(temporario, index=False)
+    print(f"{len(df)} alimentadores com chaves alteradas ({df['Chaves alteradas'].sum()} chaves). "
+          f"Alterações salvas em {caminho}")
+
+
+def validar_rls(caminho: str = "Validação RLs.xlsx"):
+    """
+    Compara a redução de DIC prevista com a realizada nas chaves convertidas em religador entre as versões do RDC
+    importadas, e salva as conversões e a mitigação realizada por causa.
+    """
+    historico = ler_historico_rdc()
+    if len(historico["versoes"]) < 2:
+        print("Histórico do RDC com menos de duas versões: importe um novo RDC ou use --registrar-rdc.")
+        return
+    with perfil.estudo("Validação RLs"):
+        carregar_para(CELESC, "CELESC")
+        conversoes, calibracao = validar_conversoes(
+            CELESC, historico, causas=CAUSAS_INCLUIDAS, excluir_causas=CAUSAS_EXCLUIDAS)
+        if conversoes.empty:
+            print("Nenhuma chave convertida em religador com ocorrencias antes e depois da conversão.")
+            return
+        with escrita_atomica(caminho) as temporario, pd.ExcelWriter(temporario) as arquivo:
+            conversoes.to_excel(arquivo, sheet_name="Conversões", index=False)
+            calibracao.to_excel(arquivo, sheet_name="Mitigação por causa", index=False)
+    antes = conversoes["DIC Acumulado antes [h * ucs/ano]"].sum()
+    prevista = 1 - conversoes["DIC Acumulado previsto pós RL [h * ucs/ano]"].sum() / antes
+    realizada = 1 - conversoes["DIC Acumulado realizado pós RL [h * ucs/ano]"].sum() / antes
+    print(f"{len(conversoes)} chaves convertidas. Redução do DIC acumulado prevista: {prevista:.1%}, "
+          f"realizada: {realizada:.1%}. Validação salva em {caminho}")
+
+
+def registrar_rdcs(registros: list):
+    """
+    Registra no histórico do RDC versões antigas do Relatório de Chaves, cada uma com a sua data de extração.
+    """
+    for arquivo, data in registros:
+        historico = registrar_relatorio_de_chaves(ler_relatorio_de_chaves([arquivo]), pd.Timestamp(data))
+        print(f"RDC {arquivo} registrado em {pd.Timestamp(data):%d/%m/%Y} ({len(historico['versoes'])} versões no histórico).")
+
+
 def selecionar_estudo():
     global CELESC
-    message = "1 - Atualizar Rede\t2 - Estudo Ganho RLs NF.\t3 - Estudo Ganho RLs TA.\tx - Sair"
+    message = "1 - Atualizar Rede\t2 - Estudo Ganho RLs NF.\t3 - Estudo Ganho RLs TA.\t4 - Validação RLs.\tx - Sair"
     print(message)
     estudo = input().upper()
     while True:
-        if estudo not in ["1", "2", "3", "X"]:
-            print("Entre com 1, 2, 3, ou X")
+        if estudo not in ["1", "2", "3", "4", "X"]:
+            print("Entre com 1, 2, 3, 4 ou X")
             estudo = input("-> ").upper()
 
         if estudo == "1":
-            importar_arquivos()
+            atualizados = importar_arquivos()
             print("Arquivos importados com sucesso!")
-            print("Atualizando Rede.", end='\r', flush=True)
-            CELESC = CriarRede()
+            if atualizados:
+                cache.limpar()
+            if "RHC" in atualizados:
+                comparar_topologia()
+            # A rede só é recriada quando a topologia (RHC) muda; um novo RDC é aplicado à rede já criada.
+            # Com a base particionada, qualquer arquivo importado divide a base de novo e recria a rede.
+            particionada = PARTICOES is not None and atualizados
+            if particionada:
+                reparticionar()
+            if CELESC is None or "RHC" in atualizados or particionada:
+                print("Atualizando Rede.", end='\r', flush=True)
+                with perfil.estudo("Criar Rede"):
+                    CELESC = CriarRede()
+            if "RDC" in atualizados and not particionada:
+                aplicar_relatorio_de_chaves()
             print("Rede Atualizada.")
-            print(
-                f'Periodo do relatório 1025: {OCORRENCIAS["DATA INICIO"].min() + " - " + OCORRENCIAS["DATA FIM"].max()}')
+            validar_base()
+            print(f'Periodo do relatório 1025: {periodo_ocorrencias()}')
             print("Selecione a função:")
             print(message)
             estudo = input().upper()
@@ -166,7 +438,8 @@ def selecionar_estudo():
         if estudo == "2":
             if CELESC is None:
                 print("Criando Rede:")
-                CELESC = CriarRede()
+                with perfil.estudo("Criar Rede"):
+                    CELESC = CriarRede()
                 print("Rede criada!")
             estudo_ganho_rls_nf()
             print(message)
@@ -175,23 +448,113 @@ def selecionar_estudo():
         if estudo == "3":
             if CELESC is None:
                 print("Criando Rede:")
-                CELESC = CriarRede()
+                with perfil.estudo("Criar Rede"):
+                    CELESC = CriarRede()
                 print("Rede criada!")
             estudo_transferencia_automatica()
             print(message)
             estudo = input().upper()
 
+        if estudo == "4":
+            if CELESC is None:
+                print("Criando Rede:")
+                with perfil.estudo("Criar Rede"):
+                    CELESC = CriarRede()
+                print("Rede criada!")
+            validar_rls()
+            print(message)
+            estudo = input().upper()
+
         if estudo == "X":
             exit()
 
 def mainloop():
 
     print('Ferramenta de Redução de DEC estimado.')
-    print(f'Periodo do relatório 1025: {OCORRENCIAS["DATA INICIO"].min() + " - " + OCORRENCIAS["DATA FIM"].max()}')
+    if readline is not None:
+        readline.set_completer(completar)
+        readline.parse_and_bind("tab: complete")
+    perfil.imprimir_resumo("Carregamento da base")
+    perfil.reiniciar()
+    print(f'Periodo do relatório 1025: {periodo_ocorrencias()}')
+    filtro_causas = normalizar_filtro(CAUSAS_INCLUIDAS, CAUSAS_EXCLUIDAS)
+    if filtro_causas is not None:
+        print(f"Ocorrências filtradas: {descrever_filtro(filtro_causas)}.")
     print("Selecione a função:")
     while True:
         selecionar_estudo()
 
 
 if __name__ == "__main__":
-    mainloop()
+    parser = argparse.ArgumentParser(description="Ferramenta de Redução de DEC estimado.")
+    parser.add_argument("--reamostragens", type=int, default=0,
+                        help="Número de reamostragens (bootstrap) para os intervalos de confiança. 0 desativa.")
+    parser.add_argument("--semente", type=int, default=None, help="Semente do gerador aleatório das reamostragens.")
+    parser.add_argument("--confianca", type=float, default=0.90, help="Nível de confiança dos intervalos (0-1).")
+    parser.add_argument("--sensibilidades", type=int, nargs="+", default=[], choices=range(1, 11), metavar="N",
+                        help="Compara a redução estimada para religadores com estas sensibilidades (níveis de chaves), ex.: 1 2 3 4 5. "
+                             "A redução principal dos estudos de alimentador e SE é a da sensibilidade 1 (a própria chave).")
+    parser.add_argument("--causas", nargs="+", default=[], metavar="CAUSA",
+                        help="Estuda apenas as ocorrências destas causas: códigos do 1025 ou grupos "
+                             "(VEGETACAO, CLIMA, ANIMAIS, TERCEIROS, PROGRAMADAS, MITIGAVEIS_RA...).")
+    parser.add_argument("--excluir-causas", nargs="+", default=[], metavar="CAUSA",
+                        help="Exclui dos estudos as ocorrências destas causas (códigos ou grupos), ex.: PROGRAMADAS.")
+    parser.add_argument("--registrar-rdc", nargs=2, action="append", default=[], metavar=("CSV", "DATA"),
+                        help="Registra no histórico do RDC uma versão antiga do Relatório de Chaves extraída na DATA "
+                             "(AAAA-MM-DD), para a validação das chaves convertidas em religador. Pode ser repetido.")
+    parser.add_argument("--lote", nargs="+", default=[], metavar="ARQUIVO",
+                        help="Estuda todas as chaves listadas em cada arquivo (csv, txt ou xlsx, uma chave por linha) "
+                             "e encerra, sem abrir a ferramenta interativa.")
+    parser.add_argument("--periodos", nargs="+", default=[], metavar="PERIODO",
+                        help="Com --lote, estuda as chaves em cada período sobre a mesma rede e compara com o primeiro: "
+                             "meses da base (AAAA, AAAAMM-AAAAMM) ou arquivos de ocorrências (csv do 1025 ou base/OCORRENCIAS).")
+    parser.add_argument("--perfil", "--profile", action="store_true",
+                        help="Mede o tempo de cada etapa e imprime um resumo por estudo. Também ativado por DEC_PERFIL=1.")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Não usa nem salva resultados no cache de estudos (pasta cache/). Também desativado por DEC_CACHE=0.")
+    parser.add_argument("--validar", action="store_true",
+                        help="Verifica a consistência entre RHC, RDC e 1025 antes de iniciar.")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="Além do resumo, salva o cProfile de cada estudo na pasta perfil/.")
+    args = parser.parse_args()
+    REAMOSTRAGENS, SEMENTE, CONFIANCA = args.reamostragens, args.semente, args.confianca
+    SENSIBILIDADES = tuple(sorted(set(args.sensibilidades)))
+    try:
+        CAUSAS_INCLUIDAS = resolver_causas(args.causas, CAUSAS)
+        CAUSAS_EXCLUIDAS = resolver_causas(args.excluir_causas, CAUSAS)
+    except ValueError as erro:
+        parser.error(str(erro))
+    if args.perfil or args.cprofile:
+        perfil.ativar(cprofile=args.cprofile)
+    if args.sem_cache:
+        cache.desativar()
+    if args.validar:
+        with perfil.estudo("Criar Rede"):
+            CELESC = CriarRede()
+        validar_base()
+    if args.registrar_rdc:
+        try:
+            registrar_rdcs(args.registrar_rdc)
+        except (ValueError, OSError) as erro:
+            parser.error(str(erro))
+    if args.periodos and not args.lote:
+        parser.error("--periodos requer --lote.")
+    if args.lote:
+        with perfil.estudo("Criar Rede"):
+            if CELESC is None:
+                CELESC = CriarRede()
+            # Base particionada: os núcleos das entradas dos lotes, antes dos agregados dos períodos.
+            for arquivo in args.lote if PARTICOES is not None else []:
+                for nome in ler_lista_chaves(arquivo):
+                    carregar_para(CELESC, nome)
+        if args.periodos:
+            PERIODOS = Periodos(CELESC)
+            try:
+                for fonte in args.periodos:
+                    PERIODOS.adicionar(ler_periodo(fonte))
+            except (ValueError, OSError) as erro:
+                parser.error(str(erro))
+        for arquivo in args.lote:
+            por_lote(arquivo)
+    else:
+        mainloop()
@@ -0,0 +1,345 @@
+import os
+import json
+import time
+import argparse
+import importlib
+import threading
+import traceback
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from src._causas import resolver_causas
+from src._planilhas import PLANILHAS, PASTA as PASTA_PLANILHAS
+
+# Módulos que carregam a base ao serem importados, na ordem de dependência. São recarregados quando a base muda.
+MODULOS = ["src._referencias", "src._cubo", "src._particoes", "src._database", "src._dataclasses", "src._bootstrap", "src._estudos"]
+
+# As planilhas de referência são compiladas para a base ao recarregar src._referencias (src._planilhas).
+ARQUIVOS_BASE = ["base/RHC", "base/RDC", "base/OCORRENCIAS", "base/CAUSAS", "base/CODIGOS_SE"] + [
+    os.path.join(PASTA_PLANILHAS, planilha) for planilha, _ in PLANILHAS.values()
+]
+
+
+def assinatura_base() -> dict:
+    """
+    Data de modificação de cada arquivo da base, usada para detectar atualizações.
+    """
+    return {arquivo: os.path.getmtime(arquivo) for arquivo in ARQUIVOS_BASE if os.path.exists(arquivo)}
+
+
+class TravaLeituraEscrita:
+    """
+    Permite várias leituras simultâneas, ou uma única escrita (recarga da rede).
+    """
+
+    def __init__(self):
+        self._condicao = threading.Condition()
+        self._leitores = 0
+        self._escrevendo = False
+
+    @contextmanager
+    def ler(self):
+        with self._condicao:
+            while self._escrevendo:
+                self._condicao.wait()
+            self._leitores += 1
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._leitores -= 1
+                self._condicao.notify_all()
+
+    @contextmanager
+    def escrever(self):
+        with self._condicao:
+            while self._escrevendo:
+                self._condicao.wait()
+            self._escrevendo = True
+            while self._leitores:
+                self._condicao.wait()
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._escrevendo = False
+                self._condicao.notify_all()
+
+
+class Rede:
+    """
+    Rede carregada e indexada uma única vez, compartilhada entre as requisições em modo somente leitura.
+    """
+
+    def __init__(self):
+        self.trava = TravaLeituraEscrita()
+        self.modulos = {}
+        with self.trava.escrever():
+            self._carregar()
+
+    def _carregar(self):
+        for nome in MODULOS:
+            self.modulos[nome] = (
+                importlib.reload(self.modulos[nome]) if nome in self.modulos else importlib.import_module(nome)
+            )
+        inicio = time.perf_counter()
+        self.raiz = self.modulos["src._dataclasses"].CriarRede()
+        self._indexar()
+        self.assinatura = assinatura_base()
+        self.carregada_em = time.strftime("%Y-%m-%d %H:%M:%S")
+        print(f"Rede carregada em {time.perf_counter() - inicio:.1f} s, {len(self.indice)} nós.", flush=True)
+
+    def _indexar(self):
+        self.indice = {}
+        for no in self.raiz.dft():
+            # O primeiro nó em profundidade prevalece, como em TreeNode.find.
+            self.indice.setdefault(str(no), no)
+
+    def carregar(self, nomes: list):
+        """
+        Base particionada (DEC_PARTICOES=1): carrega na rede os núcleos das entradas ainda não carregados, com a
+        rede bloqueada para as leituras, e refaz o índice de nomes.
+        """
+        dataclasses = self.modulos["src._dataclasses"]
+        indice = self.modulos["src._database"].PARTICOES
+        if indice is None:
+            return
+        particoes = self.modulos["src._particoes"]
+        pendentes = {
+            particao for nome in nomes for particao in particoes.particoes_de(nome, indice)
+        } - self.raiz.__dict__.get("nucleos_carregados", set())
+        if not pendentes:
+            return
+        with self.trava.escrever():
+            if dataclasses.carregar_nucleos(self.raiz, sorted(pendentes)):
+                self._indexar()
+
+    def recarregar(self):
+        with self.trava.escrever():
+            self._carregar()
+
+    def atualizar_rdc(self):
+        """
+        Aplica o Relatório de Chaves da base à rede carregada, sem recriá-la.
+        """
+        with self.trava.escrever():
+            alterados = self.modulos["src._dataclasses"].atualizar_rdc(
+                self.raiz, self.modulos["src._database"].ler_base("RDC")
+            )
+            self.assinatura = assinatura_base()
+            self.carregada_em = time.strftime("%Y-%m-%d %H:%M:%S")
+        print(f"Relatório de Chaves atualizado, {len(alterados)} alimentadores alterados.", flush=True)
+
+    def buscar(self, nome: str):
+        return self.indice.get(nome.upper())
+
+    def sugestoes(self, termo: str, limite: int = 5) -> list:
+        return self.raiz.sugestoes(termo, limite)
+
+    def estudar(self, no, reamostragens: int = 0, semente=None, confianca: float = 0.90, sensibilidades: tuple = (),
+                causas: tuple = (), excluir_causas: tuple = ()):
+        return self.modulos["src._estudos"].estudar(
+            no, reamostragens, semente, confianca, sensibilidades, causas, excluir_causas
+        )
+
+    def estudar_lote(self, nomes: list, sensibilidades: tuple = (), causas: tuple = (), excluir_causas: tuple = ()):
+        return self.modulos["src._estudos"].estudo_lote(self.raiz, nomes, sensibilidades, causas, excluir_causas)
+
+    def resolver_causas(self, valor: str) -> tuple:
+        return resolver_causas([parte for parte in valor.split(",") if parte.strip()], self.modulos["src._database"].CAUSAS)
+
+
+def caminho(no) -> list:
+    return [str(ancestral) for ancestral in no.get_heritage()]
+
+
+def descrever(no) -> dict:
+    """
+    Dados básicos de um nó da rede.
+    """
+    dados = {
+        "nome": str(no),
+        "tipo": no.__class__.__name__,
+        "caminho": caminho(no),
+        "filhos": [str(filho) for filho in no.children],
+    }
+    if dados["tipo"] == "Chave":
+        dados.update({
+            "tipo_chave": no.tipo,
+            "ucs": int(no.ucs),
+            "dic": float(no.dic),
+            "interrupcoes": int(no.qtd_ocorrencias),
+        })
+    return dados
+
+
+def registros(df) -> list:
+    """
+    Converte um DataFrame de estudo em uma lista de registros JSON, com os nós representados pelo nome.
+    """
+    return json.loads(df.to_json(orient="records", default_handler=str, force_ascii=False))
+
+
+class Requisicao(BaseHTTPRequestHandler):
+    """
+    GET  /status                      estado da rede carregada
+    GET  /no/<nome>                   dados de uma chave, alimentador, SE ou núcleo
+    GET  /estudo/<nome>               estudo de ganho RL NF (chave, alimentador ou SE)
+    GET  /ranking/<nome>?n=10         as n melhores chaves candidatas do alimentador ou SE
+    GET  /sugestoes/<termo>?n=10      nomes que completam o termo e nomes próximos
+    POST /lote                        estudo por chave de uma lista de chaves (JSON {"chaves": [...]} ou uma por linha)
+    POST /recarregar                  recarrega a base e reconstrói a rede
+    Parâmetros opcionais dos estudos: reamostragens, semente, confianca, sensibilidades (ex.: 1,2,3),
+    causas e excluir_causas (códigos ou grupos de causas, ex.: VEGETACAO,72).
+    Parâmetros inválidos retornam 400, e erros inesperados 500, sempre com {"erro": ...}.
+    """
+    rede: Rede = None
+    estudos: threading.BoundedSemaphore = None
+
+    def _responder(self, codigo: int, dados):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        partes = [unquote(parte) for parte in url.path.strip("/").split("/") if parte]
+        parametros = {chave: valores[-1] for chave, valores in parse_qs(url.query).items()}
+        try:
+            if len(partes) == 2 and partes[0] in ("no", "estudo", "ranking"):
+                self.rede.carregar([partes[1]])
+            with self.rede.trava.ler():
+                if partes == ["status"]:
+                    return self._responder(200, {
+                        "carregada_em": self.rede.carregada_em,
+                        "nos": len(self.rede.indice),
+                        "base": self.rede.assinatura,
+                    })
+                if len(partes) != 2 or partes[0] not in ("no", "estudo", "ranking", "sugestoes"):
+                    return self._responder(404, {"erro": f"Rota {url.path} não encontrada."})
+                if partes[0] == "sugestoes":
+                    limite = int(parametros.get("n", 10))
+                    return self._responder(200, {
+                        "termo": partes[1],
+                        "prefixo": self.rede.raiz.euler.nomes.prefixo(partes[1], limite),
+                        "sugestoes": self.rede.sugestoes(partes[1], limite),
+                    })
+                no = self.rede.buscar(partes[1])
+                if no is None:
+                    return self._responder(404, {
+                        "erro": f'Nenhum objeto "{partes[1]}" encontrado na rede.',
+                        "sugestoes": self.rede.sugestoes(partes[1]),
+                    })
+                if partes[0] == "no":
+                    return self._responder(200, descrever(no))
+
+                with self.estudos:
+                    df = self.rede.estudar(
+                        no,
+                        int(parametros.get("reamostragens", 0)),
+                        int(parametros["semente"]) if "semente" in parametros else None,
+                        float(parametros.get("confianca", 0.90)),
+                        tuple(int(valor) for valor in parametros.get("sensibilidades", "").split(",") if valor),
+                        self.rede.resolver_causas(parametros.get("causas", "")),
+                        self.rede.resolver_causas(parametros.get("excluir_causas", "")),
+                    )
+                if df is None:
+                    return self._responder(400, {"erro": f"Não há estudo para {no.__class__.__name__} {no}."})
+                if partes[0] == "ranking":
+                    df = df.head(int(parametros.get("n", 10)))
+                return self._responder(200, {
+                    "no": str(no),
+                    "tipo": no.__class__.__name__,
+                    "ucs": int(df.attrs["ucs"]) if "ucs" in df.attrs else None,
+                    "linhas": registros(df),
+                })
+        except ValueError as erro:
+            return self._responder(400, {"erro": str(erro)})
+        except Exception as erro:
+            return self._falha(erro)
+
+    def _falha(self, erro: Exception):
+        """
+        Erro inesperado em um estudo: o traceback fica no log do servidor e o cliente recebe 500 com o erro em JSON.
+        """
+        traceback.print_exc()
+        return self._responder(500, {"erro": f"{erro.__class__.__name__}: {erro}"})
+
+    def _lote(self, parametros: dict):
+        tamanho = int(self.headers.get("Content-Length", 0))
+        corpo = self.rfile.read(tamanho).decode("utf-8") if tamanho else ""
+        if corpo.lstrip().startswith(("{", "[")):
+            dados = json.loads(corpo)
+            nomes = dados.get("chaves", []) if isinstance(dados, dict) else dados
+        else:
+            nomes = corpo.splitlines()
+        self.rede.carregar(nomes)
+        with self.rede.trava.ler(), self.estudos:
+            df, nao_encontradas = self.rede.estudar_lote(
+                nomes,
+                tuple(int(valor) for valor in parametros.get("sensibilidades", "").split(",") if valor),
+                self.rede.resolver_causas(parametros.get("causas", "")),
+                self.rede.resolver_causas(parametros.get("excluir_causas", "")),
+            )
+        return self._responder(200, {"linhas": registros(df), "nao_encontradas": registros(nao_encontradas)})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.strip("/") == "lote":
+            try:
+                return self._lote({chave: valores[-1] for chave, valores in parse_qs(url.query).items()})
+            except ValueError as erro:  # inclui JSON inválido
+                return self._responder(400, {"erro": str(erro)})
+            except Exception as erro:
+                return self._falha(erro)
+        if url.path.strip("/") != "recarregar":
+            return self._responder(404, {"erro": f"Rota {self.path} não encontrada."})
+        self.rede.recarregar()
+        return self._responder(200, {"carregada_em": self.rede.carregada_em, "nos": len(self.rede.indice)})
+
+
+def vigiar_base(rede: Rede, intervalo: float):
+    """
+    Recarrega a rede quando algum arquivo da base é modificado (ex.: após "Atualizar Rede").
+    """
+    while True:
+        time.sleep(intervalo)
+        assinatura = assinatura_base()
+        if assinatura != rede.assinatura:
+            modificados = {arquivo for arquivo in ARQUIVOS_BASE if assinatura.get(arquivo) != rede.assinatura.get(arquivo)}
+            # Com a base particionada, o RDC carregado é só o dos núcleos da rede: a recarga divide a base de novo.
+            if modificados == {"base/RDC"} and rede.modulos["src._database"].PARTICOES is None:
+                rede.atualizar_rdc()
+                continue
+            print("Base modificada, recarregando a rede.", flush=True)
+            rede.recarregar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de estudos, mantém a rede carregada em memória.")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--endereco", default="127.0.0.1")
+    parser.add_argument("--trabalhadores", type=int, default=4, help="Estudos executados simultaneamente.")
+    parser.add_argument("--intervalo", type=float, default=10.0,
+                        help="Intervalo [s] de verificação de mudanças na base. 0 desativa a recarga automática.")
+    args = parser.parse_args()
+
+    Requisicao.rede = Rede()
+    Requisicao.estudos = threading.BoundedSemaphore(args.trabalhadores)
+    if args.intervalo:
+        threading.Thread(target=vigiar_base, args=(Requisicao.rede, args.intervalo), daemon=True).start()
+
+    servidor = ThreadingHTTPServer((args.endereco, args.porta), Requisicao)
+    servidor.daemon_threads = True
+    print(f"Servidor de estudos em http://{args.endereco}:{args.porta}", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import contextlib
+import pandas as pd
+
+# Escrita atômica dos arquivos de resultado: o arquivo é escrito em um temporário na mesma pasta e só substitui o
+# original (os.replace) quando a escrita termina, como no cache de estudos (src._cache.gravar). Um estudo interrompido
+# ou cancelado durante a escrita mantém o arquivo anterior intacto.
+
+# Permissões de um arquivo novo (tempfile.mkstemp cria o temporário só para o usuário). A máscara é lida uma única
+# vez, na importação, pois os.umask altera a máscara do processo inteiro.
+UMASCARA = os.umask(0)
+os.umask(UMASCARA)
+
+
+def _temporario(caminho: str) -> str:
+    """
+    Temporário vazio e exclusivo da escrita na pasta de caminho, pois threads do servidor podem gravar o mesmo
+    arquivo ao mesmo tempo. Mantém a extensão, usada pelo pandas / openpyxl para escolher o formato, e as permissões
+    do arquivo existente.
+    """
+    raiz, extensao = os.path.splitext(caminho)
+    descritor, temporario = tempfile.mkstemp(
+        dir=os.path.dirname(caminho) or ".", prefix=f"{os.path.basename(raiz)}.", suffix=f".tmp{extensao}"
+    )
+    os.close(descritor)
+    with contextlib.suppress(OSError):
+        if os.path.exists(caminho):
+            shutil.copymode(caminho, temporario)
+        else:
+            os.chmod(temporario, 0o666 & ~UMASCARA)
+    return temporario
+
+
+@contextlib.contextmanager
+def escrita_atomica(caminho: str, copiar: bool = False):
+    """
+    Caminho temporário para escrever o arquivo, que substitui caminho ao final do bloco. Com copiar, o temporário
+    começa como cópia do arquivo existente (para acrescentar planilhas). Se o bloco falhar, o temporário é removido.
+    """
+    temporario = _temporario(caminho)
+    try:
+        if copiar and os.path.exists(caminho):
+            shutil.copyfile(caminho, temporario)
+        yield temporario
+        os.replace(temporario, caminho)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temporario)
+        raise
+
+
+def gravar_planilha(caminho: str, df: pd.DataFrame, planilha: str, acrescentar: bool = False):
+    """
+    Grava df na planilha do arquivo Excel, mantendo as demais planilhas. A planilha é substituída, ou, com
+    acrescentar, recebe as linhas abaixo das existentes (sem repetir o cabeçalho).
+    """
+    with escrita_atomica(caminho, copiar=True) as temporario:
+        if not os.path.getsize(temporario):  # sem arquivo anterior, o temporário começa vazio
+            df.to_excel(temporario, index=False, sheet_name=planilha)
+            return
+        modo = "overlay" if acrescentar else "replace"
+        with pd.ExcelWriter(temporario, engine="openpyxl", mode="a", if_sheet_exists=modo) as writer:
+            inicio = writer.sheets[planilha].max_row if acrescentar and planilha in writer.sheets else 0
+            df.to_excel(writer, index=False, sheet_name=planilha, startrow=inicio, header=not inicio)
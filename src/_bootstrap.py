@@ -0,0 +1,133 @@
+import numpy as np
+import src._database as database  # OCORRENCIAS pelo módulo: cresce com os núcleos da base particionada
+from src._database import indice_ocorrencias, fator_mitigacao_ocorrencias, mascara_ocorrencias
+from src._causas import filtro_atual
+
+# Limite de elementos sorteados por lote, para controlar o uso de memória.
+LIMITE_SORTEIO = 5_000_000
+
+VAZIO = np.empty(0, dtype=np.int64)
+
+
+def somas_reamostradas(
+    estratos: list,
+    pesos: np.ndarray,
+    reamostragens: int,
+    rng: np.random.Generator,
+    grupos=None,
+    n_grupos: int | None = None,
+) -> np.ndarray:
+    """
+    Reamostra com reposição as ocorrencias de cada estrato e soma os pesos por grupo.
+
+    estratos: lista de arrays com as posições das ocorrencias de cada estrato (chave).
+    pesos: valores por ocorrencia, shape (n,) ou (n, m).
+    grupos: grupo de saída de cada estrato. Por padrão cada estrato é um grupo.
+    Retorna um array de shape (reamostragens, n_grupos, m).
+    """
+    pesos = np.asarray(pesos, dtype=float)
+    if pesos.ndim == 1:
+        pesos = pesos[:, None]
+    grupos = np.arange(len(estratos)) if grupos is None else np.asarray(grupos, dtype=np.int64)
+    if n_grupos is None:
+        n_grupos = int(grupos.max()) + 1 if len(grupos) else 0
+    somas = np.zeros((reamostragens, n_grupos, pesos.shape[1]))
+
+    tamanhos = np.array([len(estrato) for estrato in estratos], dtype=np.int64)
+    selecionados = np.flatnonzero(tamanhos > 0)
+    if not len(selecionados):
+        return somas
+    # Ordena os estratos por grupo, assim cada grupo ocupa um trecho contíguo das colunas.
+    selecionados = selecionados[np.argsort(grupos[selecionados], kind="stable")]
+    tamanhos = tamanhos[selecionados]
+    posicoes = np.concatenate([estratos[i] for i in selecionados])
+    inicio = np.cumsum(tamanhos) - tamanhos
+
+    estrato_coluna = np.repeat(np.arange(len(selecionados)), tamanhos)
+    inicio_coluna = inicio[estrato_coluna]
+    tamanho_coluna = tamanhos[estrato_coluna]
+    grupos_presentes, inicio_grupo = np.unique(grupos[selecionados][estrato_coluna], return_index=True)
+
+    n = len(posicoes)
+    lote = max(1, LIMITE_SORTEIO // n)
+    for a in range(0, reamostragens, lote):
+        b = min(a + lote, reamostragens)
+        sorteio = inicio_coluna + (rng.random((b - a, n)) * tamanho_coluna).astype(np.int64)
+        valores = pesos[posicoes[sorteio]]
+        somas[a:b, grupos_presentes] = np.add.reduceat(valores, inicio_grupo, axis=1)
+    return somas
+
+
+def percentis(amostras: np.ndarray, confianca: float) -> tuple:
+    """
+    Limites inferior e superior do intervalo de confiança, calculados ao longo do eixo das reamostragens.
+    """
+    alfa = 100 * (1 - confianca) / 2
+    return tuple(np.percentile(amostras, [alfa, 100 - alfa], axis=0))
+
+
+def rotulos_intervalo(confianca: float) -> tuple:
+    """
+    Rótulos dos percentis do intervalo, ex.: ("5%", "95%") para 90% de confiança.
+    """
+    alfa = 100 * (1 - confianca) / 2
+    return f"{alfa:g}%", f"{100 - alfa:g}%"
+
+
+def intervalo_ganho_dic(chaves: list, reamostragens: int = 1000, semente=None, confianca: float = 0.90) -> tuple:
+    """
+    Intervalo de confiança da redução de DIC [h * ucs] obtida ao substituir cada chave por religador,
+    ou seja, chave.dic - chave.dic_pos_rl reamostrando as ocorrencias da própria chave.
+    Retorna dois arrays (inferior, superior), alinhados com a lista de chaves.
+    """
+    indice = indice_ocorrencias()
+    # Apenas as ocorrencias de causas permitidas pelo filtro de causas ativo (src._causas).
+    permitida = mascara_ocorrencias(filtro_atual())
+    estratos = [
+        VAZIO if chave.tipo in ["RA", "TS"] else indice.get(str(chave), VAZIO)
+        for chave in chaves
+    ]
+    estratos = [estrato[permitida[estrato]] for estrato in estratos]
+    ganho = database.OCORRENCIAS["DIC"].to_numpy(dtype=float) * fator_mitigacao_ocorrencias()
+    rng = np.random.default_rng(semente)
+    somas = somas_reamostradas(estratos, ganho, reamostragens, rng)[:, :, 0]
+    return percentis(somas, confianca)
+
+
+def intervalo_reducao_dic_acumulado(
+    chave, reamostragens: int = 1000, semente=None, confianca: float = 0.90, sensibilidade: int = 2
+) -> tuple:
+    """
+    Intervalo de confiança da redução do DIC acumulado [%] estimada em Chave.dic_acumulado_pos_rl,
+    reamostrando as ocorrencias de cada chave a jusante separadamente.
+    """
+    indice = indice_ocorrencias()
+    permitida = mascara_ocorrencias(filtro_atual())
+    dic = database.OCORRENCIAS["DIC"].to_numpy(dtype=float)
+    dic_pos_rl = dic * (1 - fator_mitigacao_ocorrencias())
+    nivel = chave.get_level()
+
+    estratos, mitigados = [], []
+    for jusante in chave.chaves_jusante():
+        if jusante.__class__.__name__ != "Chave" or str(jusante) not in indice:
+            continue
+        estratos.append(indice[str(jusante)][permitida[indice[str(jusante)]]])
+        mitigados.append(jusante.get_level() - nivel < sensibilidade and jusante.tipo not in ["RA", "TS"])
+    if not estratos:
+        return np.nan, np.nan
+
+    # Posições repetidas por estrato: o peso "pós RL" depende da chave, então cada estrato recebe sua própria faixa.
+    tamanhos = [len(estrato) for estrato in estratos]
+    posicoes = np.concatenate(estratos)
+    mitigado = np.repeat(mitigados, tamanhos)
+    pesos = np.column_stack([dic[posicoes], np.where(mitigado, dic_pos_rl[posicoes], dic[posicoes])])
+    locais = np.split(np.arange(len(posicoes)), np.cumsum(tamanhos)[:-1])
+
+    rng = np.random.default_rng(semente)
+    somas = somas_reamostradas(locais, pesos, reamostragens, rng, grupos=np.zeros(len(locais)))[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reducao = 100 * (1 - somas[:, 1] / somas[:, 0])
+    reducao = reducao[np.isfinite(reducao)]
+    if not len(reducao):
+        return np.nan, np.nan
+    return tuple(np.round(percentis(reducao, confianca), 2))
@@ -0,0 +1,84 @@
+import difflib
+import numpy as np
+
+# Índice dos nomes dos nós da rede (chaves SIGLA_CODIGO, alimentadores, SEs, núcleos) para a busca exata, por prefixo
+# e sugestões de nomes próximos. Os nomes ficam em um array ordenado, e os nomes com um prefixo ocupam um intervalo
+# contínuo do array, encontrado por busca binária (a mesma consulta de uma trie, sem um nó por caractere).
+FIM_PREFIXO = "\U0010ffff"  # maior caractere: prefixo + FIM_PREFIXO fica depois de todos os nomes com o prefixo
+JANELA = 200  # nomes vizinhos comparados por difflib nas sugestões
+
+
+class IndiceNomes:
+    """
+    Nomes (TreeNode.data) dos nós em pré-ordem. posicoes[k] é a posição na ordem do k-ésimo nome ordenado; nomes
+    repetidos ficam juntos, em pré-ordem. unicos são os nomes distintos, e codigos o código das chaves (parte após
+    a sigla da regional) ordenado, para sugerir a mesma chave em outra regional.
+    """
+
+    def __init__(self, ordem: list):
+        nomes = np.array([str(no.data) for no in ordem], dtype=str)
+        self.posicoes = np.argsort(nomes, kind="stable")
+        self.ordenados = nomes[self.posicoes]
+        self.unicos = np.unique(self.ordenados)
+        partes = np.char.partition(self.unicos, "_")
+        com_codigo = np.flatnonzero(partes[:, 1] == "_")
+        ordem_codigos = np.argsort(partes[com_codigo, 2], kind="stable")
+        self.codigos = partes[com_codigo, 2][ordem_codigos]
+        self.nomes_codigos = self.unicos[com_codigo][ordem_codigos]
+
+    def __len__(self) -> int:
+        return len(self.unicos)
+
+    @staticmethod
+    def _intervalo(array: np.ndarray, prefixo: str) -> tuple:
+        return (int(np.searchsorted(array, prefixo, side="left")),
+                int(np.searchsorted(array, prefixo + FIM_PREFIXO, side="left")))
+
+    def primeira(self, nome: str, inicio: int = 0, fim: int | None = None) -> int:
+        """
+        Primeira posição em pré-ordem do nó com o nome dentro de [inicio, fim), como TreeNode.find, ou -1.
+        """
+        a = int(np.searchsorted(self.ordenados, nome, side="left"))
+        b = int(np.searchsorted(self.ordenados, nome, side="right"))
+        if a == b:
+            return -1
+        posicoes = self.posicoes[a:b]
+        k = int(np.searchsorted(posicoes, inicio))
+        if k < len(posicoes) and (fim is None or posicoes[k] < fim):
+            return int(posicoes[k])
+        return -1
+
+    def prefixo(self, prefixo: str, limite: int = 10) -> list:
+        """
+        Nomes distintos que começam com o prefixo, em ordem alfabética.
+        """
+        a, b = self._intervalo(self.unicos, prefixo.strip().upper())
+        return self.unicos[a:min(b, a + limite)].tolist()
+
+    def sugestoes(self, termo: str, limite: int = 5) -> list:
+        """
+        Nomes próximos do termo, para quando a busca exata falha: nomes que completam o termo, a mesma chave em outra
+        regional (mesmo código) e nomes parecidos (difflib) entre os vizinhos do maior prefixo do termo encontrado.
+        """
+        termo = termo.strip().upper()
+        if not termo:
+            return []
+        sugestoes = dict.fromkeys(self.prefixo(termo, limite))
+        _, separador, codigo = termo.partition("_")
+        if separador and codigo:
+            a, b = self._intervalo(self.codigos, codigo)
+            # Códigos iguais primeiro, depois os que completam o código digitado.
+            iguais = self.nomes_codigos[a:b][self.codigos[a:b] == codigo]
+            sugestoes.update(dict.fromkeys([*iguais[:limite].tolist(), *self.nomes_codigos[a:min(b, a + limite)].tolist()]))
+        if len(sugestoes) < limite:
+            for tamanho in range(len(termo), 0, -1):
+                a, b = self._intervalo(self.unicos, termo[:tamanho])
+                if a < b:
+                    break
+            else:
+                a, b = 0, len(self.unicos)
+            centro = int(np.searchsorted(self.unicos, termo))
+            vizinhos = self.unicos[max(a, centro - JANELA):min(b, centro + JANELA)].tolist()
+            sugestoes.update(dict.fromkeys(difflib.get_close_matches(termo, vizinhos, n=limite, cutoff=0.6)))
+        sugestoes.pop(termo, None)
+        return list(sugestoes)[:limite]
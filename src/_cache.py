@@ -0,0 +1,178 @@
+import os
+import pickle
+import inspect
+import hashlib
+import tempfile
+import contextlib
+from functools import wraps
+from src._perfil import contar
+
+# Cache em disco dos resultados dos estudos. A chave combina o tipo e o nome do nó, os ancestrais do nó (núcleo, SE e
+# alimentador, que aparecem nas colunas dos estudos), o hash da subárvore do nó (topologia, ver calcular_hashes), os
+# parâmetros do estudo, a versão dos dados da base carregada (RDC, 1025, causas) e a versão das colunas dos estudos,
+# de modo que uma mudança na base, na topologia do nó ou nas tabelas dos estudos gera outra chave.
+# Desativado pela variável de ambiente DEC_CACHE=0 ou por desativar() (argumento --sem-cache do main.py).
+ATIVO = os.environ.get("DEC_CACHE", "1") != "0"
+PASTA = os.environ.get("DEC_CACHE_PASTA", "cache")
+LIMITE_MB = float(os.environ.get("DEC_CACHE_LIMITE_MB", 200))
+
+ARQUIVOS_DADOS = ["base/RDC", "base/OCORRENCIAS", "base/CAUSAS", "base/CODIGOS_SE"]
+
+
+def versao_arquivos(arquivos: list) -> str:
+    """
+    Hash do conteúdo dos arquivos da base.
+    """
+    hash_base = hashlib.blake2b(digest_size=16)
+    for arquivo in arquivos:
+        hash_base.update(arquivo.encode())
+        if os.path.exists(arquivo):
+            with open(arquivo, "rb") as conteudo:
+                for bloco in iter(lambda: conteudo.read(1 << 20), b""):
+                    hash_base.update(bloco)
+    return hash_base.hexdigest()
+
+
+def desativar():
+    global ATIVO
+    ATIVO = False
+
+
+def _caminho(chave: str) -> str:
+    return os.path.join(PASTA, f"{chave}.pkl")
+
+
+def ler(chave: str):
+    """
+    Resultado salvo para a chave, ou None. Um acerto atualiza a data de modificação do arquivo, usada como data de
+    último acesso na remoção LRU.
+    """
+    caminho = _caminho(chave)
+    try:
+        with open(caminho, "rb") as arquivo:
+            resultado = pickle.load(arquivo)
+        os.utime(caminho)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    return resultado
+
+
+def gravar(chave: str, resultado):
+    """
+    Salva o resultado (escrita atômica) e remove os resultados menos usados se a pasta passar do limite.
+    Cada escrita usa o seu próprio temporário, pois threads do servidor podem gravar a mesma chave ao mesmo tempo.
+    Uma falha de escrita apenas deixa o resultado fora do cache, sem interromper o estudo.
+    """
+    temporario = None
+    try:
+        os.makedirs(PASTA, exist_ok=True)
+        descritor, temporario = tempfile.mkstemp(dir=PASTA, suffix=".tmp")
+        with os.fdopen(descritor, "wb") as arquivo:
+            pickle.dump(resultado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, _caminho(chave))
+        reduzir(LIMITE_MB * 1024 * 1024)
+    except OSError:
+        if temporario is not None:
+            with contextlib.suppress(OSError):
+                os.remove(temporario)
+        contar("cache: falhas de escrita")
+
+
+def reduzir(limite_bytes: float):
+    """
+    Remove os resultados acessados há mais tempo até que a pasta do cache fique abaixo do limite.
+    """
+    entradas = []
+    with os.scandir(PASTA) as arquivos:
+        for arquivo in arquivos:
+            if arquivo.name.endswith(".pkl"):
+                informacao = arquivo.stat()
+                entradas.append((informacao.st_mtime, informacao.st_size, arquivo.path))
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= tamanho
+        contar("cache: removidos (LRU)")
+
+
+def limpar():
+    """
+    Remove todos os resultados salvos, ex.: após "Atualizar Rede".
+    """
+    if os.path.isdir(PASTA):
+        reduzir(0)
+
+
+def _empacotar(df):
+    """
+    Substitui os nós da rede (Chave, Alimentador...) pelo nome, para não serializar a árvore inteira junto com o
+    resultado. Retorna o DataFrame e as colunas substituídas.
+    """
+    from src._dataclasses import TreeNode
+
+    colunas = [coluna for coluna in df.columns
+               if df[coluna].dtype == object and len(df) and isinstance(df[coluna].iloc[0], TreeNode)]
+    df = df.copy()
+    for coluna in colunas:
+        df[coluna] = df[coluna].astype(str)
+    return df, colunas
+
+
+def _desempacotar(no, df, colunas):
+    """
+    Restaura os nós pelo nome, procurando-os na subárvore do nó estudado.
+    """
+    if colunas:
+        nos = {}
+        for item in no.dft():
+            nos.setdefault(str(item), item)
+        for coluna in colunas:
+            df[coluna] = df[coluna].map(nos)
+    return df
+
+
+def em_cache(versao, saida: int = 0):
+    """
+    Decorador dos estudos estudo(no, reamostragens, semente, confianca, ...) -> DataFrame.
+    versao é uma função que retorna a versão dos dados carregados, e saida a versão das colunas do estudo (os
+    resultados salvos com outra versão são ignorados). Todos os parâmetros do estudo fazem parte da chave.
+    Estudos com reamostragem sem semente não são salvos, pois não são reprodutíveis.
+    """
+    def decorador(estudo):
+        assinatura = inspect.signature(estudo)
+
+        @wraps(estudo)
+        def envoltorio(no, *args, **kwargs):
+            argumentos = assinatura.bind(no, *args, **kwargs)
+            argumentos.apply_defaults()
+            parametros = [
+                (nome, tuple(valor) if isinstance(valor, list) else valor)
+                for nome, valor in list(argumentos.arguments.items())[1:]
+            ]
+            reamostragens = argumentos.arguments.get("reamostragens")
+            hash_no = getattr(no, "hash_subarvore", None)
+            if not ATIVO or hash_no is None or (reamostragens and argumentos.arguments.get("semente") is None):
+                return estudo(no, *args, **kwargs)
+            ancestrais = [str(ancestral) for ancestral in no.get_heritage()]
+            chave = hashlib.blake2b(
+                repr((
+                    estudo.__name__, saida, no.__class__.__name__, str(no), ancestrais, hash_no, parametros, versao(),
+                )).encode(),
+                digest_size=16,
+            ).hexdigest()
+            salvo = ler(chave)
+            if salvo is not None:
+                contar("cache: acertos")
+                df, colunas = salvo
+                return _desempacotar(no, df, colunas)
+            contar("cache: faltas")
+            df = estudo(no, *args, **kwargs)
+            gravar(chave, _empacotar(df))
+            return df
+        return envoltorio
+    return decorador
@@ -0,0 +1,104 @@
+import inspect
+import contextlib
+import contextvars
+from functools import wraps
+import numpy as np
+from src._constants import GRUPOS_CAUSAS
+
+# Filtro de causas dos estudos: causas incluídas (vazio para todas) e excluídas do relatório 1025.
+# O filtro vale para a thread (ou contexto) em que foi definido, de modo que estudos simultâneos do servidor podem usar
+# filtros diferentes. As propriedades das chaves (lista_ocorrencias, dic, fic...) e os índices da árvore consultam o
+# filtro ativo. Os códigos de causa vão até 99, além de uma palavra de 64 bits, então a máscara de um filtro é uma
+# tabela booleana indexada pelo código da causa, aplicada de forma vetorizada ao código de cada ocorrência.
+MITIGAVEIS_RA = "MITIGAVEIS RA"  # grupo das causas com mitigação por religador (CAUSAS["MITIGACAO POR RA"] > 0)
+
+FILTRO = contextvars.ContextVar("filtro_causas", default=None)
+
+
+def resolver_causas(valores, causas=None) -> tuple:
+    """
+    Códigos de causa, em ordem, a partir de códigos e nomes de grupos (GRUPOS_CAUSAS ou MITIGAVEIS_RA, que usa a
+    tabela causas). Ex.: resolver_causas(["VEGETACAO", "72"]) -> (29, 62, 72, 80).
+    """
+    codigos = set()
+    for valor in valores:
+        nome = str(valor).strip().upper().replace("_", " ")
+        if nome.isdigit():
+            codigos.add(int(nome))
+        elif nome in GRUPOS_CAUSAS:
+            codigos.update(GRUPOS_CAUSAS[nome])
+        elif nome == MITIGAVEIS_RA and causas is not None:
+            codigos.update(causas.loc[causas["MITIGACAO POR RA"] > 0, "CODIGO"].astype(int))
+        else:
+            grupos = ", ".join([*GRUPOS_CAUSAS, MITIGAVEIS_RA])
+            raise ValueError(f'Causa "{valor}" inválida. Use códigos de causa ou os grupos: {grupos}.')
+    return tuple(sorted(codigos))
+
+
+def normalizar_filtro(incluir=(), excluir=()) -> tuple | None:
+    """
+    Filtro (incluídas, excluídas) com os códigos em ordem, ou None quando nenhuma causa é filtrada.
+    """
+    incluir = tuple(sorted({int(codigo) for codigo in incluir}))
+    excluir = tuple(sorted({int(codigo) for codigo in excluir}))
+    if not incluir and not excluir:
+        return None
+    return incluir, excluir
+
+
+def filtro_atual() -> tuple | None:
+    return FILTRO.get()
+
+
+@contextlib.contextmanager
+def filtrar_causas(incluir=(), excluir=()):
+    """
+    Ativa o filtro de causas dentro do bloco. Sem causas, o bloco usa todas as ocorrências.
+    """
+    token = FILTRO.set(normalizar_filtro(incluir, excluir))
+    try:
+        yield
+    finally:
+        FILTRO.reset(token)
+
+
+def permitidas(codigos: np.ndarray, filtro: tuple | None) -> np.ndarray:
+    """
+    Máscara booleana das ocorrências (ou agregados) com causa permitida pelo filtro, a partir do código da causa.
+    """
+    codigos = np.asarray(codigos, dtype=np.int64)
+    if filtro is None:
+        return np.ones(len(codigos), dtype=bool)
+    incluir, excluir = filtro
+    tamanho = max(int(codigos.max(initial=0)), *incluir, *excluir, 0) + 1
+    tabela = np.zeros(tamanho, dtype=bool) if incluir else np.ones(tamanho, dtype=bool)
+    tabela[list(incluir)] = True
+    tabela[list(excluir)] = False
+    return tabela[codigos]
+
+
+def descrever_filtro(filtro: tuple | None) -> str:
+    if filtro is None:
+        return "todas as causas"
+    incluir, excluir = filtro
+    partes = []
+    if incluir:
+        partes.append(f"causas {', '.join(map(str, incluir))}")
+    if excluir:
+        partes.append(f"exceto {', '.join(map(str, excluir))}")
+    return ", ".join(partes)
+
+
+def com_filtro_causas(estudo):
+    """
+    Decorador dos estudos com os parâmetros causas e excluir_causas: executa o estudo com o filtro de causas ativo.
+    """
+    assinatura = inspect.signature(estudo)
+
+    @wraps(estudo)
+    def envoltorio(*args, **kwargs):
+        argumentos = assinatura.bind(*args, **kwargs)
+        argumentos.apply_defaults()
+        with filtrar_causas(argumentos.arguments["causas"], argumentos.arguments["excluir_causas"]):
+            return estudo(*args, **kwargs)
+    return envoltorio
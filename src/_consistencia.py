@@ -0,0 +1,208 @@
+import json
+import numpy as np
+import pandas as pd
+from src._referencias import CODIGO_POR_SIMO, ambiguidades, tipo_por_codigo
+from src._rhc import normalizar_rhc, tipos_no
+from src._cubo import Cubo, carregar_cubo, construir_cubo, conferir_rede
+
+# Verificação cruzada da base: Relatório Hierárquico de Chaves (RHC), Relatório de Chaves (RDC) e relatório 1025.
+# Todas as verificações são operações de conjunto ou de agrupamento sobre as tabelas, sem montar a árvore da rede.
+COMPRESSAO = {'method': "gzip", 'compresslevel': 1, 'mtime': 1}
+TOLERANCIA_DIC = 0.01  # [h * ucs], diferença de DIC entre a rede e o cubo considerada divergente
+
+
+def _ler(nome: str) -> pd.DataFrame:
+    return pd.read_pickle(f"base/{nome}", compression=COMPRESSAO)
+
+
+def nos_rhc(rhc: pd.DataFrame) -> pd.DataFrame:
+    """
+    Uma linha por nó do RHC (largo ou compacto), com a mesma classificação de CriarRede: profundidade, tipo do nó
+    ("Subestacao", "Alimentador", "SED", "Chave"), nome, sigla SIMO, código e a linha do nó pai.
+    Linhas de chave fora do padrão SIGLA_CODIGO ficam com tipo "Inválida".
+    """
+    rhc = normalizar_rhc(rhc)
+    profundidade = rhc["PROFUNDIDADE"].to_numpy()
+    valor = rhc["ROTULO"].astype(str).reset_index(drop=True)
+
+    primeiro = valor.str.split(" ").str[0]
+    tipo = tipos_no(rhc)
+    partes = valor.str.split().str[0].str.split("_")
+    chaves = tipo == "Chave"
+    validas = chaves & (partes.str.len() == 2).to_numpy()
+    sigla = partes.str[0].str.upper()
+    codigo = pd.to_numeric(partes.str[1], errors="coerce")
+    validas &= codigo.notna().to_numpy()
+    tipo[chaves & ~validas] = "Inválida"
+
+    nome = primeiro.copy()
+    nome[validas] = sigla[validas] + "_" + codigo[validas].astype(np.int64).astype(str)
+    # Alimentadores de disjuntores fictícios, como em CriarRede.
+    ficticios = (tipo == "Alimentador") & (profundidade > 3)
+    nome[ficticios] = nome[ficticios].str.removeprefix("DJ_").str.removesuffix("_FICT")
+
+    return pd.DataFrame({
+        "linha": rhc.index,
+        "profundidade": profundidade.astype(np.int64),
+        "tipo": tipo,
+        "nome": nome.to_numpy(),
+        "valor": valor.to_numpy(),
+        "sigla_simo": np.where(validas, sigla, None),
+        "codigo": np.where(validas, codigo.fillna(-1).astype(np.int64), -1),
+        "pai": rhc["PAI"].to_numpy(dtype=np.int64),
+    })
+
+
+def _faixa(codigos: pd.Series) -> pd.Series:
+    """
+    Tipo de cada código pela faixa numérica (tipo_por_codigo), ou None se o código estiver fora das faixas.
+    """
+    def tipo(codigo):
+        try:
+            return tipo_por_codigo(int(codigo))
+        except ValueError:
+            return None
+
+    unicos = pd.Series(codigos.unique())
+    return codigos.map(dict(zip(unicos, unicos.map(tipo))))
+
+
+def verificar_base(rhc: pd.DataFrame = None, rdc: pd.DataFrame = None, ocorrencias: pd.DataFrame = None,
+                   rede=None) -> dict:
+    """
+    Cruza RHC, RDC e 1025 e retorna um relatório (dicionário serializável em JSON) com:
+    chaves do RHC ausentes do RDC (tipo estimado pela faixa e 0 UCs), chaves do RDC fora do RHC, chaves repetidas,
+    tipos conflitantes ou divergentes da faixa do código, códigos fora das faixas sem tipo no RDC (ValueError nos
+    estudos), linhas inválidas do RHC, ocorrencias do 1025 de equipamentos fora do RHC, e chaves com mais UCs que a
+    chave a montante. Com a rede criada (árvore de CriarRede ou RedeCompacta), também os alimentadores cujo DIC na
+    rede difere do DIC atribuído ao alimentador pelo 1025 no cubo de confiabilidade (conferir_rede).
+    Por padrão as tabelas são lidas de base/, para refletir a última importação.
+    """
+    cubo_da_base = ocorrencias is None
+    rhc = _ler("RHC") if rhc is None else rhc
+    rdc = _ler("RDC") if rdc is None else rdc
+    ocorrencias = _ler("OCORRENCIAS") if ocorrencias is None else ocorrencias
+
+    nos = nos_rhc(rhc)
+    chaves = nos[nos["tipo"] == "Chave"]
+    invalidas = nos[nos["tipo"] == "Inválida"]
+    nomes_rhc = pd.Index(chaves["nome"].unique())
+    repetidas_rhc = chaves.loc[chaves["nome"].duplicated(), "nome"].unique()
+
+    # RDC: uma chave só tem tipo quando aparece uma única vez (Chave.tipo usa .item()).
+    rdc_chaves = rdc["Chave"].astype(str)
+    contagem_rdc = rdc_chaves.value_counts()
+    nomes_rdc = pd.Index(contagem_rdc.index)
+    repetidas_rdc = contagem_rdc[contagem_rdc > 1]
+    grupos_tipo = rdc.groupby(rdc_chaves)["Tipo"]
+    distintos = grupos_tipo.nunique()
+    repetidas = rdc_chaves.isin(distintos.index[distintos > 1])
+    conflitantes = rdc[repetidas].groupby(rdc_chaves[repetidas])["Tipo"].unique()
+    ucs = rdc.groupby(rdc_chaves)["Consumidores a jusante"].sum()
+
+    fora_rdc = nomes_rhc.difference(nomes_rdc)
+    fora_rhc = nomes_rdc.difference(nomes_rhc)
+
+    # Tipos: chaves sem tipo único no RDC usam a faixa do código; fora das faixas, tipo_por_codigo levanta ValueError.
+    unicas = chaves.drop_duplicates("nome").set_index("nome")
+    faixa = _faixa(unicas["codigo"])
+    sem_tipo_rdc = ~unicas.index.isin(contagem_rdc[contagem_rdc == 1].index)
+    fora_da_faixa = unicas.index[sem_tipo_rdc & faixa.isna().to_numpy()]
+    tipo_unico = grupos_tipo.first()
+    tipo_unico = tipo_unico[contagem_rdc.reindex(tipo_unico.index) == 1]
+    comparaveis = faixa.isin(["FU", "CD", "RA"]) & faixa.index.isin(tipo_unico.index)
+    divergentes = pd.DataFrame({
+        "chave": faixa.index[comparaveis],
+        "tipo_rdc": tipo_unico.reindex(faixa.index[comparaveis]).to_numpy(),
+        "tipo_faixa": faixa[comparaveis].to_numpy(),
+    })
+    divergentes = divergentes[divergentes["tipo_rdc"] != divergentes["tipo_faixa"]]
+
+    # UCs: chave com mais consumidores a jusante que a chave imediatamente a montante.
+    pais = chaves[chaves["pai"] >= 0]
+    pais = pais[nos["tipo"].to_numpy()[pais["pai"].to_numpy()] == "Chave"]
+    filho_pai = pd.DataFrame({
+        "chave": pais["nome"].to_numpy(),
+        "montante": nos["nome"].to_numpy()[pais["pai"].to_numpy()],
+    })
+    filho_pai["ucs"] = filho_pai["chave"].map(ucs).fillna(0).astype(np.int64)
+    filho_pai["ucs_montante"] = filho_pai["montante"].map(ucs).fillna(0).astype(np.int64)
+    ucs_inconsistentes = filho_pai[filho_pai["ucs"] > filho_pai["ucs_montante"]].drop_duplicates()
+
+    # 1025: chave SIGLA_CODIGO de cada ocorrencia.
+    siglas = {codigo: sigla for sigla, codigo in CODIGO_POR_SIMO.items()}
+    sigla_ocorrencia = ocorrencias["REGIONAL"].map(siglas)
+    regional_desconhecida = sigla_ocorrencia.isna()
+    nome_ocorrencia = sigla_ocorrencia + "_" + ocorrencias["EQPTO.RESPONSAVEL"].astype(str)
+    orfas = ~regional_desconhecida & ~nome_ocorrencia.isin(nomes_rhc)
+    chaves_orfas = ocorrencias[orfas].groupby(nome_ocorrencia[orfas])["DIC"].agg(["size", "sum"])
+    chaves_orfas = chaves_orfas.sort_values("sum", ascending=False)
+
+    if rede is not None:
+        ses = _ler("CODIGOS_SE")
+        cubo = Cubo(
+            carregar_cubo(ocorrencias) if cubo_da_base else construir_cubo(ocorrencias),
+            dict(zip(ses["CÓD._SE"], ses["SIGLA_SE"])),
+        )
+        dic_cubo = conferir_rede(cubo, rede)
+        dic_cubo = dic_cubo[dic_cubo["Diferença [h * ucs]"].abs() > TOLERANCIA_DIC]
+
+    relatorio = {
+        "resumo": {
+            "nos_rhc": int(len(nos)),
+            "chaves_rhc": int(len(nomes_rhc)),
+            "chaves_rdc": int(len(nomes_rdc)),
+            "ocorrencias": int(len(ocorrencias)),
+            "linhas_rhc_invalidas": int(len(invalidas)),
+            "chaves_repetidas_rhc": int(len(repetidas_rhc)),
+            "chaves_repetidas_rdc": int(len(repetidas_rdc)),
+            "chaves_rhc_fora_rdc": int(len(fora_rdc)),
+            "chaves_rdc_fora_rhc": int(len(fora_rhc)),
+            "tipos_conflitantes_rdc": int(len(conflitantes)),
+            "tipos_divergentes_faixa": int(len(divergentes)),
+            "codigos_fora_da_faixa": int(len(fora_da_faixa)),
+            "ucs_maior_que_montante": int(len(ucs_inconsistentes)),
+            "ocorrencias_fora_rhc": int(orfas.sum()),
+            "dic_ocorrencias_fora_rhc": float(ocorrencias.loc[orfas, "DIC"].sum()),
+            "ocorrencias_regional_desconhecida": int(regional_desconhecida.sum()),
+        },
+        "linhas_rhc_invalidas": [
+            {"linha": int(linha), "valor": valor} for linha, valor in zip(invalidas["linha"], invalidas["valor"])
+        ],
+        "chaves_repetidas_rhc": list(repetidas_rhc),
+        "chaves_repetidas_rdc": {chave: int(vezes) for chave, vezes in repetidas_rdc.items()},
+        "chaves_rhc_fora_rdc": list(fora_rdc),
+        "chaves_rdc_fora_rhc": list(fora_rhc),
+        "tipos_conflitantes_rdc": {chave: [str(tipo) for tipo in tipos] for chave, tipos in conflitantes.items()},
+        "tipos_divergentes_faixa": divergentes.to_dict(orient="records"),
+        "codigos_fora_da_faixa": list(fora_da_faixa),
+        "ucs_maior_que_montante": ucs_inconsistentes.to_dict(orient="records"),
+        "ocorrencias_fora_rhc": [
+            {"chave": chave, "ocorrencias": int(quantidade), "dic": float(dic)}
+            for chave, quantidade, dic in zip(chaves_orfas.index, chaves_orfas["size"], chaves_orfas["sum"])
+        ],
+        "referencias_ambiguas": {
+            tabela: {valor: list(chaves) for valor, chaves in valores.items()}
+            for tabela, valores in ambiguidades().items()
+        },
+    }
+    if rede is not None:
+        relatorio["resumo"]["alimentadores_dic_divergente_cubo"] = int(len(dic_cubo))
+        relatorio["resumo"]["diferenca_dic_rede_cubo"] = float(dic_cubo["Diferença [h * ucs]"].abs().sum())
+        relatorio["alimentadores_dic_divergente_cubo"] = dic_cubo.to_dict(orient="records")
+    return relatorio
+
+
+def salvar_relatorio(relatorio: dict, caminho: str = "Consistência da base.json"):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=1, default=str)
+
+
+def imprimir_resumo(relatorio: dict):
+    """
+    Imprime a quantidade de problemas encontrados em cada verificação.
+    """
+    print("Consistência da base (RHC x RDC x 1025):")
+    for nome, quantidade in relatorio["resumo"].items():
+        quantidade = f"{quantidade:.1f}" if isinstance(quantidade, float) else quantidade
+        print(f"  {nome.replace('_', ' '):<40}{quantidade:>14}")
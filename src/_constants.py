@@ -310,3 +310,15 @@ REGIONAIS = {
         18: "Chapecó",
     },
 }
+
+# Grupos de causas do relatório 1025 (códigos da tabela CAUSAS), usados nos filtros de causas dos estudos.
+GRUPOS_CAUSAS = {
+    "PROGRAMADAS": (1, 3, 4, 5, 6, 7, 8, 85, 96, 97, 99),
+    "VEGETACAO": (29, 62, 80),
+    "CLIMA": (70, 83, 87, 94),
+    "ANIMAIS": (72,),
+    "TERCEIROS": (53, 61, 73, 95, 98),
+    "RAMAL DE LIGACAO": (21, 22, 23, 24, 26, 27, 28, 30, 31, 32),
+    "MEDICAO": (33, 34, 35, 36, 38),
+    "NAO IDENTIFICADA": (79,),
+}
@@ -0,0 +1,166 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Cubo de confiabilidade: agregados do relatório 1025 por regional x SE x alimentador x causa x mês.
+# Construído uma única vez na importação do 1025 e salvo em base/CUBO, as consultas apenas filtram e somam o cubo.
+DIMENSOES = ["REGIONAL", "SUBESTACAO", "ALIMENTADOR", "CAUSA", "MES"]
+MEDIDAS = ["DIC", "FIC", "OCORRENCIAS", "DURACAO"]
+SEM_CODIGO = -1  # SE ou alimentador não informado no 1025
+
+COMPRESSAO = {'method': "gzip", 'compresslevel': 1, 'mtime': 1}
+
+
+def construir_cubo(ocorrencias: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega as ocorrencias do 1025 nas dimensões do cubo. MES é um inteiro AAAAMM da data de início.
+    """
+    datas = ocorrencias["DATA INICIO"].astype(str)
+    dimensoes = pd.DataFrame({
+        "REGIONAL": ocorrencias["REGIONAL"].astype(np.int32),
+        "SUBESTACAO": ocorrencias["SUBESTACAO"].fillna(SEM_CODIGO).astype(np.int32),
+        "ALIMENTADOR": ocorrencias["ALIMENTADOR"].fillna(SEM_CODIGO).astype(np.int32),
+        "CAUSA": ocorrencias["CAUSA"].astype(np.int32),
+        "MES": (datas.str[6:10] + datas.str[3:5]).astype(np.int32),
+    })
+    medidas = pd.DataFrame({
+        "DIC": ocorrencias["DIC"].to_numpy(dtype=float),
+        "FIC": ocorrencias["QTDE UC EQPTO INTERROMPIDA"].to_numpy(dtype=np.int64),
+        "OCORRENCIAS": np.ones(len(ocorrencias), dtype=np.int64),
+        "DURACAO": ocorrencias["DURACAO"].to_numpy(dtype=float),
+    })
+    cubo = pd.concat([dimensoes, medidas], axis=1).groupby(DIMENSOES, as_index=False, sort=True).sum()
+    return cubo.reset_index(drop=True)
+
+
+def carregar_cubo(ocorrencias: pd.DataFrame, caminho: str = "base/CUBO", origem: str = "base/OCORRENCIAS") -> pd.DataFrame:
+    """
+    Lê o cubo salvo, ou o reconstrói (e tenta salvar) se ele não existir ou for mais antigo que o 1025.
+    """
+    if os.path.exists(caminho) and (
+        not os.path.exists(origem) or os.path.getmtime(caminho) >= os.path.getmtime(origem)
+    ):
+        return pd.read_pickle(caminho, compression=COMPRESSAO)
+    cubo = construir_cubo(ocorrencias)
+    try:
+        cubo.to_pickle(caminho, compression=COMPRESSAO)
+    except OSError:
+        pass
+    return cubo
+
+
+class Cubo:
+    """
+    Consultas sobre o cubo de confiabilidade. As colunas ficam em arrays numpy e cada consulta filtra por máscara
+    e soma as medidas agrupadas pelas dimensões pedidas.
+    SEs podem ser informadas pela sigla e alimentadores pelo nome (ex.: "CQS03").
+    """
+
+    def __init__(self, cubo: pd.DataFrame, siglas_se: dict):
+        self.colunas = {coluna: cubo[coluna].to_numpy() for coluna in DIMENSOES + MEDIDAS}
+        self.siglas_se = dict(siglas_se)
+        self.codigos_se = {sigla: codigo for codigo, sigla in self.siglas_se.items()}
+
+    def __len__(self) -> int:
+        return len(self.colunas["DIC"])
+
+    def _codigo_se(self, se) -> int:
+        if isinstance(se, str):
+            if se not in self.codigos_se:
+                raise ValueError(f'SE "{se}" não encontrada em CODIGOS_SE.')
+            return self.codigos_se[se]
+        return int(se)
+
+    def _codigo_alimentador(self, alimentador: str) -> tuple:
+        """
+        (código da SE, número do alimentador) a partir do nome do alimentador, ex.: "CQS03" -> (101, 3).
+        """
+        sigla, numero = alimentador[:-2], alimentador[-2:]
+        if not numero.isdigit():
+            raise ValueError(f'Alimentador "{alimentador}" fora do padrão SIGLA + número.')
+        return self._codigo_se(sigla), int(numero)
+
+    def mascara(self, **filtros) -> np.ndarray:
+        """
+        Máscara das linhas do cubo que atendem aos filtros. Cada filtro é uma dimensão com um valor ou uma lista de
+        valores. MES aceita também um intervalo (inicio, fim) inclusivo em AAAAMM.
+        """
+        mascara = np.ones(len(self), dtype=bool)
+        if isinstance(filtros.get("ALIMENTADOR"), str):
+            filtros["alimentador"] = filtros.pop("ALIMENTADOR")
+        if "alimentador" in filtros:
+            se, numero = self._codigo_alimentador(filtros.pop("alimentador"))
+            filtros.setdefault("SUBESTACAO", se)
+            filtros["ALIMENTADOR"] = numero
+        for dimensao, valor in filtros.items():
+            dimensao = dimensao.upper()
+            if dimensao not in DIMENSOES:
+                raise ValueError(f"Dimensão {dimensao} inexistente no cubo. Dimensões: {', '.join(DIMENSOES)}.")
+            coluna = self.colunas[dimensao]
+            if dimensao == "MES" and isinstance(valor, tuple):
+                mascara &= (coluna >= valor[0]) & (coluna <= valor[1])
+                continue
+            valores = valor if isinstance(valor, (list, set, np.ndarray)) else [valor]
+            if dimensao == "SUBESTACAO":
+                valores = [self._codigo_se(se) for se in valores]
+            mascara &= np.isin(coluna, list(valores))
+        return mascara
+
+    def consultar(self, por=(), **filtros) -> pd.DataFrame:
+        """
+        Soma as medidas das linhas filtradas, agrupadas pelas dimensões em "por".
+        Ex.: cubo.consultar(por=["CAUSA"], SUBESTACAO="CQS") ou cubo.consultar(por=["MES"], alimentador="CQS03").
+        """
+        por = [dimensao.upper() for dimensao in ([por] if isinstance(por, str) else por)]
+        mascara = self.mascara(**filtros)
+        df = pd.DataFrame({coluna: valores[mascara] for coluna, valores in self.colunas.items()
+                           if coluna in por or coluna in MEDIDAS})
+        if not por:
+            return df[MEDIDAS].sum().to_frame().transpose()
+        resultado = df.groupby(por, as_index=False, sort=True)[MEDIDAS].sum()
+        if "SUBESTACAO" in por:
+            resultado.insert(por.index("SUBESTACAO") + 1, "SIGLA_SE", resultado["SUBESTACAO"].map(self.siglas_se))
+        return resultado
+
+    def dic(self, **filtros) -> float:
+        """
+        DIC total [h * ucs] das ocorrencias que atendem aos filtros.
+        """
+        return float(self.colunas["DIC"][self.mascara(**filtros)].sum())
+
+    def dic_alimentador(self, alimentador: str) -> float:
+        return self.dic(alimentador=alimentador)
+
+    def dic_subestacao(self, se) -> float:
+        return self.dic(SUBESTACAO=se)
+
+    def dic_por_alimentador(self) -> pd.Series:
+        """
+        DIC total de cada alimentador, indexado pelo nome do alimentador (SIGLA + número com dois dígitos).
+        """
+        df = self.consultar(por=["SUBESTACAO", "ALIMENTADOR"])
+        df = df[(df["ALIMENTADOR"] != SEM_CODIGO) & df["SIGLA_SE"].notna()]
+        nomes = df["SIGLA_SE"] + df["ALIMENTADOR"].map("{:02d}".format)
+        return pd.Series(df["DIC"].to_numpy(), index=nomes.to_numpy(), name="DIC")
+
+
+def conferir_rede(cubo: Cubo, rede) -> pd.DataFrame:
+    """
+    Compara o DIC de cada alimentador da rede (Alimentador.dic, a soma do DIC das chaves do alimentador na árvore)
+    com o DIC do cubo, atribuído pelas colunas SUBESTACAO e ALIMENTADOR do 1025.
+    rede é uma RedeCompacta ou a árvore de CriarRede, convertida por RedeCompacta.de_arvore. Retorna as diferenças
+    ordenadas pela diferença absoluta.
+    """
+    from src._rede_compacta import RedeCompacta, ALIMENTADOR
+
+    if not isinstance(rede, RedeCompacta):
+        rede = RedeCompacta.de_arvore(rede)
+
+    alimentadores = np.flatnonzero(rede.tipo_no == ALIMENTADOR)
+    df = pd.DataFrame({
+        "Alimentador": rede.nome[alimentadores],
+        "DIC rede [h * ucs]": rede.dic_total[alimentadores],
+    }).groupby("Alimentador", as_index=False).sum()
+    df["DIC cubo [h * ucs]"] = df["Alimentador"].map(cubo.dic_por_alimentador()).fillna(0.0)
+    df["Diferença [h * ucs]"] = df["DIC rede [h * ucs]"] - df["DIC cubo [h * ucs]"]
+    return df.sort_values("Diferença [h * ucs]", key=np.abs, ascending=False, ignore_index=True)
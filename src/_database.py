@@ -1,39 +1,117 @@
+import os
 from typing import Literal
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 import tkinter as tk
 from tkinter.filedialog import askopenfilenames
-from src._constants import SUBESTACOES, REGIONAIS
+from src._referencias import SUBESTACOES, REGIONAIS, NUCLEO_POR_SE, CODIGO_POR_SIMO, indexar_tabela
+from src._rhc import normalizar_rhc, compacto
+from src._causas import permitidas
+from src._rdc import historico_vazio, registrar_versao
+from src._cubo import Cubo, construir_cubo, carregar_cubo, COMPRESSAO as COMPRESSAO_CUBO
+from src._cache import versao_arquivos, ARQUIVOS_DADOS
+from src import _particoes as particoes
+from src._perfil import etapa, cronometrado
 
 pd.options.mode.chained_assignment = None
 
+ARQUIVO_HISTORICO_RDC = "base/RDC_HISTORICO"
+
 
 DF_SUBESTACOES = pd.DataFrame(SUBESTACOES)
 
 DF_REGIONAIS = pd.DataFrame(REGIONAIS)
 
-CAUSAS = pd.read_pickle(
-    "base/CAUSAS", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+with etapa("carregar base/CAUSAS"):
+    CAUSAS = pd.read_pickle(
+        "base/CAUSAS", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+
+# Com a base particionada por núcleo (DEC_PARTICOES=1, src._particoes), RHC, RDC e 1025 começam vazios e recebem
+# as linhas de cada núcleo carregado na rede (src._dataclasses.carregar_nucleos).
+if particoes.ATIVO:
+    with etapa("preparar base/NUCLEOS"):
+        PARTICOES = particoes.preparar()
+    RHC, RDC, OCORRENCIAS = (PARTICOES["vazias"][tabela] for tabela in ("RHC", "RDC", "OCORRENCIAS"))
+else:
+    PARTICOES = None
+    with etapa("carregar base/RHC"):
+        # Bases importadas antes da tabela compacta (src._rhc) têm o RHC largo do csv: a importação só o normaliza
+        # em memória, e o arquivo é convertido em "Atualizar Rede" (converter_rhc).
+        RHC = normalizar_rhc(pd.read_pickle(
+            "base/RHC", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1}))
+
+    with etapa("carregar base/RDC"):
+        RDC = pd.read_pickle(
+            "base/RDC", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+
+    with etapa("carregar base/OCORRENCIAS"):
+        OCORRENCIAS = pd.read_pickle(
+            "base/OCORRENCIAS", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+
+with etapa("carregar base/CODIGOS_SE"):
+    SES = pd.read_pickle(
+        "base/CODIGOS_SE", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+    INDICE_SES = indexar_tabela(SES)
+
+with etapa("versão da base"):
+    VERSAO_BASE = versao_arquivos(ARQUIVOS_DADOS)
+
+
+def versao_base() -> str:
+    """
+    Hash do conteúdo dos dados carregados (RDC, 1025, causas e códigos das SEs), usado nas chaves do cache de estudos.
+    """
+    return VERSAO_BASE
 
-RHC = pd.read_pickle(
-    "base/RHC", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
 
-RDC = pd.read_pickle(
-    "base/RDC", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+def anexar_base(rdc: pd.DataFrame, ocorrencias: pd.DataFrame) -> tuple:
+    """
+    Acrescenta ao RDC e ao 1025 carregados as linhas de núcleos da base particionada (src._particoes) e descarta os
+    agregados calculados sobre as linhas anteriores. Retorna (RDC, OCORRENCIAS).
+    """
+    global RDC, OCORRENCIAS
+    RDC = particoes.juntar_base(RDC, rdc)
+    OCORRENCIAS = particoes.juntar_base(OCORRENCIAS, ocorrencias)
+    for funcao in (
+        indice_ocorrencias, fator_mitigacao_ocorrencias, agregados_por_causa, agregados_por_mes, mascara_ocorrencias,
+    ):
+        funcao.cache_clear()
+    return RDC, OCORRENCIAS
 
-OCORRENCIAS = pd.read_pickle(
-    "base/OCORRENCIAS", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
 
-SES = pd.read_pickle(
-    "base/CODIGOS_SE", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+def reparticionar() -> tuple:
+    """
+    Base particionada: divide de novo a base importada (ex.: após "Atualizar Rede") e volta ao RDC e 1025 vazios,
+    que recebem os núcleos da rede recriada por CriarRede. Retorna (RDC, OCORRENCIAS).
+    """
+    global PARTICOES, RDC, OCORRENCIAS
+    PARTICOES = particoes.preparar()
+    RDC, OCORRENCIAS = PARTICOES["vazias"]["RDC"], PARTICOES["vazias"]["OCORRENCIAS"]
+    for funcao in (
+        cubo, indice_ocorrencias, fator_mitigacao_ocorrencias, agregados_por_causa, agregados_por_mes, mascara_ocorrencias,
+    ):
+        funcao.cache_clear()
+    return RDC, OCORRENCIAS
 
 
-def encontrar_se(entry: str | int, onde="SIGLA_SE"):
+def periodo_ocorrencias() -> str:
     """
-    Função que identifica a subestacao baseada no codigo da mesma.
+    Datas da primeira e da última ocorrência do relatório 1025 da base (inteira, mesmo com a base particionada).
+    """
+    if PARTICOES is not None:
+        return PARTICOES["periodo"]
+    return OCORRENCIAS["DATA INICIO"].min() + " - " + OCORRENCIAS["DATA FIM"].max()
+
+
+def definir_rdc(rdc: pd.DataFrame):
+    """
+    Substitui o Relatório de Chaves carregado, ex.: após importar um novo RDC (ver _dataclasses.atualizar_rdc),
+    e recalcula a versão da base usada pelo cache de estudos.
     """
-    local = get_row(SES, entry), onde
-    return SES.at[(local)]
+    global RDC, VERSAO_BASE
+    RDC = rdc
+    VERSAO_BASE = versao_arquivos(ARQUIVOS_DADOS)
 
 
 def selecionar_arquivos(mensagem):
@@ -72,23 +150,124 @@ def simo_to_code(entry: str | int):
     Função que identifica o tipo de entrada da região e traduz para o valor simo correspondente.
 
     """
-    for key, value in REGIONAIS["Siglas SIMO"].items():
-        if value == entry:
-            return key
-    return None
+    return CODIGO_POR_SIMO.get(entry)
+
+
+def ler_base(nome: str) -> pd.DataFrame:
+    """
+    Lê um arquivo da pasta base/.
+    """
+    return pd.read_pickle(f"base/{nome}", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
 
 
 def encontrar_se(entry: str | int, onde="SIGLA_SE"):
     """
     Função que identifica a subestacao baseada no codigo da mesma.
     """
-    local = get_row(SES, entry), onde
-    return SES.at[(local)]
+    return SES.at[INDICE_SES.get(entry, 0), onde]
+
+@lru_cache(maxsize=None)
+@cronometrado("carregar base/CUBO")
+def cubo() -> Cubo:
+    """
+    Cubo de confiabilidade do 1025 (src._cubo), lido de base/CUBO (ou reconstruído, se desatualizado) no primeiro uso.
+    """
+    return Cubo(carregar_cubo(OCORRENCIAS), dict(zip(SES["CÓD._SE"], SES["SIGLA_SE"])))
+
+
+@lru_cache(maxsize=None)
+@cronometrado("indice_ocorrencias")
+def indice_ocorrencias() -> dict:
+    """
+    Indexa as ocorrencias do relatório 1025 por chave.
+    Retorna um dicionário {"SIGLA_CODIGO": posições das ocorrencias em OCORRENCIAS}.
+    """
+    siglas = REGIONAIS["Siglas SIMO"]
+    indice = {}
+    for (regional, codigo), posicoes in OCORRENCIAS.groupby(["REGIONAL", "EQPTO.RESPONSAVEL"]).indices.items():
+        if regional in siglas:
+            indice[f"{siglas[regional]}_{codigo}"] = posicoes
+    return indice
+
+
+@lru_cache(maxsize=None)
+def fatores_mitigacao(
+    tipo: Literal[
+        "MITIGACAO POR RA",
+        "MITIGACAO TA MESMA SE",
+        "MITIGACAO TA SE DIFERENTE",
+    ] = "MITIGACAO POR RA",
+) -> dict:
+    """
+    Fator de mitigação de cada código de causa de CAUSAS. Causas fora da tabela de causas, ou sem fator, não são
+    mitigadas (fator 0): a mesma regra vale para a estimativa de Chave.indicadores_pos_rl e para os intervalos de
+    confiança (fator_mitigacao_ocorrencias).
+    """
+    return dict(zip(CAUSAS["CODIGO"], CAUSAS[tipo].fillna(0.0)))
+
+
+@lru_cache(maxsize=None)
+def fator_mitigacao_ocorrencias(
+    tipo: Literal[
+        "MITIGACAO POR RA",
+        "MITIGACAO TA MESMA SE",
+        "MITIGACAO TA SE DIFERENTE",
+    ] = "MITIGACAO POR RA",
+) -> np.ndarray:
+    """
+    Fator de mitigação de cada ocorrencia de OCORRENCIAS, conforme a causa da mesma (ver fatores_mitigacao).
+    """
+    fatores = OCORRENCIAS["CAUSA"].map(fatores_mitigacao(tipo))
+    return fatores.fillna(0.0).to_numpy(dtype=float)
+
+
+def agregar_ocorrencias(ocorrencias: pd.DataFrame, por: list = ()) -> tuple:
+    """
+    DIC e FIC das ocorrencias somados por equipamento responsável e causa, e pelas chaves de agrupamento em por
+    (colunas ou Series nomeadas alinhadas com as ocorrencias, ex.: o mês em agregados_por_mes).
+    Retorna (agregados, equipamentos): agregados tem as colunas REGIONAL, EQPTO.RESPONSAVEL, CAUSA, as de por, DIC,
+    QTDE UC EQPTO INTERROMPIDA e GRUPO, a posição do equipamento em equipamentos (MultiIndex (REGIONAL, EQPTO.RESPONSAVEL)).
+    """
+    agregados = ocorrencias.groupby(["REGIONAL", "EQPTO.RESPONSAVEL", "CAUSA", *por])[
+        ["DIC", "QTDE UC EQPTO INTERROMPIDA"]
+    ].sum().reset_index()
+    chaves = agregados[["REGIONAL", "EQPTO.RESPONSAVEL"]]
+    agregados["GRUPO"] = chaves.groupby(["REGIONAL", "EQPTO.RESPONSAVEL"], sort=True).ngroup().to_numpy()
+    return agregados, pd.MultiIndex.from_frame(chaves.drop_duplicates())
+
+
+@lru_cache(maxsize=None)
+@cronometrado("agregados_por_causa")
+def agregados_por_causa() -> tuple:
+    """
+    Agregados por equipamento responsável e causa (agregar_ocorrencias) das ocorrencias da base, calculados uma única vez.
+    Com um filtro de causas, a soma por equipamento é uma soma mascarada por GRUPO (np.bincount), sem reler o 1025.
+    """
+    return agregar_ocorrencias(OCORRENCIAS)
+
+
+@lru_cache(maxsize=None)
+@cronometrado("agregados_por_mes")
+def agregados_por_mes() -> tuple:
+    """
+    DIC e FIC das ocorrencias somados por equipamento responsável, causa e mês (MES, inteiro AAAAMM da data de início,
+    como no cubo), para comparar janelas de datas por chave. Retorna (agregados, equipamentos) como agregados_por_causa.
+    """
+    datas = OCORRENCIAS["DATA INICIO"].astype(str)
+    meses = (datas.str[6:10] + datas.str[3:5]).astype(np.int32).rename("MES")
+    return agregar_ocorrencias(OCORRENCIAS, [meses])
+
+
+@lru_cache(maxsize=32)
+def mascara_ocorrencias(filtro: tuple | None) -> np.ndarray:
+    """
+    Máscara das ocorrencias de OCORRENCIAS com causa permitida pelo filtro (src._causas).
+    """
+    return permitidas(OCORRENCIAS["CAUSA"].to_numpy(), filtro)
+
 
 def encontrar_nucleo(entry: str):
-    for key, _ in SUBESTACOES.items():
-        if entry in SUBESTACOES[key].values():
-            return key
+    return NUCLEO_POR_SE.get(entry)
 
 
 def multiplicador_mitigacao(
@@ -101,21 +280,33 @@ def multiplicador_mitigacao(
 ) -> float:
     return CAUSAS.loc[CAUSAS["CODIGO"] == getattr(Codigo, "CAUSA")][tipo].item()
 
-def atualiazar_ocorrencias():
-    arquivos = selecionar_arquivos("1025")
-    if not arquivos:
-        return
-    OCORRENCIAS = pd.DataFrame()
+def ler_ocorrencias(arquivos) -> pd.DataFrame:
+    """
+    Lê e trata os csvs do relatório 1025, no formato de base/OCORRENCIAS.
+    """
+    ocorrencias = pd.DataFrame()
     for arquivo in arquivos:
         temp = pd.read_csv(arquivo, sep=";", usecols=["REGIONAL", "SUBESTACAO", "ALIMENTADOR", "EQPTO.RESPONSAVEL", "DATA INICIO", "DATA FIM", "CAUSA", "DURACAO", "QTDE UC EQPTO INTERROMPIDA"])
         temp["DURACAO"] = temp["DURACAO"]/60
         temp["DIC"] = temp["QTDE UC EQPTO INTERROMPIDA"] * temp["DURACAO"]
         temp["DATA INICIO"] = temp["DATA INICIO"].apply(lambda x: x.split()[0])
         temp["DATA FIM"] = temp["DATA FIM"].apply(lambda x: x.split()[0])
-        OCORRENCIAS = concatenar_df(OCORRENCIAS, temp)
+        ocorrencias = concatenar_df(ocorrencias, temp)
+    return ocorrencias
+
+
+@cronometrado()
+def atualiazar_ocorrencias():
+    arquivos = selecionar_arquivos("1025")
+    if not arquivos:
+        return
+    OCORRENCIAS = ler_ocorrencias(arquivos)
     OCORRENCIAS.to_pickle('base/OCORRENCIAS', compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+    construir_cubo(OCORRENCIAS).to_pickle('base/CUBO', compression=COMPRESSAO_CUBO)
+    return True
 
 
+@cronometrado()
 def atualizar_relatorio_hierarquico_chaves():
     data_files = selecionar_arquivos("Relatório Hierarquico de Chaves")
     if not data_files:
@@ -140,13 +331,19 @@ def atualizar_relatorio_hierarquico_chaves():
     RHC.drop(columns= 2, inplace = True)
     RHC.dropna(axis=0, how="all", inplace=True)
     # Limpa os disjuntores ficticios do RHC da segunda coluna do arquivo csv (importante para evitar bugs)
+    # Salva apenas a tabela compacta: profundidade, rótulo e pai de cada nó.
+    RHC = normalizar_rhc(RHC)
+    # Mantém o RHC anterior para comparar as topologias (src._topologia).
+    if os.path.exists("base/RHC"):
+        os.replace("base/RHC", "base/RHC_ANTERIOR")
     RHC.to_pickle("base/RHC", compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+    return True
 
 
-def atualizar_relatorio_de_chaves():
-    arquivos = selecionar_arquivos("Relatório de Chaves")
-    if not arquivos:
-        return
+def ler_relatorio_de_chaves(arquivos) -> pd.DataFrame:
+    """
+    Lê os csvs do Relatório de Chaves (RDC) e os concatena.
+    """
     RDC = pd.DataFrame()
     for arquivo in arquivos:
         temp = pd.read_csv(
@@ -160,10 +357,75 @@ def atualizar_relatorio_de_chaves():
             temp["Consumidores a jusante"], errors="coerce", downcast="integer"
         )
         RDC = concatenar_df(RDC, temp)
+    return RDC
+
+
+def ler_historico_rdc() -> dict:
+    """
+    Histórico dos tipos das chaves entre as versões do RDC importadas (ver src._rdc.registrar_versao).
+    """
+    if not os.path.exists(ARQUIVO_HISTORICO_RDC):
+        return historico_vazio()
+    return pd.read_pickle(ARQUIVO_HISTORICO_RDC, compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+
+
+def registrar_relatorio_de_chaves(rdc: pd.DataFrame, data) -> dict:
+    """
+    Registra a versão do RDC com a data de extração no histórico. Bases sem histórico registram antes o RDC
+    atual, datado pela última modificação de base/RDC.
+    """
+    historico = ler_historico_rdc()
+    if not historico["versoes"] and os.path.exists("base/RDC"):
+        historico = registrar_versao(historico, ler_base("RDC"), data_modificacao(["base/RDC"]))
+    historico = registrar_versao(historico, rdc, data)
+    pd.to_pickle(historico, ARQUIVO_HISTORICO_RDC, compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+    return historico
+
+
+def data_modificacao(arquivos) -> pd.Timestamp:
+    """
+    Data (sem hora) da modificação mais recente dos arquivos.
+    """
+    return pd.Timestamp(max(os.path.getmtime(arquivo) for arquivo in arquivos), unit="s").normalize()
+
+
+@cronometrado()
+def atualizar_relatorio_de_chaves():
+    arquivos = selecionar_arquivos("Relatório de Chaves")
+    if not arquivos:
+        return
+    RDC = ler_relatorio_de_chaves(arquivos)
+    # A data da versão é a dos csvs exportados; RDCs antigos podem ser registrados com a data certa (main.py --registrar-rdc).
+    registrar_relatorio_de_chaves(RDC, data_modificacao(arquivos))
     RDC.to_pickle("base/RDC",compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+    return True
 
 
-def importar_arquivos():
-    atualiazar_ocorrencias()
-    atualizar_relatorio_de_chaves()
-    atualizar_relatorio_hierarquico_chaves()
+def converter_rhc(caminho: str = "base/RHC") -> bool:
+    """
+    Regrava no formato compacto (src._rhc) o RHC largo de bases importadas antes da tabela compacta. A topologia não
+    muda. Retorna True se o arquivo foi convertido.
+    """
+    rhc = pd.read_pickle(caminho, compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+    if compacto(rhc):
+        return False
+    normalizar_rhc(rhc).to_pickle(caminho, compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+    return True
+
+
+def importar_arquivos() -> list:
+    """
+    Importa os relatórios selecionados pelo usuário. Retorna os nomes dos arquivos da base atualizados.
+    Um RHC largo, de bases anteriores à tabela compacta, é convertido mesmo sem novo RHC (converter_rhc).
+    """
+    atualizados = []
+    if os.path.exists("base/RHC") and converter_rhc():
+        print("RHC da base convertido para a tabela compacta.")
+    if atualiazar_ocorrencias():
+        atualizados.append("OCORRENCIAS")
+        cubo.cache_clear()
+    if atualizar_relatorio_de_chaves():
+        atualizados.append("RDC")
+    if atualizar_relatorio_hierarquico_chaves():
+        atualizados.append("RHC")
+    return atualizados
@@ -4,18 +4,36 @@
 # Data:     30/03/2023
 #---------------------------------------
 
+import hashlib
+import numpy as np
 from typing import Literal
+import src._database as database
 from src._database import (
     pd,
     simo_to_code,
     encontrar_nucleo,
     multiplicador_mitigacao,
+    fatores_mitigacao,
+    agregados_por_causa,
     RHC,
     RDC,
-    CAUSAS,
     OCORRENCIAS,
     SUBESTACOES,
 )
+from src._referencias import tipo_por_codigo
+from src._rhc import normalizar_rhc, tipos_no
+from src._particoes import ler_particoes, particoes_de
+from src._rdc import agregar_rdc, mesmo_tipo, SEM_TIPO
+from src._busca import IndiceNomes
+from src._causas import filtro_atual, permitidas
+from src._perfil import cronometrado, contar
+from src._rapidos import ativo
+
+
+# Níveis de chaves alcançados pelo religador, contando a chave substituída (ver Chave.dic_acumulado_pos_rl), nas colunas
+# de DIC / FIC acumulado pós substituição do estudo por chave. A redução que ordena as candidatas nos estudos de
+# alimentador e SE é a da sensibilidade 1, o ganho da própria chave (src._estudos.estudo_alimentador).
+SENSIBILIDADE = 2
 
 
 class TreeNode:
@@ -67,6 +85,9 @@ class TreeNode:
             assert isinstance(child, TreeNode), f"{child} is not a TreeNode"
             self.children.append(child)
             self.children.sort()
+        if getattr(self, "euler", None) is not None:
+            # A topologia mudou depois de indexada: as consultas voltam a percorrer a árvore.
+            self.euler.valido = False
 
     def get_children(self):
         """
@@ -91,6 +112,14 @@ class TreeNode:
     def get_parent(self):
         return self.parent
 
+    def indice(self):
+        """
+        Índice de pré-ordem da árvore (IndiceEuler), ou None se o nó não foi indexado por CriarRede, se a árvore
+        mudou depois da indexação ou se o caminho rápido "indice_euler" não está ativo (src._rapidos).
+        """
+        indice = getattr(self, "euler", None)
+        return indice if indice is not None and indice.valido and ativo("indice_euler") else None
+
     @property
     def is_root(self):
         """
@@ -112,6 +141,9 @@ class TreeNode:
         Retorna o nível do Nó, 0 caso for raiz.
         """
 
+        indice = self.indice()
+        if indice is not None:
+            return int(indice.nivel[self.entrada])
         if self.is_root:
             return 0
         return 1 + self.parent.get_level()
@@ -153,7 +185,12 @@ class TreeNode:
     def find(self, data):
         """
         Encontra um nó baseado em seu dado dentro da árvore. Procura em profundidade primeiro. 
+        Em árvores indexadas, busca o nome no índice de nomes (IndiceNomes) em vez de percorrer a árvore.
         """
+        indice = getattr(self, "euler", None)
+        if isinstance(data, str) and indice is not None and indice.valido and ativo("indice_nomes"):
+            posicao = indice.nomes.primeira(data, self.entrada, indice.saida[self.entrada])
+            return indice.ordem[posicao] if posicao >= 0 else None
         if self.data == data:
             return self
             
@@ -163,6 +200,14 @@ class TreeNode:
                 return found
         return None
 
+    def sugestoes(self, termo: str, limite: int = 5) -> list:
+        """
+        Nomes da rede próximos do termo (ver IndiceNomes.sugestoes), para quando find não encontra o nó.
+        """
+        indice = getattr(self, "euler", None)
+        nomes = indice.nomes if indice is not None and indice.valido else IndiceNomes(self.dft())
+        return nomes.sugestoes(termo, limite)
+
     def bft(self):
         """
         Retorna todos os Nós a jusante do nó em uma lista, vasculhando todo o nivel primeiro.
@@ -212,65 +257,42 @@ class Chave(TreeNode):
         return f"{self.__class__.__name__}({self.sigla_simo}, {self.codigo})"
 
     @property
+    @cronometrado("Chave.tipo (RDC)")
     def tipo(self) -> str:
         """
         Define o tipo da chave baseado no seu código.
         """
         codigo = self.codigo
+        indice = self.indice()
+        if indice is not None:
+            tipo = indice.rdc()[1][self.entrada]
+            return tipo_por_codigo(codigo) if tipo is SEM_TIPO else tipo
         try:
             return RDC.loc[RDC["Chave"] == str(self)]["Tipo"].item()
         except Exception:
-
-            if 1 <= codigo < 100:
-                return "Chave Tripolar Sem Corte Vsível"
-            elif 100 <= codigo < 200:
-                return "CD"
-            elif 200 <= codigo < 300 or 85000 <= codigo < 86000:
-                return "FU"
-            elif 300 <= codigo < 400:
-                return "Regulador de Tensão"
-            elif 400 <= codigo < 500:
-                return "Chave Tripolar com Corte Visível"
-            elif 500 <= codigo < 600 or 86500 <= codigo < 87000:
-                return "RA"
-            elif 600 <= codigo < 800 or 82000 <= codigo < 83000:
-                return "RA"
-            elif 800 <= codigo < 2900 or 84000 <= codigo < 85000:
-                return "Chave Faca Unipolar - Abertura com Carga"
-            elif 2900 <= codigo < 3000:
-                return "Chave Faca Unipolar - Abertura sem Carga"
-            elif (
-                3000 <= codigo < 5000
-                or 80000 <= codigo < 82000
-                or 87000 <= codigo < 89000
-            ):
-                return "FU"
-            elif 5000 <= codigo < 70000:
-                return "FU"
-            elif 70000 <= codigo < 80000:
-                return "FU"
-            elif 85200 <= codigo < 86000:
-                return "Chave Faca de Ramal Particular"
-            elif 83000 <= codigo < 84000:
-                return "Chave Base Fusível com Lâmina Seccionadora - Abertura com Carga"
-            elif 86000 <= codigo < 86500:
-                return "DJ PVO"
-            elif 89000 <= codigo < 100000:
-                return "Reserva Técnica"
-            else:
-                raise ValueError(
-                    f"códgio {codigo} está fora da faixa numérica expecificada pelo Manual de Procedimentos"
-                )
+            return tipo_por_codigo(codigo)
 
     @property
+    @cronometrado("Chave.lista_ocorrencias (OCORRENCIAS)")
     def lista_ocorrencias(self) -> pd.DataFrame:
-        return OCORRENCIAS.loc[
+        """
+        Ocorrencias do 1025 referidas a chave, apenas as de causas permitidas pelo filtro de causas ativo (src._causas).
+        """
+        ocorrencias = OCORRENCIAS.loc[
             (OCORRENCIAS["REGIONAL"] == simo_to_code(self.sigla_simo))
             & (OCORRENCIAS["EQPTO.RESPONSAVEL"] == self.codigo)
         ]
+        filtro = filtro_atual()
+        if filtro is not None:
+            ocorrencias = ocorrencias[permitidas(ocorrencias["CAUSA"].to_numpy(), filtro)]
+        return ocorrencias
 
     @property
+    @cronometrado("Chave.ucs (RDC)")
     def ucs(self):
+        indice = self.indice()
+        if indice is not None:
+            return indice.rdc()[0][self.entrada]
         return RDC.loc[RDC["Chave"] == str(self)][
             "Consumidores a jusante"
         ].sum()
@@ -287,25 +309,51 @@ class Chave(TreeNode):
     def qtd_ocorrencias(self):
         return self.lista_ocorrencias.shape[0]
     
+    @cronometrado("Chave.indicadores_pos_rl")
+    def indicadores_pos_rl(self) -> tuple:
+        """
+        Dic e fic das ocorrencias referidas a chave, e os mesmos vezes o fator de redução de cada ocorrencia,
+        em uma única leitura das ocorrencias. Retorna (dic, dic_pos_rl, fic, fic_pos_rl).
+        Causas fora da tabela de causas não são mitigadas, como nos intervalos de confiança (fatores_mitigacao).
+        """
+        ocorrencias = self.lista_ocorrencias
+        dic = ocorrencias["DIC"].sum()
+        fic = ocorrencias["QTDE UC EQPTO INTERROMPIDA"].sum()
+        if self.tipo in ["RA", "TS"]:
+            return dic, dic, fic, fic
+        dic_pos_rl = 0.0
+        fic_pos_rl = 0.0
+        fatores = fatores_mitigacao()
+        coluna_fic = ocorrencias.columns.get_loc("QTDE UC EQPTO INTERROMPIDA") + 1  # posição na tupla, após o índice
+        for row in ocorrencias.itertuples():
+            reducao = fatores.get(getattr(row, "CAUSA"), 0.0)
+            dic_pos_rl += getattr(row, "DIC") * (1 - reducao)
+            fic_pos_rl += row[coluna_fic] * (1 - reducao)
+        return dic, dic_pos_rl, fic, fic_pos_rl
+
     @property
+    @cronometrado("Chave.dic_pos_rl")
     def dic_pos_rl(self) -> float:
         """
         Dic das ocorrencias referidas a chave vezes seu fator de redução
         """
-        if self.tipo in ["RA", "TS"]:
-            return self.dic
-        dic = 0.0
-        for row in self.lista_ocorrencias.itertuples():
-            reducao = CAUSAS.loc[CAUSAS["CODIGO"] == getattr(row, "CAUSA")][
-                "MITIGACAO POR RA"
-            ].item()
-            dic += getattr(row, "DIC") * (1 - reducao)
-        return dic
+        return self.indicadores_pos_rl()[1]
 
+    @property
+    def fic_pos_rl(self) -> float:
+        """
+        Fic das ocorrencias referidas a chave vezes seu fator de redução
+        """
+        return self.indicadores_pos_rl()[3]
+
+    @cronometrado("Chave.chaves_jusante (árvore)")
     def chaves_jusante(self):
         """
         Encontra as chaves a jusante da referencia, excluindo as SEDs e suas chaves.
         """
+        indice = self.indice()
+        if indice is not None:
+            return indice.nos(indice.intervalos_jusante(self.entrada))
         lista_objetos = self.dft()
         for node in lista_objetos:
             if isinstance(node, (Subestacao, Alimentador)):
@@ -313,21 +361,103 @@ class Chave(TreeNode):
                     lista_objetos.remove(x)
         return lista_objetos
 
+    @cronometrado("Chave.dic_acumulado")
     def dic_acumulado(self) -> float:
         """
         Calcula o dic acumulado a jusante da chave (a partir dela até o final do ramo), somando o dic de cada chave.
         """
+        indice = self.indice()
+        if indice is not None:
+            return indice.somar_jusante(self.entrada, "dic")
         return sum([chave.dic for chave in self.chaves_jusante()])
 
 
-    def dic_acumulado_pos_rl(self) -> float:
+    @cronometrado("Chave.dic_acumulado_pos_rl")
+    def dic_acumulado_pos_rl(self, sensibilidade: int = SENSIBILIDADE) -> float:
         """
         Calcula o dic acumulado após a substituição da chave por chave religadora. se a chave referencia já for do tipo religadora,
         então o dic acumulado mitigado será o mesmo que o dic acumulado.
-        nessa função foi considerada uma sensibilidade de 3, ou seja, ela atuara caso a falta ocorra no trecho entre a chave de referencia e 3 chaves em cascata.
+        A sensibilidade é o número de níveis de chaves alcançados pelo religador, contando a própria chave: com a sensibilidade
+        padrão de 2 ele atua nas faltas da chave de referencia e das chaves imediatamente a jusante.
+        Nós que não são chaves e permanecem na lista (ver IndiceEuler.intervalos_jusante) contribuem com o próprio dic,
+        sem ganho.
+        """
+        return sum([
+            chave.dic_pos_rl if isinstance(chave, Chave) and (chave.get_level() - self.get_level()) < sensibilidade
+            else chave.dic
+            for chave in self.chaves_jusante()
+        ])
+
+    @cronometrado("Chave.acumulados")
+    def acumulados(self, sensibilidades=(SENSIBILIDADE,)) -> dict:
+        """
+        Dic e fic acumulados a jusante da chave, e os mesmos após a substituição por religador para cada sensibilidade,
+        em uma única passagem pelas chaves a jusante: os ganhos (dic - dic_pos_rl, fic - fic_pos_rl) são somados por nível
+        abaixo da chave, e cada sensibilidade desconta os ganhos dos níveis que alcança. Nós que não são chaves contribuem
+        com o próprio dic e fic (zero se não tiverem), sem ganho, como em src._estudos._indicadores_nos.
+        Retorna {"dic": ..., "fic": ..., "dic_pos_rl": {sensibilidade: ...}, "fic_pos_rl": {sensibilidade: ...}}.
+        Sem o caminho rápido "acumulados" ativo (src._rapidos), cada valor é calculado pelo método de referência.
+        """
+        if not ativo("acumulados"):
+            return {
+                "dic": self.dic_acumulado(),
+                "fic": self.fic_acumulado(),
+                "dic_pos_rl": {s: self.dic_acumulado_pos_rl(s) for s in sensibilidades},
+                "fic_pos_rl": {s: self.fic_acumulado_pos_rl(s) for s in sensibilidades},
+            }
+        alcance = max(sensibilidades)
+        nivel = self.get_level()
+        dic_acumulado = fic_acumulado = 0.0
+        ganhos_dic = [0.0] * alcance
+        ganhos_fic = [0.0] * alcance
+        for chave in self.chaves_jusante():
+            distancia = chave.get_level() - nivel
+            if not isinstance(chave, Chave):
+                dic = chave.dic
+                fic = getattr(chave, "fic", 0.0)
+            elif distancia < alcance:
+                dic, dic_pos_rl, fic, fic_pos_rl = chave.indicadores_pos_rl()
+                ganhos_dic[distancia] += dic - dic_pos_rl
+                ganhos_fic[distancia] += fic - fic_pos_rl
+            else:
+                ocorrencias = chave.lista_ocorrencias
+                dic = ocorrencias["DIC"].sum()
+                fic = ocorrencias["QTDE UC EQPTO INTERROMPIDA"].sum()
+            dic_acumulado += dic
+            fic_acumulado += fic
+        return {
+            "dic": dic_acumulado,
+            "fic": fic_acumulado,
+            "dic_pos_rl": {s: dic_acumulado - sum(ganhos_dic[:s]) for s in sensibilidades},
+            "fic_pos_rl": {s: fic_acumulado - sum(ganhos_fic[:s]) for s in sensibilidades},
+        }
 
+    def dic_acumulado_pos_rl_varredura(self, sensibilidades) -> tuple:
+        """
+        Dic acumulado e dic acumulado após a substituição por religador para várias sensibilidades (ver acumulados).
+        Retorna (dic acumulado, {sensibilidade: dic acumulado pós RL}).
         """
-        return sum([chave.dic_pos_rl if (chave.get_level() - self.get_level()) < 2 else chave.dic for chave in self.chaves_jusante()])
+        acumulados = self.acumulados(sensibilidades)
+        return acumulados["dic"], acumulados["dic_pos_rl"]
+
+    def fic_acumulado(self) -> float:
+        """
+        Fic acumulado a jusante da chave, somando o fic de cada chave. Nós que não são chaves não têm fic.
+        """
+        indice = self.indice()
+        if indice is not None:
+            return indice.somar_jusante(self.entrada, "fic")
+        return sum([getattr(chave, "fic", 0.0) for chave in self.chaves_jusante()])
+
+    def fic_acumulado_pos_rl(self, sensibilidade: int = SENSIBILIDADE) -> float:
+        """
+        Fic acumulado após a substituição da chave por religador, com o mesmo critério de dic_acumulado_pos_rl.
+        """
+        return sum([
+            chave.fic_pos_rl if isinstance(chave, Chave) and (chave.get_level() - self.get_level()) < sensibilidade
+            else getattr(chave, "fic", 0.0)
+            for chave in self.chaves_jusante()
+        ])
         
 
     def tempo_interrupcao(self) -> float:
@@ -356,6 +486,7 @@ class Chave(TreeNode):
             return other.ucs - self.ucs
         return self.ucs - other.ucs
 
+    @cronometrado("Chave.chaves_montante (árvore)")
     def chaves_montante(self) -> list:
         chaves_montante = []
         node: TreeNode
@@ -387,6 +518,7 @@ class Chave(TreeNode):
             ) * (chave.ucs_entre(self))
         return dic_ta
 
+    @cronometrado("Chave.get_alimentador (árvore)")
     def get_alimentador(self):
         """
         Retorna o Alimentador da Chave
@@ -440,10 +572,14 @@ class Alimentador(TreeNode):
         return lista_chaves
 
     @property
+    @cronometrado("Alimentador.ucs")
     def ucs(self) -> int:
         """
         Número de unidades consumidoras atendidas pelo Alimentador.
         """
+        indice = self.indice()
+        if indice is not None and all(isinstance(chave, Chave) for chave in self.children):
+            return sum(indice.somar_jusante(chave.entrada, "ucs") for chave in self.children)
         chaves = self.lista_chaves
         consumidores = 0
         for chave in chaves:
@@ -489,6 +625,7 @@ class Alimentador(TreeNode):
     def chaves_candidatas_rl(self) -> list:
         return
 
+    @cronometrado("Alimentador.chaves_candidatas_ts")
     def chaves_candidatas_ts(self) -> list:
         """
         Retorna as chaves candidatas a subistituição por religador monofásico no Alimentador.
@@ -519,6 +656,8 @@ class Alimentador(TreeNode):
                 # Descarta chaves que não possuem CHI acumulado
             lista_candidatas.append(chave) if chave not in lista_candidatas else None
             # Adiciona a chave a lista se ela já não estiver na lista.
+        contar("chaves avaliadas", len(lista_chaves))
+        contar("chaves candidatas", len(lista_candidatas))
         return lista_candidatas
 
 
@@ -577,7 +716,7 @@ class Subestacao(TreeNode):
         chaves_candidatas_ts = []
         alm: Alimentador
         for alm in self.children:
-            chaves_candidatas_ts.extend(alm.get_chaves_candidatas_ts())
+            chaves_candidatas_ts.extend(alm.chaves_candidatas_ts())
         return chaves_candidatas_ts
 
 class Nucleo(TreeNode):
@@ -607,66 +746,324 @@ class Empresa(TreeNode):
 
 
 
-def CriarRede() -> Empresa:
+class IndiceEuler:
+    """
+    Índice de pré-ordem (percurso de Euler) da árvore criada por CriarRede. Cada nó recebe a posição de entrada na
+    ordem de TreeNode.dft, e a sua subárvore ocupa o intervalo [entrada, saida[entrada]) da ordem e dos arrays por nó.
+    Somas a jusante saem das somas de prefixo dos arrays de dic, fic e ucs das chaves, e listas a jusante são fatias
+    da ordem. As subárvores de SEDs e de alimentadores de disjuntores fictícios ficam fora por intervalos separados
+    (intervalos_jusante). nomes indexa os nomes dos nós para TreeNode.find e as sugestões de busca (src._busca).
     """
-    Representa as regiões, subestações, alimentadores e suas respectivas chaves usando uma estrutura de árvore e nós, comumente chamada de "Tree-TreeNode data structure"
 
+    def __init__(self, raiz: TreeNode):
+        nivel_raiz = raiz.get_level()
+        self.ordem = raiz.dft()
+        n = len(self.ordem)
+        self.valido = True
+        self.saida = np.arange(1, n + 1, dtype=np.int64)
+        self.nivel = np.zeros(n, dtype=np.int64)
+        for i, no in enumerate(self.ordem):
+            no.entrada = i
+            no.euler = self
+        for i, no in enumerate(self.ordem):
+            self.nivel[i] = nivel_raiz if no is raiz else self.nivel[no.parent.entrada] + 1
+        for i in range(n - 1, -1, -1):
+            if self.ordem[i].children:
+                self.saida[i] = self.saida[self.ordem[i].children[-1].entrada]
+        # SEDs e alimentadores abaixo de chaves: raízes das subárvores excluídas de Chave.chaves_jusante.
+        self.bloqueios = np.flatnonzero([isinstance(no, (Subestacao, Alimentador)) for no in self.ordem])
+        self._prefixos = {}
+        self._rdc = None
+        self._chaves_1025 = None
+        self._grupos = None  # posição de cada chave nos equipamentos de agregados_por_causa
+        self.nomes = IndiceNomes(self.ordem)
+
+    def intervalos_jusante(self, inicio: int) -> list:
+        """
+        Intervalos [a, b) da ordem que formam Chave.chaves_jusante do nó na posição inicio: a subárvore do nó, sem
+        as subárvores de SEDs e alimentadores. Como em chaves_jusante, que remove os nós da lista enquanto a percorre,
+        o nó seguinte a cada subárvore removida não é verificado e permanece na lista.
+        """
+        fim = self.saida[inicio]
+        intervalos = []
+        posicao = inicio
+        while posicao < fim:
+            k = np.searchsorted(self.bloqueios, posicao)
+            bloqueio = self.bloqueios[k] if k < len(self.bloqueios) else fim
+            if bloqueio >= fim:
+                intervalos.append((posicao, fim))
+                break
+            if bloqueio > posicao:
+                intervalos.append((posicao, bloqueio))
+            seguinte = self.saida[bloqueio]
+            if seguinte < fim:
+                intervalos.append((seguinte, seguinte + 1))
+            posicao = seguinte + 1
+        return intervalos
+
+    def nos(self, intervalos: list) -> list:
+        nos = []
+        for inicio, fim in intervalos:
+            nos.extend(self.ordem[inicio:fim])
+        return nos
+
+    def chaves(self) -> np.ndarray:
+        return np.flatnonzero([isinstance(no, Chave) for no in self.ordem])
+
+    def rdc(self) -> tuple:
+        """
+        UCs a jusante e tipo de cada nó pelo Relatório de Chaves carregado (zero e SEM_TIPO fora das chaves),
+        calculados no primeiro uso por um único cruzamento com o RDC (src._rdc.agregar_rdc).
+        """
+        if self._rdc is None:
+            chaves = self.chaves()
+            ucs_chaves, tipos_chaves = agregar_rdc(RDC, [str(self.ordem[i]) for i in chaves])
+            ucs = np.zeros(len(self.ordem), dtype=ucs_chaves.dtype)
+            tipos = np.full(len(self.ordem), SEM_TIPO, dtype=object)
+            ucs[chaves] = ucs_chaves
+            tipos[chaves] = tipos_chaves
+            self._rdc = ucs, tipos
+        return self._rdc
+
+    def atualizar_rdc(self, posicoes: np.ndarray, ucs: np.ndarray, tipos: np.ndarray):
+        """
+        Atualiza as UCs e os tipos das chaves nas posições e, pela diferença de UCs, a soma de prefixo usada nas
+        somas a jusante. Arrays ainda não calculados serão calculados no primeiro uso, já com o novo RDC.
+        """
+        if self._rdc is None:
+            return
+        ucs_atuais, tipos_atuais = self._rdc
+        if np.result_type(ucs_atuais, ucs) != ucs_atuais.dtype:
+            # UCs passaram de inteiras para reais (linhas sem valor no novo RDC): recalcula tudo no próximo uso.
+            self._rdc = None
+            self._prefixos.pop("ucs", None)
+            return
+        diferenca = np.zeros(len(self.ordem))
+        diferenca[posicoes] = ucs - ucs_atuais[posicoes]
+        ucs_atuais[posicoes] = ucs
+        tipos_atuais[posicoes] = tipos
+        if "ucs" in self._prefixos:
+            self._prefixos["ucs"][1:] += np.cumsum(diferenca)
+
+    def _equipamentos(self) -> pd.MultiIndex:
+        """
+        (REGIONAL, EQPTO.RESPONSAVEL) de cada chave da ordem, as colunas do 1025 que identificam a chave.
+        """
+        if self._chaves_1025 is None:
+            chaves = self.chaves()
+            self._chaves_1025 = pd.MultiIndex.from_arrays([
+                [simo_to_code(self.ordem[i].sigla_simo) for i in chaves],
+                [self.ordem[i].codigo for i in chaves],
+            ])
+        return self._chaves_1025
+
+    def _prefixo(self, medida: str) -> np.ndarray:
+        """
+        Soma de prefixo do dic, fic ou ucs das chaves na ordem (zero nos demais nós), calculada no primeiro uso
+        a partir de agregados do 1025 e do Relatório de Chaves. Dic e fic seguem o filtro de causas ativo: cada filtro
+        tem a sua soma de prefixo, calculada pela soma mascarada dos agregados por causa (agregados_por_causa).
+        """
+        filtro = filtro_atual() if medida != "ucs" else None
+        chave_prefixo = medida if filtro is None else (medida, filtro)
+        if chave_prefixo not in self._prefixos:
+            chaves = self.chaves()
+            valores = np.zeros(len(self.ordem))
+            if medida == "ucs":
+                valores[:] = self.rdc()[0]
+            else:
+                coluna = "DIC" if medida == "dic" else "QTDE UC EQPTO INTERROMPIDA"
+                indice = self._equipamentos()
+                if filtro is None:
+                    somas = OCORRENCIAS.groupby(["REGIONAL", "EQPTO.RESPONSAVEL"])[coluna].sum()
+                    valores[chaves] = somas.reindex(indice).fillna(0).to_numpy(dtype=float)
+                else:
+                    agregados, equipamentos = agregados_por_causa()
+                    mascara = permitidas(agregados["CAUSA"].to_numpy(), filtro)
+                    somas = np.bincount(
+                        agregados["GRUPO"].to_numpy()[mascara],
+                        weights=agregados[coluna].to_numpy(dtype=float)[mascara],
+                        minlength=len(equipamentos),
+                    )
+                    if self._grupos is None:
+                        self._grupos = equipamentos.get_indexer(indice)
+                    valores[chaves] = np.where(self._grupos >= 0, somas[self._grupos], 0.0)
+            self._prefixos[chave_prefixo] = np.concatenate([[0.0], np.cumsum(valores)])
+        return self._prefixos[chave_prefixo]
+
+    def somar_jusante(self, inicio: int, medida: str) -> float:
+        """
+        Soma da medida ("dic", "fic" ou "ucs") sobre Chave.chaves_jusante do nó na posição inicio. Os nós que não são
+        chaves e permanecem na lista (ver intervalos_jusante) contribuem com a propriedade correspondente, ou zero se
+        não a tiverem (SEDs e alimentadores não têm fic), como em src._estudos._indicadores_nos.
+        """
+        prefixo = self._prefixo(medida)
+        total = 0.0
+        for a, b in self.intervalos_jusante(inicio):
+            total += prefixo[b] - prefixo[a]
+            if b - a == 1 and not isinstance(self.ordem[a], Chave):
+                total += getattr(self.ordem[a], medida, 0.0)
+        return int(round(total)) if medida == "ucs" else float(total)
+
+
+def indexar_euler(raiz: TreeNode) -> TreeNode:
+    """
+    Indexa a árvore em pré-ordem (IndiceEuler). Os nós passam a responder get_level, chaves_jusante,
+    dic_acumulado, fic_acumulado e Alimentador.ucs pelo índice, sem percorrer a subárvore.
+    """
+    IndiceEuler(raiz)
+    return raiz
+
+
+@cronometrado("atualizar_rdc")
+def atualizar_rdc(raiz: TreeNode, rdc: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica um novo Relatório de Chaves à rede já criada, sem refazer CriarRede: o RDC carregado é substituído,
+    as UCs e os tipos das chaves são cruzados pelo nome com os do RDC anterior e apenas as chaves alteradas são
+    atualizadas no índice da árvore, com as somas de UCs a jusante.
+    Retorna os alimentadores com chaves alteradas: número de chaves com UCs ou tipo diferentes e a variação de UCs
+    das chaves alteradas. Chaves abaixo de disjuntores fictícios contam no alimentador fictício.
+    """
+    global RDC
+    indice = getattr(raiz, "euler", None)
+    if indice is not None and not indice.valido:
+        indice = None
+    nos = indice.ordem if indice is not None else raiz.dft()
+    chaves = np.flatnonzero([isinstance(no, Chave) for no in nos])
+    nomes = [str(nos[i]) for i in chaves]
+    ucs_anteriores, tipos_anteriores = agregar_rdc(RDC, nomes)
+    ucs, tipos = agregar_rdc(rdc, nomes)
+    tipo_alterado = np.array([not mesmo_tipo(a, b) for a, b in zip(tipos_anteriores, tipos)], dtype=bool)
+    alteradas = np.flatnonzero((ucs != ucs_anteriores) | tipo_alterado)
+
+    RDC = rdc
+    database.definir_rdc(rdc)
+    if indice is not None:
+        indice.atualizar_rdc(chaves[alteradas], ucs[alteradas], tipos[alteradas])
+
+    linhas = {}
+    for k in alteradas:
+        no = nos[chaves[k]]
+        while no is not None and not isinstance(no, Alimentador):
+            no = no.parent
+        linha = linhas.setdefault(str(no) if no is not None else "", [0, 0, 0])
+        linha[0] += 1
+        linha[1] += int(tipo_alterado[k])
+        linha[2] += ucs[k] - ucs_anteriores[k]
+    df = pd.DataFrame(
+        [[alimentador, *valores] for alimentador, valores in linhas.items()],
+        columns=["Alimentador", "Chaves alteradas", "Tipos alterados", "Variação de UCs"],
+    )
+    df.sort_values("Alimentador", inplace=True, ignore_index=True)
+    return df
+
+
+def calcular_hashes(raiz: TreeNode) -> TreeNode:
+    """
+    Calcula o hash de subárvore (Merkle) de cada nó, a partir do tipo, do nome e dos hashes dos filhos,
+    independente da ordem dos filhos. Subárvores com o mesmo hash têm a mesma topologia.
     """
+    for no in reversed(raiz.dft()):
+        conteudo = "\n".join([f"{no.__class__.__name__}:{no}", *sorted(filho.hash_subarvore for filho in no.children)])
+        no.hash_subarvore = hashlib.blake2b(conteudo.encode(), digest_size=16).hexdigest()
+    return raiz
+
+
+@cronometrado("CriarRede")
+def CriarRede(rhc: pd.DataFrame | None = None) -> Empresa:
+    """
+    Representa as regiões, subestações, alimentadores e suas respectivas chaves usando uma estrutura de árvore e nós, comumente chamada de "Tree-TreeNode data structure"
+    Por padrão usa o RHC da base carregada. O RHC pode ser a tabela larga do csv ou a compacta (src._rhc), que já traz
+    o tipo de cada linha e a posição do pai, de modo que cada nó é criado e ligado ao pai diretamente.
+    Cada nó recebe o hash da sua subárvore (calcular_hashes) e a sua posição no índice de pré-ordem (indexar_euler).
+    """
+    rhc = normalizar_rhc(RHC if rhc is None else rhc)
     root = Empresa()
-    lista_nucleos = []
-    nomes_nucleos = []
-    for nucleo in list(SUBESTACOES.keys()):
-        nomes_nucleos.append(nucleo)
-        nucleo = Nucleo(nucleo)
+    nucleos = {}
+    for nome in SUBESTACOES.keys():
+        nucleo = Nucleo(nome)
         nucleo.set_parent(root)
-        lista_nucleos.append(nucleo)
-        
-    parent = root
-    curdepth = 1
-    for row in RHC.itertuples():
-        depth = 1
-        for value in row[1:]:
-            depth += 1
-            if  value == "\x1a":
-                return root
-            if isinstance(value, float):
-                continue
-            else:
-                break
-        while curdepth >= depth:
-            parent = parent.parent
-            curdepth -= 1
-
-        if depth == 2:  # Subestacoes
-            data = value.split(" ")[0]
-            node = Subestacao(data)
-            nome_nucleo = encontrar_nucleo(node.nome)
-            if nome_nucleo:
-                node.set_parent(lista_nucleos[nomes_nucleos.index(nome_nucleo)]) if node else None
-            else:
-                node.set_parent(root)
+        nucleos.setdefault(nome, nucleo)
 
+    nos = _criar_nos(rhc, root, nucleos)
+    for node in [root, *nucleos.values(), *nos]:
+        node.children.sort()
+    return indexar_euler(calcular_hashes(root))
 
-        elif depth == 3:  # Alimentador
-            data = value.split(" ")[0]
-            node = Alimentador(data)
-            node.set_parent(parent)
 
+def _criar_nos(rhc: pd.DataFrame, root: Empresa, nucleos: dict) -> list:
+    """
+    Cria os nós das linhas do RHC compacto, ligados aos pais (SEs aos núcleos, ou à empresa), sem ordenar os filhos.
+    """
+    nos = []
+    linhas = zip(
+        rhc["PROFUNDIDADE"].to_numpy(), rhc["ROTULO"].astype(str).to_numpy(), rhc["PAI"].to_numpy(), tipos_no(rhc)
+    )
+    for profundidade, rotulo, pai, tipo in linhas:
+        destino = nos[pai] if pai >= 0 else root
+        if profundidade == 2:  # Subestacoes
+            node = Subestacao(rotulo.split(" ")[0])
+            destino = nucleos.get(encontrar_nucleo(node.nome)) or root
+        elif tipo == "Alimentador":  # Alimentadores e disjuntores fictícios
+            data = rotulo.split(" ")[0]
+            if profundidade > 3:
+                data = data.removeprefix("DJ_").removesuffix("_FICT")
+            node = Alimentador(data)
+        elif tipo == "SED":
+            node = Subestacao(rotulo.split(" ")[0])
         else:  # Chaves
-            if "BT " in value or "TT-" in value:
-                data = value.split(" ")[0]
-                node = Subestacao(data)
-                node.set_parent(parent)
-            elif "DJ_" in value:
-                data = value.split(" ")[0].removeprefix("DJ_").removesuffix("_FICT")
-                node = Alimentador(data)
-                node.set_parent(parent)
-                
-            else:
-                sigla_simo, codigo = value.split()[0].split("_")
-                node = Chave(sigla_simo, codigo)
-                node.set_parent(parent)
-                
-        parent = node
-        curdepth += 1
-    return root
+            sigla_simo, codigo = rotulo.split()[0].split("_")
+            node = Chave(sigla_simo, codigo)
+        # Os filhos são ordenados uma única vez no final, mesma ordem de set_children.
+        node.parent = destino
+        destino.children.append(node)
+        nos.append(node)
+    return nos
+
+
+@cronometrado("carregar_nucleos")
+def carregar_nucleos(raiz: Empresa, nomes) -> list:
+    """
+    Base particionada (src._particoes): acrescenta à rede criada por CriarRede, e ao RDC e 1025 carregados, os núcleos
+    ainda não carregados, e reindexa a árvore (o índice anterior deixa de ser válido). Os filhos são ordenados como em
+    CriarRede, então a rede com todos os núcleos carregados é a mesma da base inteira.
+    Retorna os núcleos carregados agora; sem a base particionada, não carrega nada.
+    """
+    global RDC, OCORRENCIAS
+    if database.PARTICOES is None:
+        return []
+    carregados = raiz.__dict__.setdefault("nucleos_carregados", set())
+    novos = [
+        nome for nome in dict.fromkeys(nomes) if nome not in carregados and nome in database.PARTICOES["particoes"]
+    ]
+    if not novos:
+        return []
+    rhc, rdc, ocorrencias = ler_particoes(novos)
+    RDC, OCORRENCIAS = database.anexar_base(rdc, ocorrencias)
+    nucleos = {no.nome: no for no in raiz.children if isinstance(no, Nucleo)}
+    nos = _criar_nos(rhc, raiz, nucleos)
+    for node in [raiz, *nucleos.values(), *nos]:
+        node.children.sort()
+    if getattr(raiz, "euler", None) is not None:
+        raiz.euler.valido = False
+    carregados.update(novos)
+    indexar_euler(calcular_hashes(raiz))
+    return novos
+
+
+def reparticionar():
+    """
+    Base particionada: divide de novo a base importada e descarta as linhas dos núcleos carregados. A rede anterior
+    deixa de corresponder à base e deve ser recriada por CriarRede.
+    """
+    global RDC, OCORRENCIAS
+    RDC, OCORRENCIAS = database.reparticionar()
+
+
+def carregar_para(raiz: Empresa, entrada: str) -> list:
+    """
+    Base particionada: carrega os núcleos necessários para encontrar a entrada (nome de chave, alimentador, SE,
+    núcleo ou CELESC) na rede, antes de TreeNode.find. Retorna os núcleos carregados agora.
+    """
+    if database.PARTICOES is None:
+        return []
+    return carregar_nucleos(raiz, particoes_de(entrada, database.PARTICOES))
@@ -0,0 +1,481 @@
+import numpy as np
+import pandas as pd
+from src._dataclasses import Nucleo, Subestacao, Alimentador, Chave, IndiceEuler, SENSIBILIDADE
+from src._database import versao_base, agregados_por_causa, fatores_mitigacao, simo_to_code
+from src._referencias import tipo_por_codigo
+from src._rdc import SEM_TIPO
+from src._cache import em_cache
+from src._causas import com_filtro_causas, filtro_atual, permitidas
+from src._progresso import etapas, EstudoCancelado
+from src._bootstrap import intervalo_ganho_dic, intervalo_reducao_dic_acumulado, rotulos_intervalo
+
+# Versão das tabelas de estudo_chave, estudo_alimentador e estudo_subestacao, parte da chave do cache de estudos.
+# Incrementar ao acrescentar, remover ou alterar colunas, para que os resultados salvos antes deixem de ser usados.
+VERSAO_RESULTADOS = 2  # 2: colunas de FEC / FIC
+
+
+def ganhos_por_sensibilidade(chaves, sensibilidades: tuple) -> dict:
+    """
+    Redução do DIC acumulado [h * ucs] de cada chave para cada sensibilidade do religador,
+    com uma única passagem pelas chaves a jusante de cada chave. Retorna {sensibilidade: array}.
+    """
+    if not sensibilidades:
+        return {}
+    ganhos = {sensibilidade: np.zeros(len(chaves)) for sensibilidade in sensibilidades}
+    for posicao, chave in enumerate(chaves):
+        dic_acumulado, pos_rl = chave.dic_acumulado_pos_rl_varredura(sensibilidades)
+        for sensibilidade, dic_sensibilidade in pos_rl.items():
+            ganhos[sensibilidade][posicao] = dic_acumulado - dic_sensibilidade
+    return ganhos
+
+
+def ganhos_chaves(chaves) -> tuple:
+    """
+    Redução estimada do DIC [h * ucs] e do FIC [ucs] de cada chave substituída por religador,
+    com uma única leitura das ocorrencias de cada chave. Retorna (array dic, array fic).
+    """
+    ganho_dic = np.zeros(len(chaves))
+    ganho_fic = np.zeros(len(chaves))
+    for posicao, chave in enumerate(chaves):
+        dic, dic_pos_rl, fic, fic_pos_rl = chave.indicadores_pos_rl()
+        ganho_dic[posicao] = dic - dic_pos_rl
+        ganho_fic[posicao] = fic - fic_pos_rl
+    return ganho_dic, ganho_fic
+
+
+@em_cache(versao_base, VERSAO_RESULTADOS)
+@com_filtro_causas
+def estudo_chave(
+    chave: Chave, reamostragens: int = 0, semente=None, confianca: float = 0.90, sensibilidades: tuple = (),
+    causas: tuple = (), excluir_causas: tuple = (),
+) -> pd.DataFrame:
+    """
+    Estudo de ganho da substituição de uma chave por religador. Retorna uma linha com os indicadores da chave.
+    Com sensibilidades, acrescenta o DIC acumulado pós substituição e a redução para cada sensibilidade do religador.
+    causas / excluir_causas restringem as ocorrencias do 1025 usadas no estudo (códigos de causa, ver src._causas).
+    """
+    acumulados = chave.acumulados(tuple(sorted({SENSIBILIDADE, *sensibilidades})))
+    dic_acumulado = acumulados["dic"]
+    dic_acumulado_pos_rl = acumulados["dic_pos_rl"][SENSIBILIDADE]
+    fic_acumulado = acumulados["fic"]
+    fic_acumulado_pos_rl = acumulados["fic_pos_rl"][SENSIBILIDADE]
+    dic, dic_pos_rl, fic, fic_pos_rl = chave.indicadores_pos_rl()
+    reducao_dic_acumulado = (
+        round(100 * (1 - dic_acumulado_pos_rl / dic_acumulado), 2)
+        if dic_acumulado
+        else "NA"
+    )
+    reducao_fic_acumulado = (
+        round(100 * (1 - fic_acumulado_pos_rl / fic_acumulado), 2)
+        if fic_acumulado
+        else "NA"
+    )
+    chaves_nf = pd.DataFrame({
+        "Núcleo / Unidade": str(chave.get_nucleo()),
+        "Subestação": str(chave.get_subestacao()),
+        "Alimentador": str(chave.get_alimentador()),
+        "Chave": chave,
+        "Unidade Consumidoras": chave.ucs,
+        "DIC Chave [h*ucs]": dic,
+        "DIC Acumulado [h * ucs]": dic_acumulado,
+        "DIC Estimado após substituição [h * ucs]": dic_pos_rl,
+        "DIC Acumulado estimado pós substituição [h * ucs]": dic_acumulado_pos_rl,
+        "Redução DIC Acumulado estimada [%]": reducao_dic_acumulado,
+        "FIC Chave [ucs]": fic,
+        "FIC Acumulado [ucs]": fic_acumulado,
+        "FIC Estimado após substituição [ucs]": fic_pos_rl,
+        "FIC Acumulado estimado pós substituição [ucs]": fic_acumulado_pos_rl,
+        "Redução FIC Acumulado estimada [%]": reducao_fic_acumulado,
+    }, index = ['0'])
+    if reamostragens:
+        inferior, superior = intervalo_reducao_dic_acumulado(chave, reamostragens, semente, confianca)
+        rotulo_inferior, rotulo_superior = rotulos_intervalo(confianca)
+        chaves_nf[f"Redução DIC Acumulado estimada IC {rotulo_inferior} [%]"] = inferior
+        chaves_nf[f"Redução DIC Acumulado estimada IC {rotulo_superior} [%]"] = superior
+    if sensibilidades:
+        for sensibilidade in sensibilidades:
+            dic_sensibilidade = acumulados["dic_pos_rl"][sensibilidade]
+            chaves_nf[f"DIC Acumulado estimado pós substituição, sensibilidade {sensibilidade} [h * ucs]"] = dic_sensibilidade
+            chaves_nf[f"Redução DIC Acumulado estimada, sensibilidade {sensibilidade} [%]"] = (
+                round(100 * (1 - dic_sensibilidade / dic_acumulado), 2) if dic_acumulado else "NA"
+            )
+    return chaves_nf
+
+
+@em_cache(versao_base, VERSAO_RESULTADOS)
+@com_filtro_causas
+def estudo_alimentador(
+    alm: Alimentador, reamostragens: int = 0, semente=None, confianca: float = 0.90, sensibilidades: tuple = (),
+    causas: tuple = (), excluir_causas: tuple = (),
+) -> pd.DataFrame:
+    """
+    Estudo das chaves candidatas a religador no alimentador, ordenadas pela redução de DEC estimada.
+    A redução estimada é a da sensibilidade 1, o ganho das ocorrencias da própria chave; sensibilidades acrescenta a
+    redução do DIC acumulado de cada sensibilidade (a coluna da sensibilidade 1 repete a redução estimada).
+    As unidades consumidoras do alimentador ficam em df.attrs["ucs"]. causas / excluir_causas filtram as ocorrencias.
+    """
+    df = pd.DataFrame(alm.chaves_candidatas_ts(), columns= ["Chave"])
+    ucs = alm.ucs
+    ganho_dic, ganho_fic = ganhos_chaves(df["Chave"])
+    df["Redução DEC estimada [HI]"] = ganho_dic / ucs
+    df["Redução FEC estimada [interrupções]"] = ganho_fic / ucs
+    if reamostragens:
+        inferior, superior = intervalo_ganho_dic(list(df["Chave"]), reamostragens, semente, confianca)
+        rotulo_inferior, rotulo_superior = rotulos_intervalo(confianca)
+        df[f"Redução DEC estimada IC {rotulo_inferior} [HI]"] = inferior / ucs
+        df[f"Redução DEC estimada IC {rotulo_superior} [HI]"] = superior / ucs
+    for sensibilidade, ganho in ganhos_por_sensibilidade(df["Chave"], sensibilidades).items():
+        df[f"Redução DEC estimada, sensibilidade {sensibilidade} [HI]"] = ganho / ucs
+    df["Interrupções no periodo"] = df["Chave"].apply(lambda x: x.qtd_ocorrencias)
+    df["Unidades consumidoras a jusante da Chave"] = df["Chave"].apply(lambda x: x.ucs)
+    df = df[(df["Redução DEC estimada [HI]"]) != 0]
+
+    df.sort_values(["Redução DEC estimada [HI]",
+                    "Unidades consumidoras a jusante da Chave"], inplace=True, ascending=False)
+    df.attrs["ucs"] = ucs
+    return df
+
+
+def _tabela_subestacao(
+    se: Subestacao, chaves: list, ganho_dic: np.ndarray, ganho_fic: np.ndarray, ganhos_sensibilidade: dict,
+    reamostragens: int, semente, confianca: float,
+) -> pd.DataFrame:
+    """
+    Tabela do estudo da SE a partir das chaves candidatas e dos seus ganhos (sensibilidade 1, ver estudo_alimentador),
+    calculados alimentador a alimentador.
+    """
+    df = pd.DataFrame(chaves, columns= ["Chave"])
+    ucs = se.ucs
+    df["Alimentador"] = df["Chave"].apply(lambda x: x.get_alimentador())
+    df = df[["Alimentador", "Chave"]]
+    ucs_alimentadores = {}
+    for alm in df["Alimentador"]:
+        if id(alm) not in ucs_alimentadores:
+            ucs_alimentadores[id(alm)] = alm.ucs
+    ucs_alimentador = np.array([ucs_alimentadores[id(alm)] for alm in df["Alimentador"]], dtype=float)
+    df["Redução DEC SE estimada [HI]"] = ganho_dic / ucs
+    df["Redução DEC Alimentador estimada [HI]"] = ganho_dic / ucs_alimentador
+    df["Redução FEC SE estimada [interrupções]"] = ganho_fic / ucs
+    df["Redução FEC Alimentador estimada [interrupções]"] = ganho_fic / ucs_alimentador
+    if reamostragens:
+        inferior, superior = intervalo_ganho_dic(list(df["Chave"]), reamostragens, semente, confianca)
+        rotulo_inferior, rotulo_superior = rotulos_intervalo(confianca)
+        df[f"Redução DEC SE estimada IC {rotulo_inferior} [HI]"] = inferior / ucs
+        df[f"Redução DEC SE estimada IC {rotulo_superior} [HI]"] = superior / ucs
+        df[f"Redução DEC Alimentador estimada IC {rotulo_inferior} [HI]"] = inferior / ucs_alimentador
+        df[f"Redução DEC Alimentador estimada IC {rotulo_superior} [HI]"] = superior / ucs_alimentador
+    for sensibilidade, ganho in ganhos_sensibilidade.items():
+        df[f"Redução DEC SE estimada, sensibilidade {sensibilidade} [HI]"] = ganho / ucs
+        df[f"Redução DEC Alimentador estimada, sensibilidade {sensibilidade} [HI]"] = ganho / ucs_alimentador
+    df["Interrupções"] = df["Chave"].apply(lambda x: x.qtd_ocorrencias)
+    df["UCs a jusante da Chave"] = df["Chave"].apply(lambda x: x.ucs)
+    df = df[df["Redução DEC Alimentador estimada [HI]"] != 0]
+    df.sort_values(["Redução DEC SE estimada [HI]",], inplace=True, ascending=False)
+    df.attrs["ucs"] = ucs
+    return df
+
+
+@em_cache(versao_base, VERSAO_RESULTADOS)
+@com_filtro_causas
+def estudo_subestacao(
+    se: Subestacao, reamostragens: int = 0, semente=None, confianca: float = 0.90, sensibilidades: tuple = (),
+    causas: tuple = (), excluir_causas: tuple = (),
+) -> pd.DataFrame:
+    """
+    Estudo das chaves candidatas a religador em todos os alimentadores da SE, ordenadas pela redução de DEC da SE,
+    com as reduções da sensibilidade 1 e as colunas de sensibilidades como em estudo_alimentador.
+    As unidades consumidoras da SE ficam em df.attrs["ucs"]. causas / excluir_causas filtram as ocorrencias.
+    Os ganhos são calculados alimentador a alimentador, com o progresso avisado ao acompanhamento ativo
+    (src._progresso). Um cancelamento entre alimentadores gera EstudoCancelado com a tabela dos alimentadores
+    concluídos (sem os intervalos de confiança), e o estudo completo só é gravado no cache se terminar.
+    """
+    alimentadores = se.children
+    progresso = etapas(len(alimentadores), f"SE {se}")
+    chaves, ganhos_dic, ganhos_fic = [], [], []
+    ganhos_sensibilidade = {sensibilidade: [] for sensibilidade in sensibilidades}
+
+    def tabela(reamostragens):
+        return _tabela_subestacao(
+            se, chaves, np.concatenate(ganhos_dic or [[]]), np.concatenate(ganhos_fic or [[]]),
+            {s: np.concatenate(ganhos or [[]]) for s, ganhos in ganhos_sensibilidade.items()},
+            reamostragens, semente, confianca,
+        )
+
+    for alm in alimentadores:
+        if progresso.cancelado():
+            raise EstudoCancelado(tabela(0))
+        candidatas = alm.chaves_candidatas_ts()
+        ganho_dic, ganho_fic = ganhos_chaves(candidatas)
+        chaves.extend(candidatas)
+        ganhos_dic.append(ganho_dic)
+        ganhos_fic.append(ganho_fic)
+        for sensibilidade, ganho in ganhos_por_sensibilidade(candidatas, sensibilidades).items():
+            ganhos_sensibilidade[sensibilidade].append(ganho)
+        progresso.avancar(str(alm))
+    return tabela(reamostragens)
+
+
+def subestacoes(no) -> list:
+    """
+    SEs de primeiro nível de um Núcleo ou da Empresa, incluindo as SEs de todos os núcleos da Empresa.
+    """
+    lista_ses = []
+    for filho in no.children:
+        if isinstance(filho, Subestacao):
+            lista_ses.append(filho)
+        elif isinstance(filho, Nucleo):
+            lista_ses.extend(subestacoes(filho))
+    return lista_ses
+
+
+def estudo_agregado(
+    no, reamostragens: int = 0, semente=None, confianca: float = 0.90, sensibilidades: tuple = (),
+    causas: tuple = (), excluir_causas: tuple = (),
+):
+    """
+    Estudo das chaves candidatas a religador de um Núcleo ou da Empresa, calculado alimentador a alimentador.
+    Gera um DataFrame por alimentador, com as chaves representadas pelo nome, para que as linhas possam ser gravadas
+    à medida que ficam prontas sem manter toda a rede de resultados em memória.
+    df.attrs tem as unidades consumidoras do alimentador ("ucs"), a SE e a posição da SE no estudo ("se", "progresso").
+    Cada alimentador concluído é avisado ao acompanhamento ativo (src._progresso), e um cancelamento interrompe o
+    estudo entre alimentadores com EstudoCancelado, depois de gerados os DataFrames dos alimentadores concluídos.
+    """
+    lista_ses = subestacoes(no)
+    progresso = etapas(sum(isinstance(alm, Alimentador) for se in lista_ses for alm in se.children), str(no))
+    for posicao, se in enumerate(lista_ses, 1):
+        nucleo = se.parent if isinstance(se.parent, Nucleo) else ""
+        for alm in se.children:
+            if not isinstance(alm, Alimentador):
+                continue
+            if progresso.cancelado():
+                raise EstudoCancelado()
+            estudo = estudo_alimentador(
+                alm, reamostragens, semente, confianca, sensibilidades, causas, excluir_causas
+            )
+            ucs = estudo.attrs["ucs"]
+            df = pd.DataFrame({
+                "Núcleo / Unidade": str(nucleo),
+                "Subestação": str(se),
+                "Alimentador": str(alm),
+                "Chave": estudo["Chave"].astype(str),
+                "Redução DIC estimada [h * ucs]": estudo["Redução DEC estimada [HI]"] * ucs,
+                "Redução FIC estimada [ucs]": estudo["Redução FEC estimada [interrupções]"] * ucs,
+            })
+            for coluna in estudo.columns[1:]:
+                coluna_agregada = coluna.replace("Redução DEC", "Redução DEC Alimentador")
+                df[coluna_agregada.replace("Redução FEC", "Redução FEC Alimentador")] = estudo[coluna]
+            df.attrs.update(ucs=ucs, se=se, progresso=(posicao, len(lista_ses)))
+            yield df
+            progresso.avancar(str(alm))
+
+
+def estudar(
+    no, reamostragens: int = 0, semente=None, confianca: float = 0.90, sensibilidades: tuple = (),
+    causas: tuple = (), excluir_causas: tuple = (),
+):
+    """
+    Executa o estudo correspondente ao tipo do nó (Chave, Alimentador ou Subestacao).
+    Retorna None se não houver estudo para o tipo do nó.
+    """
+    estudos = {
+        "Chave": estudo_chave,
+        "Alimentador": estudo_alimentador,
+        "Subestacao": estudo_subestacao,
+    }
+    estudo = estudos.get(no.__class__.__name__)
+    if estudo is None:
+        return None
+    return estudo(no, reamostragens, semente, confianca, sensibilidades, causas, excluir_causas)
+
+
+def indicadores_agregados(
+    indice: IndiceEuler, posicoes: np.ndarray, agregados: pd.DataFrame, equipamentos: pd.MultiIndex,
+) -> tuple:
+    """
+    Dic, fic e ganhos da substituição por religador (dic - dic_pos_rl, fic - fic_pos_rl) das chaves nas posições da
+    ordem do índice, pelas somas mascaradas, com o filtro de causas ativo, de agregados por equipamento e causa
+    (src._database.agregar_ocorrencias). Como em Chave.indicadores_pos_rl, chaves RA e TS não têm ganho. Os nós que
+    não são chaves ficam com zero, para quem chama completar (_indicadores_nos, src._periodos.Periodos).
+    """
+    mascara = permitidas(agregados["CAUSA"].to_numpy(), filtro_atual())
+    fator = agregados["CAUSA"].map(fatores_mitigacao()).fillna(0.0).to_numpy()
+    grupos = agregados["GRUPO"].to_numpy()[mascara]
+    dic_grupo = agregados["DIC"].to_numpy(dtype=float)[mascara]
+    fic_grupo = agregados["QTDE UC EQPTO INTERROMPIDA"].to_numpy(dtype=float)[mascara]
+    somas = [
+        np.bincount(grupos, weights=pesos, minlength=len(equipamentos))
+        for pesos in (dic_grupo, fic_grupo, dic_grupo * fator[mascara], fic_grupo * fator[mascara])
+    ]
+
+    nos = [indice.ordem[i] for i in posicoes]
+    chaves = np.array([isinstance(no, Chave) for no in nos], dtype=bool)
+    resultado = [np.zeros(len(posicoes)) for _ in somas]
+    if chaves.any():
+        nos_chaves = [no for no in nos if isinstance(no, Chave)]
+        grupo = equipamentos.get_indexer(pd.MultiIndex.from_arrays([
+            [simo_to_code(no.sigla_simo) for no in nos_chaves], [no.codigo for no in nos_chaves],
+        ]))
+        tipos = indice.rdc()[1][posicoes[chaves]]
+        religadora = np.array([
+            (tipo_por_codigo(no.codigo) if tipo is SEM_TIPO else tipo) in ["RA", "TS"]
+            for no, tipo in zip(nos_chaves, tipos)
+        ], dtype=bool)
+        for k, soma in enumerate(somas):
+            valores = np.where(grupo >= 0, soma[grupo], 0.0)
+            if k >= 2:
+                valores[religadora] = 0.0
+            resultado[k][chaves] = valores
+    return tuple(resultado)
+
+
+def _indicadores_nos(indice: IndiceEuler, posicoes: np.ndarray) -> tuple:
+    """
+    indicadores_agregados dos nós nas posições com os agregados por causa das ocorrencias da base
+    (agregados_por_causa). Nós que não são chaves (ver intervalos_jusante) contribuem com o próprio dic e fic, sem ganho.
+    """
+    resultado = indicadores_agregados(indice, posicoes, *agregados_por_causa())
+    for k, posicao in enumerate(posicoes):
+        no = indice.ordem[posicao]
+        if not isinstance(no, Chave):
+            resultado[0][k] = getattr(no, "dic", 0.0)
+            resultado[1][k] = getattr(no, "fic", 0.0)
+    return resultado
+
+
+def _reducao(acumulado: np.ndarray, pos_rl: np.ndarray) -> list:
+    return [round(100 * (1 - depois / antes), 2) if antes else "NA" for antes, depois in zip(acumulado, pos_rl)]
+
+
+def _resolver_chaves(raiz, indice: IndiceEuler, nomes, expandir: bool = False) -> tuple:
+    """
+    Posições na ordem do índice das chaves com os nomes, na ordem da lista e sem repetições, pelo índice de nomes da
+    rede. Com expandir, um nó que não é chave (alimentador, SE, núcleo) representa todas as chaves da sua subárvore.
+    Retorna (posições, não encontradas): as entradas não resolvidas com o motivo e sugestões de nomes.
+    """
+    inicio, fim = raiz.entrada, indice.saida[raiz.entrada]
+    chaves = indice.chaves() if expandir else None
+    encontradas = []
+    nao_encontradas = []
+    for nome in dict.fromkeys(str(nome).strip().upper() for nome in nomes if str(nome).strip()):
+        posicao = indice.nomes.primeira(nome, inicio, fim)
+        if posicao < 0:
+            nao_encontradas.append((nome, "não encontrada na rede", ", ".join(raiz.sugestoes(nome))))
+        elif isinstance(indice.ordem[posicao], Chave):
+            encontradas.append(posicao)
+        elif expandir:
+            a, b = np.searchsorted(chaves, [posicao, indice.saida[posicao]])
+            encontradas.extend(chaves[a:b].tolist())
+        else:
+            nao_encontradas.append((nome, f"{indice.ordem[posicao].__class__.__name__}, não é uma chave", ""))
+    if expandir:  # uma chave listada e também contida em um nó listado aparece uma vez
+        encontradas = list(dict.fromkeys(encontradas))
+    encontradas = np.array(encontradas, dtype=np.int64)
+    return encontradas, pd.DataFrame(nao_encontradas, columns=["Entrada", "Motivo", "Sugestões"])
+
+
+def _tabela_lote(indice: IndiceEuler, encontradas: np.ndarray, indicadores, sensibilidades: tuple) -> pd.DataFrame:
+    """
+    Tabela de estudo_chave das chaves nas posições encontradas, em uma passagem: os intervalos a jusante de cada chave
+    são concatenados e as somas acumuladas, por sensibilidade, são somas agrupadas (np.bincount) pela chave de
+    origem. indicadores(posições) retorna o dic, fic e os ganhos dos nós nas posições (ver _indicadores_nos).
+    """
+    intervalos = [indice.intervalos_jusante(posicao) for posicao in encontradas]
+    tamanhos = [sum(b - a for a, b in intervalo) for intervalo in intervalos]
+    dono = np.repeat(np.arange(len(encontradas)), tamanhos)
+    jusante = np.concatenate([np.arange(a, b) for intervalo in intervalos for a, b in intervalo] or [[]]).astype(np.int64)
+    unicas, inversa = np.unique(jusante, return_inverse=True)
+    dic, fic, ganho_dic, ganho_fic = (valores[inversa] for valores in indicadores(unicas))
+    distancia = indice.nivel[jusante] - indice.nivel[encontradas][dono]
+
+    n = len(encontradas)
+    dic_acumulado = np.bincount(dono, weights=dic, minlength=n)
+    fic_acumulado = np.bincount(dono, weights=fic, minlength=n)
+    dic_pos_rl = {}
+    fic_pos_rl = {}
+    for sensibilidade in sorted({SENSIBILIDADE, *sensibilidades}):
+        alcance = distancia < sensibilidade
+        dic_pos_rl[sensibilidade] = dic_acumulado - np.bincount(dono, weights=ganho_dic * alcance, minlength=n)
+        fic_pos_rl[sensibilidade] = fic_acumulado - np.bincount(dono, weights=ganho_fic * alcance, minlength=n)
+    # A própria chave é o primeiro nó dos seus intervalos a jusante.
+    propria = np.concatenate([[0], np.cumsum(tamanhos)[:-1]]).astype(np.int64) if n else np.zeros(0, dtype=np.int64)
+
+    chaves = [indice.ordem[posicao] for posicao in encontradas]
+    df = pd.DataFrame({
+        "Núcleo / Unidade": [str(chave.get_nucleo()) for chave in chaves],
+        "Subestação": [str(chave.get_subestacao()) for chave in chaves],
+        "Alimentador": [str(chave.get_alimentador()) for chave in chaves],
+        "Chave": [str(chave) for chave in chaves],
+        "Unidade Consumidoras": indice.rdc()[0][encontradas],
+        "DIC Chave [h*ucs]": dic[propria],
+        "DIC Acumulado [h * ucs]": dic_acumulado,
+        "DIC Estimado após substituição [h * ucs]": dic[propria] - ganho_dic[propria],
+        "DIC Acumulado estimado pós substituição [h * ucs]": dic_pos_rl[SENSIBILIDADE],
+        "Redução DIC Acumulado estimada [%]": _reducao(dic_acumulado, dic_pos_rl[SENSIBILIDADE]),
+        "FIC Chave [ucs]": fic[propria],
+        "FIC Acumulado [ucs]": fic_acumulado,
+        "FIC Estimado após substituição [ucs]": fic[propria] - ganho_fic[propria],
+        "FIC Acumulado estimado pós substituição [ucs]": fic_pos_rl[SENSIBILIDADE],
+        "Redução FIC Acumulado estimada [%]": _reducao(fic_acumulado, fic_pos_rl[SENSIBILIDADE]),
+    })
+    for sensibilidade in sensibilidades:
+        df[f"DIC Acumulado estimado pós substituição, sensibilidade {sensibilidade} [h * ucs]"] = dic_pos_rl[sensibilidade]
+        df[f"Redução DIC Acumulado estimada, sensibilidade {sensibilidade} [%]"] = _reducao(
+            dic_acumulado, dic_pos_rl[sensibilidade]
+        )
+    return df
+
+
+@com_filtro_causas
+def estudo_lote(
+    raiz, nomes, sensibilidades: tuple = (), causas: tuple = (), excluir_causas: tuple = (),
+) -> tuple:
+    """
+    Estudo de ganho da substituição por religador de uma lista de chaves (ex.: lida de um arquivo), com as colunas de
+    estudo_chave. Os nomes são resolvidos pelo índice de nomes da rede e todas as chaves são calculadas em uma
+    passagem (_tabela_lote).
+    Retorna (estudo, não encontradas): uma linha por chave encontrada, na ordem da lista e sem repetições, e as
+    entradas não resolvidas com o motivo e sugestões de nomes.
+    """
+    indice = raiz.euler if getattr(raiz, "euler", None) is not None and raiz.euler.valido else IndiceEuler(raiz)
+    encontradas, nao_encontradas = _resolver_chaves(raiz, indice, nomes)
+    df = _tabela_lote(indice, encontradas, lambda posicoes: _indicadores_nos(indice, posicoes), sensibilidades)
+    return df, nao_encontradas
+
+
+def _variacao(df: pd.DataFrame, referencia: pd.DataFrame) -> pd.DataFrame:
+    """
+    Diferença entre duas tabelas de _tabela_lote das mesmas chaves: as somas viram variações e as reduções [%],
+    variações em pontos percentuais.
+    """
+    variacao = df.iloc[:, :5].copy()
+    for coluna in df.columns[5:]:
+        atual = pd.to_numeric(df[coluna], errors="coerce")
+        anterior = pd.to_numeric(referencia[coluna], errors="coerce")
+        if coluna.endswith(" [%]"):
+            variacao[f"Variação {coluna[:-4]} [p.p.]"] = (atual - anterior).round(2)
+        else:
+            variacao[f"Variação {coluna}"] = atual - anterior
+    return variacao
+
+
+@com_filtro_causas
+def estudo_periodo(
+    periodos, nomes, periodo: str, referencia: str | None = None, sensibilidades: tuple = (),
+    causas: tuple = (), excluir_causas: tuple = (),
+) -> tuple:
+    """
+    Estudo por chave, com as colunas de estudo_lote, das ocorrências de um período carregado em periodos
+    (src._periodos.Periodos), sem recriar a rede. Alimentadores, SEs e núcleos listados trazem todas as suas chaves.
+    Com referencia, retorna a variação do período em relação ao período de referência (_variacao).
+    Retorna (estudo, não encontradas) como estudo_lote.
+    """
+    encontradas, nao_encontradas = _resolver_chaves(periodos.raiz, periodos.indice, nomes, expandir=True)
+
+    def tabela(nome: str) -> pd.DataFrame:
+        valores = periodos.indicadores(nome)
+        return _tabela_lote(periodos.indice, encontradas, lambda posicoes: tuple(valores[:, posicoes]), sensibilidades)
+
+    df = tabela(periodo)
+    if referencia is not None:
+        df = _variacao(df, tabela(referencia))
+    return df, nao_encontradas
@@ -0,0 +1,202 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from src._rhc import normalizar_rhc, tipos_no, SEM_PAI
+from src._referencias import NUCLEO_POR_SE, CODIGO_POR_SIMO, REGIONAIS
+from src._cubo import construir_cubo, COMPRESSAO as COMPRESSAO_CUBO
+from src._arquivos import escrita_atomica
+
+# Base particionada por núcleo, para analistas que estudam apenas a sua região. Com DEC_PARTICOES=1, src._database
+# não carrega o RHC, o RDC e o 1025 inteiros: a base é dividida uma única vez (e de novo quando os arquivos da base
+# mudam) em um arquivo por núcleo em base/NUCLEOS, e a rede recebe cada núcleo no primeiro pedido de um nó dele
+# (src._dataclasses.carregar_nucleos). As SEs do RHC vão para o núcleo de SUBESTACOES, as linhas do RDC e do 1025 para
+# os núcleos em que a chave aparece na rede, e as linhas sem chave na rede para o núcleo da regional (REGIONAIS).
+# As linhas guardam a posição na base inteira, de modo que os núcleos carregados reproduzem a ordem da base e os
+# estudos dos seus nós são os mesmos da base inteira.
+ATIVO = os.environ.get("DEC_PARTICOES") == "1"
+PASTA = "base/NUCLEOS"
+INDICE = "INDICE"
+FONTES = ["base/RHC", "base/RDC", "base/OCORRENCIAS"]
+SEM_NUCLEO = "SEM NUCLEO"  # SEs fora de SUBESTACOES, ligadas diretamente à empresa por CriarRede
+COMPRESSAO = {'method': "gzip", 'compresslevel': 1, 'mtime': 1}
+
+
+def _assinatura(arquivos: list) -> dict:
+    return {arquivo: (os.stat(arquivo).st_mtime_ns, os.stat(arquivo).st_size) for arquivo in arquivos if os.path.exists(arquivo)}
+
+
+def _ler(arquivo: str) -> pd.DataFrame:
+    return pd.read_pickle(arquivo, compression=COMPRESSAO)
+
+
+def _cubo_atual() -> bool:
+    return os.path.exists("base/CUBO") and os.path.getmtime("base/CUBO") >= os.path.getmtime("base/OCORRENCIAS")
+
+
+def _nucleo_da_regional(regionais) -> np.ndarray:
+    nucleos = REGIONAIS["Núcleo"]
+    return np.array([nucleos.get(regional, SEM_NUCLEO) for regional in regionais], dtype=object)
+
+
+def _por_chave(chaves: pd.DataFrame, nomes: pd.Series, reserva: np.ndarray, particoes: set) -> pd.DataFrame:
+    """
+    Partições de cada linha (POSICAO) pelo nome da chave: as partições em que a chave aparece no RHC, ou a partição
+    reserva (núcleo da regional) das chaves fora da rede.
+    """
+    linhas = pd.DataFrame({"NOME": nomes.to_numpy(), "POSICAO": np.arange(len(nomes))})
+    cruzadas = linhas.merge(chaves, on="NOME", how="inner")[["POSICAO", "PARTICAO"]]
+    fora = np.setdiff1d(linhas["POSICAO"].to_numpy(), cruzadas["POSICAO"].to_numpy())
+    reserva = np.where(np.isin(reserva[fora], list(particoes)), reserva[fora], SEM_NUCLEO)
+    return pd.concat([cruzadas, pd.DataFrame({"POSICAO": fora, "PARTICAO": reserva})], ignore_index=True)
+
+
+def particionar(pasta: str = PASTA) -> dict:
+    """
+    Divide o RHC, o RDC e o 1025 da base em um arquivo por núcleo em pasta e grava o índice das partições (INDICE):
+    assinatura dos arquivos da base, nós (SEs, alimentadores e SEDs) e siglas SIMO de cada partição, e as tabelas
+    vazias com as colunas e tipos da base. Também atualiza base/CUBO, que continua inteiro (agregados do estado).
+    """
+    rhc = normalizar_rhc(_ler("base/RHC"))
+    rdc = _ler("base/RDC").reset_index(drop=True)
+    ocorrencias = _ler("base/OCORRENCIAS").reset_index(drop=True)
+
+    # Partição de cada linha do RHC: o núcleo da SE no topo da sua subárvore.
+    pai = rhc["PAI"].to_numpy()
+    rotulos = rhc["ROTULO"].astype(str).str.split(" ").str[0].to_numpy(dtype=object)
+    tipos = tipos_no(rhc)
+    topo = np.maximum.accumulate(np.where(pai == SEM_PAI, np.arange(len(rhc)), 0)) if len(rhc) else np.zeros(0, int)
+    nucleo_topo = np.array([NUCLEO_POR_SE.get(rotulo, SEM_NUCLEO) for rotulo in rotulos], dtype=object)
+    particao = nucleo_topo[topo]
+    particoes = sorted(set(particao))
+
+    e_chave = tipos == "Chave"
+    nomes_chaves = pd.Series(rhc["ROTULO"].astype(str).to_numpy()[e_chave]).str.split().str[0]
+    chaves = pd.DataFrame({"NOME": nomes_chaves.to_numpy(), "PARTICAO": particao[e_chave]}).drop_duplicates()
+    siglas = nomes_chaves.str.split("_").str[0]
+    chaves_1025 = pd.DataFrame({
+        "REGIONAL": siglas.map(CODIGO_POR_SIMO).to_numpy(),
+        "EQPTO.RESPONSAVEL": pd.to_numeric(nomes_chaves.str.split("_").str[1], errors="coerce").to_numpy(),
+        "PARTICAO": particao[e_chave],
+    }).dropna().drop_duplicates()
+    chaves_1025["NOME"] = list(zip(chaves_1025["REGIONAL"].astype(np.int64), chaves_1025["EQPTO.RESPONSAVEL"].astype(np.int64)))
+
+    linhas_rdc = _por_chave(
+        chaves, rdc["Chave"].astype(str),
+        _nucleo_da_regional(rdc["Chave"].astype(str).str.split("_").str[0].map(CODIGO_POR_SIMO)), set(particoes),
+    )
+    linhas_1025 = _por_chave(
+        chaves_1025[["NOME", "PARTICAO"]],
+        pd.Series(list(zip(ocorrencias["REGIONAL"].astype(np.int64), ocorrencias["EQPTO.RESPONSAVEL"].astype(np.int64)))),
+        _nucleo_da_regional(ocorrencias["REGIONAL"]), set(particoes),
+    )
+    particoes = sorted(set(particoes) | set(linhas_rdc["PARTICAO"]) | set(linhas_1025["PARTICAO"]))
+
+    os.makedirs(pasta, exist_ok=True)
+    posicoes_rdc = {nome: np.sort(grupo.to_numpy()) for nome, grupo in linhas_rdc.groupby("PARTICAO")["POSICAO"]}
+    posicoes_1025 = {nome: np.sort(grupo.to_numpy()) for nome, grupo in linhas_1025.groupby("PARTICAO")["POSICAO"]}
+    vazio = np.zeros(0, dtype=np.int64)
+    for nome in particoes:
+        linhas = np.flatnonzero(particao == nome)
+        parte = rhc.iloc[linhas].copy()
+        # Pais dentro da partição: a subárvore de cada SE é contínua no RHC.
+        parte["PAI"] = np.where(
+            parte["PAI"].to_numpy() == SEM_PAI, SEM_PAI, np.searchsorted(linhas, parte["PAI"].to_numpy())
+        ).astype(rhc["PAI"].dtype)
+        parte["ROTULO"] = parte["ROTULO"].cat.remove_unused_categories()
+        dados = {
+            "RHC": parte,
+            "RDC": rdc.iloc[posicoes_rdc.get(nome, vazio)],
+            "OCORRENCIAS": ocorrencias.iloc[posicoes_1025.get(nome, vazio)],
+        }
+        with escrita_atomica(os.path.join(pasta, nome)) as temporario:
+            pd.to_pickle(dados, temporario, compression=COMPRESSAO)
+
+    nos = {}
+    for nome, tipo, particao_no in zip(rotulos, tipos, particao):
+        if tipo != "Chave":
+            nos.setdefault(nome, set()).add(particao_no)
+    por_sigla = {}
+    for sigla, particao_chave in zip(siglas.to_numpy()[chaves.index], chaves["PARTICAO"]):
+        por_sigla.setdefault(sigla, set()).add(particao_chave)
+    indice = {
+        "fontes": _assinatura(FONTES),
+        "particoes": particoes,
+        "nos": nos,
+        "siglas": por_sigla,
+        "periodo": (
+            f'{ocorrencias["DATA INICIO"].min()} - {ocorrencias["DATA FIM"].max()}' if len(ocorrencias) else ""
+        ),
+        "vazias": {"RHC": rhc.iloc[:0], "RDC": rdc.iloc[:0], "OCORRENCIAS": ocorrencias.iloc[:0]},
+    }
+    with escrita_atomica(os.path.join(pasta, INDICE)) as temporario, open(temporario, "wb") as arquivo:
+        pickle.dump(indice, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    if not _cubo_atual():
+        with escrita_atomica("base/CUBO") as temporario:
+            construir_cubo(ocorrencias).to_pickle(temporario, compression=COMPRESSAO_CUBO)
+    return indice
+
+
+def preparar(pasta: str = PASTA) -> dict:
+    """
+    Índice das partições, particionando a base de novo se ela mudou desde a última divisão. Também refaz a divisão
+    sem base/CUBO atualizado, que src._database não conseguiria montar com o 1025 vazio.
+    """
+    caminho = os.path.join(pasta, INDICE)
+    if os.path.exists(caminho):
+        with open(caminho, "rb") as arquivo:
+            indice = pickle.load(arquivo)
+        if indice["fontes"] == _assinatura(FONTES) and _cubo_atual():
+            return indice
+    return particionar(pasta)
+
+
+def ler_particoes(nomes: list, pasta: str = PASTA) -> tuple:
+    """
+    RHC, RDC e 1025 das partições, com os pais do RHC deslocados para a tabela concatenada. RDC e 1025 ficam na
+    ordem da base, sem repetir as linhas de chaves presentes em mais de uma partição.
+    """
+    partes = [pd.read_pickle(os.path.join(pasta, nome), compression=COMPRESSAO) for nome in nomes]
+    rhcs = []
+    deslocamento = 0
+    for parte in partes:
+        rhc = parte["RHC"].copy()
+        rhc["PAI"] = np.where(rhc["PAI"] == SEM_PAI, SEM_PAI, rhc["PAI"] + deslocamento).astype(rhc["PAI"].dtype)
+        deslocamento += len(rhc)
+        rhcs.append(rhc)
+    rhc = pd.concat(rhcs) if rhcs else pd.DataFrame()
+    if len(rhcs) > 1:
+        rhc["ROTULO"] = pd.Categorical(rhc["ROTULO"].astype(str))
+
+    def juntar(tabela: str) -> pd.DataFrame:
+        df = pd.concat([parte[tabela] for parte in partes])
+        return df[~df.index.duplicated()].sort_index()
+    return rhc, juntar("RDC"), juntar("OCORRENCIAS")
+
+
+def juntar_base(atual: pd.DataFrame, nova: pd.DataFrame) -> pd.DataFrame:
+    """
+    Acrescenta as linhas de partições recém-carregadas às já carregadas, na ordem da base e sem repetições.
+    """
+    df = pd.concat([atual, nova])
+    return df[~df.index.duplicated()].sort_index()
+
+
+def particoes_de(entrada: str, indice: dict) -> list:
+    """
+    Partições necessárias para encontrar o nó da entrada: o próprio núcleo, o núcleo de uma SE, alimentador ou SED,
+    os núcleos com chaves da sigla SIMO de uma chave, ou todas para a empresa (CELESC).
+    """
+    nome = str(entrada).strip().upper()
+    if nome in indice["particoes"]:
+        return [nome]
+    if nome == "CELESC":
+        return list(indice["particoes"])
+    if nome in indice["nos"]:
+        return sorted(indice["nos"][nome])
+    sigla = nome.split("_")[0]
+    if "_" in nome and sigla in indice["siglas"]:
+        return sorted(indice["siglas"][sigla])
+    if nome in NUCLEO_POR_SE:
+        return [NUCLEO_POR_SE[nome]]
+    return []
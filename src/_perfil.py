@@ -0,0 +1,151 @@
+import os
+import re
+import sys
+import time
+import cProfile
+from functools import wraps
+from contextlib import contextmanager, nullcontext
+
+# Instrumentação de tempo das etapas de importação e estudos.
+# Ativada pela variável de ambiente DEC_PERFIL (DEC_PERFIL=cprofile também salva o cProfile)
+# ou pelos argumentos --perfil / --cprofile. Desativada, cada etapa custa apenas uma checagem de flag.
+ATIVO = bool(os.environ.get("DEC_PERFIL")) or any(arg in sys.argv for arg in ("--perfil", "--profile", "--cprofile"))
+CPROFILE = os.environ.get("DEC_PERFIL") == "cprofile" or "--cprofile" in sys.argv
+PASTA = os.environ.get("DEC_PERFIL_PASTA", "perfil")
+
+_NULO = nullcontext()
+_tempos = {}  # etapa -> [chamadas, tempo total]
+_contadores = {}
+_pilhas = {}  # "etapa;sub-etapa" -> tempo próprio, no formato de pilhas colapsadas (flame graph)
+_pilha = []
+
+
+class _Etapa:
+    """
+    Cronômetro de uma etapa. Etapas aninhadas formam a pilha usada no flame graph.
+    """
+    __slots__ = ("nome", "inicio", "filhos")
+
+    def __init__(self, nome: str):
+        self.nome = nome
+
+    def __enter__(self):
+        self.filhos = 0.0
+        _pilha.append(self)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duracao = time.perf_counter() - self.inicio
+        caminho = ";".join(etapa.nome for etapa in _pilha)
+        _pilha.pop()
+        registro = _tempos.setdefault(self.nome, [0, 0.0])
+        registro[0] += 1
+        registro[1] += duracao
+        _pilhas[caminho] = _pilhas.get(caminho, 0.0) + duracao - self.filhos
+        if _pilha:
+            _pilha[-1].filhos += duracao
+        return False
+
+
+def ativar(cprofile: bool = False):
+    global ATIVO, CPROFILE
+    ATIVO = True
+    CPROFILE = CPROFILE or cprofile
+
+
+def reiniciar():
+    """
+    Descarta as medições acumuladas.
+    """
+    _tempos.clear()
+    _contadores.clear()
+    _pilhas.clear()
+
+
+def etapa(nome: str):
+    """
+    Contexto que cronometra uma etapa: with etapa("nome"): ...
+    """
+    if not ATIVO:
+        return _NULO
+    return _Etapa(nome)
+
+
+def cronometrado(nome: str | None = None):
+    """
+    Decorador que cronometra cada chamada da função como uma etapa.
+    """
+    def decorador(funcao):
+        rotulo = nome or funcao.__qualname__
+
+        @wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            if not ATIVO:
+                return funcao(*args, **kwargs)
+            with _Etapa(rotulo):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def contar(nome: str, quantidade: int = 1):
+    """
+    Incrementa um contador.
+    """
+    if ATIVO:
+        _contadores[nome] = _contadores.get(nome, 0) + quantidade
+
+
+def imprimir_resumo(titulo: str):
+    """
+    Imprime a tabela de tempos por etapa e os contadores.
+    """
+    if not ATIVO or not (_tempos or _contadores):
+        return
+    total = max((tempo for _, tempo in _tempos.values()), default=0.0) or 1.0
+    print(f"\nPerfil - {titulo}")
+    print(f"{'Etapa':<44}{'Chamadas':>10}{'Total [s]':>12}{'Média [ms]':>12}{'%':>8}")
+    for nome, (chamadas, tempo) in sorted(_tempos.items(), key=lambda item: -item[1][1]):
+        print(f"{nome:<44}{chamadas:>10}{tempo:>12.3f}{1000 * tempo / chamadas:>12.3f}{100 * tempo / total:>8.1f}")
+    for nome, quantidade in _contadores.items():
+        print(f"{nome:<44}{quantidade:>10}")
+    print()
+
+
+def salvar_pilhas(caminho: str):
+    """
+    Salva os tempos próprios de cada pilha de etapas em microssegundos, no formato de pilhas colapsadas
+    aceito por flamegraph.pl e speedscope.
+    """
+    with open(caminho, "w") as arquivo:
+        for pilha, tempo in _pilhas.items():
+            arquivo.write(f"{pilha} {round(tempo * 1e6)}\n")
+
+
+@contextmanager
+def estudo(nome: str):
+    """
+    Agrupa as medições de um estudo. Ao final imprime o resumo e salva as pilhas de etapas
+    (e o cProfile, se ativo) na pasta de perfil.
+    """
+    if not ATIVO:
+        yield
+        return
+    reiniciar()
+    perfilador = cProfile.Profile() if CPROFILE else None
+    if perfilador:
+        perfilador.enable()
+    try:
+        with _Etapa(nome):
+            yield
+    finally:
+        if perfilador:
+            perfilador.disable()
+        imprimir_resumo(nome)
+        os.makedirs(PASTA, exist_ok=True)
+        arquivo = os.path.join(PASTA, re.sub(r"[^\w.-]+", "_", nome))
+        salvar_pilhas(arquivo + ".folded")
+        if perfilador:
+            perfilador.dump_stats(arquivo + ".prof")
+        print(f"Perfil salvo em {arquivo}.*")
@@ -0,0 +1,173 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from src._dataclasses import Alimentador, IndiceEuler
+from src._database import agregados_por_causa, agregados_por_mes, agregar_ocorrencias, ler_ocorrencias
+from src._estudos import indicadores_agregados
+from src._causas import filtro_atual
+
+# Vários períodos de ocorrências (ex.: 2021 e 2022, ou duas janelas do 1025) sobre a mesma rede, criada uma única vez.
+# Cada período guarda apenas os agregados do seu 1025 por equipamento responsável e causa (agregar_ocorrencias), e os
+# estudos de um período usam os arrays por nó da ordem do índice de pré-ordem (dic, fic e ganhos da substituição por
+# religador), calculados no primeiro uso de cada período e filtro de causas. Os estudos (src._estudos.estudo_periodo)
+# rodam sobre qualquer período, ou a variação entre dois períodos, sem recriar a rede.
+JANELA = re.compile(r"^(\d{4})(\d{2})?(?:-(\d{4})(\d{2})?)?$")
+
+
+class Periodo:
+    """
+    Ocorrências de um período agregadas por equipamento responsável e causa: agregados e equipamentos como em
+    src._database.agregar_ocorrencias.
+    """
+
+    def __init__(self, nome: str, agregados: pd.DataFrame, equipamentos: pd.MultiIndex):
+        self.nome = nome
+        self.agregados = agregados
+        self.equipamentos = equipamentos
+
+    def __repr__(self) -> str:
+        return f"Periodo({self.nome!r}, {len(self.equipamentos)} equipamentos)"
+
+
+def periodo_da_base(nome: str = "base") -> Periodo:
+    """
+    Período das ocorrências carregadas da base (base/OCORRENCIAS), sem cópia dos agregados.
+    """
+    return Periodo(nome, *agregados_por_causa())
+
+
+def periodo_de_janela(inicio: int, fim: int, nome: str | None = None) -> Periodo:
+    """
+    Período dos meses de inicio a fim (inteiros AAAAMM, inclusive) das ocorrências da base.
+    """
+    agregados, _ = agregados_por_mes()
+    janela = agregados[(agregados["MES"] >= inicio) & (agregados["MES"] <= fim)]
+    return Periodo(nome or f"{inicio}-{fim}", *agregar_ocorrencias(janela))
+
+
+def periodo_de_arquivos(arquivos, nome: str | None = None) -> Periodo:
+    """
+    Período das ocorrências de outros relatórios 1025: csvs exportados do SIMO ou arquivos no formato de
+    base/OCORRENCIAS (ex.: cópia da base de outro ano).
+    """
+    arquivos = [arquivos] if isinstance(arquivos, str) else list(arquivos)
+    csvs = [arquivo for arquivo in arquivos if arquivo.lower().endswith(".csv")]
+    partes = [ler_ocorrencias(csvs)] if csvs else []
+    partes += [
+        pd.read_pickle(arquivo, compression={'method': "gzip", 'compresslevel': 1, 'mtime': 1})
+        for arquivo in arquivos if arquivo not in csvs
+    ]
+    ocorrencias = pd.concat(partes, ignore_index=True)
+    return Periodo(nome or os.path.splitext(os.path.basename(arquivos[0]))[0], *agregar_ocorrencias(ocorrencias))
+
+
+def ler_periodo(fonte: str) -> Periodo:
+    """
+    Período a partir de uma janela de meses das ocorrências da base (AAAA, AAAAMM-AAAAMM ou AAAA-AAAA) ou de um
+    arquivo de ocorrências (ver periodo_de_arquivos).
+    """
+    janela = JANELA.match(fonte.strip())
+    if janela is None or os.path.exists(fonte):
+        if not os.path.exists(fonte):
+            raise ValueError(f'Período "{fonte}" inválido: use AAAA, AAAAMM-AAAAMM ou um arquivo de ocorrências.')
+        return periodo_de_arquivos(fonte)
+    ano_inicio, mes_inicio, ano_fim, mes_fim = janela.groups()
+    inicio = int(ano_inicio + (mes_inicio or "01"))
+    fim = int(ano_inicio + (mes_inicio or "12")) if ano_fim is None else int(ano_fim + (mes_fim or "12"))
+    if inicio > fim:
+        raise ValueError(f'Período "{fonte}" inválido: início depois do fim.')
+    return periodo_de_janela(inicio, fim, fonte.strip())
+
+
+class Periodos:
+    """
+    Períodos de ocorrências sobre a topologia de uma rede criada por CriarRede. A rede e o índice de pré-ordem são
+    compartilhados; cada período acrescenta os seus agregados e, por filtro de causas usado, quatro arrays por nó.
+    """
+
+    def __init__(self, raiz):
+        self.raiz = raiz
+        self.periodos = {}
+        self._indexar()
+
+    def _indexar(self):
+        indice = getattr(self.raiz, "euler", None)
+        self._indice = indice if indice is not None and indice.valido else IndiceEuler(self.raiz)
+        self._indicadores = {}
+        self._chaves = self.indice.chaves()
+        self._e_chave = np.zeros(len(self.indice.ordem), dtype=bool)
+        self._e_chave[self._chaves] = True
+
+    @property
+    def indice(self) -> IndiceEuler:
+        """
+        Índice de pré-ordem da rede, refeito quando a rede muda (ex.: núcleos carregados da base particionada).
+        """
+        if not self._indice.valido:
+            self._indexar()
+        return self._indice
+
+    def __contains__(self, nome: str) -> bool:
+        return nome in self.periodos
+
+    def __iter__(self):
+        return iter(self.periodos)
+
+    def __len__(self) -> int:
+        return len(self.periodos)
+
+    def adicionar(self, periodo: Periodo) -> Periodo:
+        """
+        Acrescenta o período, ou substitui o período de mesmo nome.
+        """
+        self.remover(periodo.nome)
+        self.periodos[periodo.nome] = periodo
+        return periodo
+
+    def remover(self, nome: str):
+        self.periodos.pop(nome, None)
+        for chave in [chave for chave in self._indicadores if chave[0] == nome]:
+            del self._indicadores[chave]
+
+    def indicadores(self, nome: str) -> np.ndarray:
+        """
+        Dic, fic e ganhos da substituição por religador (linhas 0 a 3) de cada nó da ordem do índice no período, com
+        o filtro de causas ativo, pelas mesmas somas de src._estudos._indicadores_nos (indicadores_agregados): chaves
+        RA e TS não têm ganho, e os nós que não são chaves têm o dic da propriedade dic (soma dos acumulados dos filhos
+        do alimentador) e fic zero.
+        """
+        indice = self.indice  # refeito, com os arrays, se a rede mudou
+        if nome not in self.periodos:
+            raise KeyError(f'Período "{nome}" não carregado. Períodos: {", ".join(self.periodos) or "nenhum"}.')
+        chave = (nome, filtro_atual())
+        if chave not in self._indicadores:
+            periodo = self.periodos[nome]
+            valores = np.zeros((4, len(indice.ordem)))
+            valores[:, self._chaves] = indicadores_agregados(
+                indice, self._chaves, periodo.agregados, periodo.equipamentos
+            )
+            self._dic_nao_chaves(valores[0])
+            self._indicadores[chave] = valores
+        return self._indicadores[chave]
+
+    def _dic_nao_chaves(self, dic: np.ndarray):
+        """
+        Completa o dic das SEs e alimentadores (zero no array das chaves), do fim para o início da ordem, para que os
+        nós internos já estejam calculados: como em IndiceEuler.somar_jusante, o alimentador soma o dic a jusante dos
+        filhos, e a SE o dic dos seus filhos.
+        """
+        indice = self.indice
+        prefixo = np.concatenate([[0.0], np.cumsum(dic)])
+        for posicao in indice.bloqueios[::-1]:
+            no = indice.ordem[posicao]
+            total = 0.0
+            for filho in no.children:
+                if not isinstance(no, Alimentador):
+                    total += dic[filho.entrada]
+                    continue
+                for a, b in indice.intervalos_jusante(filho.entrada):
+                    total += prefixo[b] - prefixo[a]
+                    if b - a == 1 and not self._e_chave[a]:
+                        total += dic[a]
+            dic[posicao] = total
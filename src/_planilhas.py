@@ -0,0 +1,166 @@
+import os
+import pickle
+import hashlib
+import warnings
+import pandas as pd
+from src._arquivos import escrita_atomica
+
+# Planilhas de referência (base/Excel_files) compiladas para a base: a tabela de causas (fatores de mitigação), os
+# códigos das SEs e as regionais. As planilhas são a fonte dos dados; a compilação lê cada planilha alterada uma única
+# vez (openpyxl) e grava as tabelas tipadas que o programa carrega: base/CAUSAS e base/CODIGOS_SE, lidas por
+# src._database, e base/REFERENCIAS, com as regionais, as SEs por núcleo (quando a planilha das SEs tem a coluna
+# NÚCLEO) e a assinatura de cada planilha (data de modificação, tamanho e hash do conteúdo). Na importação, só as
+# planilhas com assinatura diferente são lidas de novo; sem planilhas (ex.: base sintética do benchmark) ou sem
+# openpyxl, valem as tabelas já compiladas e as cópias de src._constants.
+PASTA = "base/Excel_files"
+ARQUIVO = "base/REFERENCIAS"
+COMPRESSAO = {'method': "gzip", 'compresslevel': 1, 'mtime': 1}
+
+# Tabela -> (planilha, arquivo da base gravado com a tabela, ou None para as tabelas guardadas em ARQUIVO).
+PLANILHAS = {
+    "CAUSAS": ("CAUSAS.xlsx", "base/CAUSAS"),
+    "CODIGOS_SE": ("CÓDIGOS SES.xlsx", "base/CODIGOS_SE"),
+    "REGIONAIS": ("regionais.xlsx", None),
+}
+
+# Colunas da planilha de regionais -> tabelas de REGIONAIS (src._constants), indexadas pelo código da regional no 1025.
+COLUNAS_REGIONAIS = {
+    "Agencia": "Agência",
+    "Sigla Agencia": "Sigla",
+    "Núcleo": "Núcleo",
+    "Siglas SIMO": "Siglas SIMO",
+    "Cidade": "Cidade",
+}
+
+
+def _texto(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colunas de texto como object, o tipo das tabelas da base (o pandas lê o texto do Excel como StringDtype).
+    """
+    for coluna in df.columns:
+        if pd.api.types.is_string_dtype(df[coluna]):
+            df[coluna] = df[coluna].astype(object)
+    return df
+
+
+def ler_causas(caminho: str) -> pd.DataFrame:
+    causas = _texto(pd.read_excel(caminho))
+    causas = causas.rename(columns={"MULTIPLICADOR MITIGACAO POR RA": "MITIGACAO POR RA"})
+    causas["CODIGO"] = causas["CODIGO"].astype("int64")
+    for coluna in ["MITIGACAO POR RA", "MITIGACAO TA MESMA SE", "MITIGACAO TA SE DIFERENTE"]:
+        causas[coluna] = causas[coluna].astype(float)
+    return causas
+
+
+def ler_codigos_se(caminho: str) -> tuple:
+    """
+    Tabela das SEs (CODIGOS_SE) e, se a planilha tiver a coluna NÚCLEO, as siglas das SEs por núcleo
+    no formato de SUBESTACOES (a coluna não faz parte da tabela da base).
+    """
+    ses = _texto(pd.read_excel(caminho))
+    ses["CÓD._SE"] = ses["CÓD._SE"].astype("int64")
+    coluna_nucleo = next((coluna for coluna in ses.columns if str(coluna).upper() in ("NÚCLEO", "NUCLEO")), None)
+    if coluna_nucleo is None:
+        return ses, None
+    subestacoes = {}
+    for nucleo, sigla in zip(ses[coluna_nucleo], ses["SIGLA_SE"]):
+        if pd.notna(nucleo):
+            siglas = subestacoes.setdefault(str(nucleo).strip(), {})
+            siglas[len(siglas)] = sigla
+    return ses.drop(columns=coluna_nucleo), subestacoes
+
+
+def ler_regionais(caminho: str) -> dict:
+    """
+    REGIONAIS no formato de src._constants: {coluna: {código da regional: valor}}, com o código da regional (coluna
+    REGIONAL do 1025) igual à agência dividida por 100.
+    """
+    regionais = _texto(pd.read_excel(caminho))
+    codigos = [int(agencia) // 100 for agencia in regionais["Agencia"]]
+    return {
+        tabela: {codigo: (int(valor) if tabela == "Agência" else valor) for codigo, valor in zip(codigos, regionais[coluna])}
+        for coluna, tabela in COLUNAS_REGIONAIS.items()
+    }
+
+
+def _assinatura(caminho: str) -> tuple:
+    estado = os.stat(caminho)
+    return estado.st_mtime_ns, estado.st_size
+
+
+def _hash(caminho: str) -> str:
+    hash_arquivo = hashlib.blake2b(digest_size=16)
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b""):
+            hash_arquivo.update(bloco)
+    return hash_arquivo.hexdigest()
+
+
+def _ler_compiladas(arquivo: str) -> dict:
+    if not os.path.exists(arquivo):
+        return {"fontes": {}}
+    try:
+        with open(arquivo, "rb") as conteudo:
+            return pickle.load(conteudo)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return {"fontes": {}}
+
+
+def _gravar_tabela(df: pd.DataFrame, destino: str):
+    """
+    Grava a tabela na base apenas se ela mudou, para não alterar a versão da base (e o cache de estudos) à toa.
+    """
+    if os.path.exists(destino):
+        try:
+            if pd.read_pickle(destino, compression=COMPRESSAO).equals(df):
+                return
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+    with escrita_atomica(destino) as temporario:
+        df.to_pickle(temporario, compression=COMPRESSAO)
+
+
+def compilar_referencias(pasta: str = PASTA, arquivo: str = ARQUIVO, forcar: bool = False) -> dict:
+    """
+    Compila as planilhas de referência alteradas desde a última compilação (ou todas, com forcar) e retorna
+    {"fontes": assinaturas, "REGIONAIS": ..., "SUBESTACOES": ...} com as tabelas compiladas disponíveis.
+    Sem alterações, custa um os.stat por planilha e a leitura de base/REFERENCIAS.
+    """
+    compiladas = _ler_compiladas(arquivo)
+    fontes = compiladas["fontes"]
+    alterado = False
+    for tabela, (nome, destino) in PLANILHAS.items():
+        caminho = os.path.join(pasta, nome)
+        if not os.path.exists(caminho):
+            continue
+        assinatura = _assinatura(caminho)
+        anterior = fontes.get(tabela)
+        if not forcar and anterior is not None and anterior["assinatura"] == assinatura:
+            continue
+        hash_planilha = _hash(caminho)
+        if not forcar and anterior is not None and anterior["hash"] == hash_planilha:
+            # Mesmo conteúdo com outra data (ex.: cópia da pasta): atualiza apenas a assinatura.
+            fontes[tabela] = {"assinatura": assinatura, "hash": hash_planilha}
+            alterado = True
+            continue
+        try:
+            if tabela == "CAUSAS":
+                _gravar_tabela(ler_causas(caminho), destino)
+            elif tabela == "CODIGOS_SE":
+                ses, subestacoes = ler_codigos_se(caminho)
+                _gravar_tabela(ses, destino)
+                compiladas["SUBESTACOES"] = subestacoes
+            else:
+                compiladas["REGIONAIS"] = ler_regionais(caminho)
+        except ImportError as erro:  # openpyxl não instalado: mantém as tabelas compiladas
+            warnings.warn(f"{caminho} não compilada ({erro}); usando as tabelas já compiladas.")
+            continue
+        fontes[tabela] = {"assinatura": assinatura, "hash": hash_planilha}
+        alterado = True
+    if alterado:
+        try:
+            with escrita_atomica(arquivo) as temporario, open(temporario, "wb") as conteudo:
+                pickle.dump(compiladas, conteudo, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+    return compiladas
@@ -0,0 +1,126 @@
+import time
+import signal
+import threading
+import contextlib
+import contextvars
+
+# Progresso e cancelamento dos estudos longos (SE, núcleo, empresa). Como o filtro de causas (src._causas), o
+# acompanhamento vale para o contexto em que foi ativado: os estudos avisam cada alimentador concluído por etapas() e
+# verificam o cancelamento entre alimentadores, sem mudar as assinaturas dos estudos (e as chaves do cache).
+# Cada aviso chama o callback com um evento {"estudo", "item", "feitos", "total", "decorrido", "restante"},
+# com os tempos em segundos (restante é None antes do primeiro item).
+ACOMPANHAMENTO = contextvars.ContextVar("acompanhamento", default=None)
+
+
+class EstudoCancelado(Exception):
+    """
+    Estudo interrompido por Acompanhamento.cancelar entre dois alimentadores. parcial é o resultado dos alimentadores
+    concluídos, quando o estudo consegue montá-lo.
+    """
+
+    def __init__(self, parcial=None):
+        super().__init__("Estudo cancelado.")
+        self.parcial = parcial
+
+
+class Acompanhamento:
+    """
+    Callback de progresso e pedido de cancelamento de um estudo, compartilhados com outras threads (ex.: a thread
+    que recebe o Ctrl-C ou uma requisição de cancelamento).
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.cancelamento = threading.Event()
+
+    def cancelar(self):
+        self.cancelamento.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self.cancelamento.is_set()
+
+
+class Etapas:
+    """
+    Contagem dos itens (alimentadores) de um estudo, com o tempo decorrido e a estimativa do tempo restante.
+    """
+
+    def __init__(self, total: int, estudo: str, acompanhamento: Acompanhamento | None):
+        self.total = total
+        self.estudo = estudo
+        self.feitos = 0
+        self.inicio = time.perf_counter()
+        self.acompanhamento = acompanhamento
+
+    def evento(self, item: str = "") -> dict:
+        decorrido = time.perf_counter() - self.inicio
+        restante = decorrido / self.feitos * (self.total - self.feitos) if self.feitos else None
+        return {
+            "estudo": self.estudo, "item": item, "feitos": self.feitos, "total": self.total,
+            "decorrido": decorrido, "restante": restante,
+        }
+
+    def avancar(self, item: str = ""):
+        self.feitos += 1
+        if self.acompanhamento is not None and self.acompanhamento.callback is not None:
+            self.acompanhamento.callback(self.evento(item))
+
+    def cancelado(self) -> bool:
+        return self.acompanhamento is not None and self.acompanhamento.cancelado
+
+
+def etapas(total: int, estudo: str) -> Etapas:
+    """
+    Etapas de um estudo com o acompanhamento ativo (sem callback nem cancelamento fora de acompanhar).
+    """
+    return Etapas(total, estudo, ACOMPANHAMENTO.get())
+
+
+@contextlib.contextmanager
+def acompanhar(callback=None):
+    """
+    Ativa o acompanhamento dentro do bloco. Retorna o Acompanhamento, cujo cancelar() interrompe o estudo no próximo
+    alimentador com EstudoCancelado.
+    """
+    acompanhamento = Acompanhamento(callback)
+    token = ACOMPANHAMENTO.set(acompanhamento)
+    try:
+        yield acompanhamento
+    finally:
+        ACOMPANHAMENTO.reset(token)
+
+
+@contextlib.contextmanager
+def cancelar_com_ctrl_c(acompanhamento: Acompanhamento, aviso=None):
+    """
+    Dentro do bloco, o primeiro Ctrl-C pede o cancelamento do estudo (que termina no alimentador em andamento) e o
+    segundo interrompe imediatamente (KeyboardInterrupt). Fora da thread principal, o Ctrl-C não é alterado.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def interromper(sinal, quadro):
+        if acompanhamento.cancelado:
+            raise KeyboardInterrupt
+        acompanhamento.cancelar()
+        if aviso is not None:
+            aviso()
+
+    anterior = signal.signal(signal.SIGINT, interromper)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, anterior)
+
+
+def formatar_duracao(segundos: float | None) -> str:
+    if segundos is None:
+        return "?"
+    segundos = int(round(segundos))
+    if segundos >= 3600:
+        return f"{segundos // 3600}h{segundos % 3600 // 60:02d}m"
+    if segundos >= 60:
+        return f"{segundos // 60}m{segundos % 60:02d}s"
+    return f"{segundos}s"
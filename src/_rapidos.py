@@ -0,0 +1,111 @@
+import os
+import json
+import hashlib
+import inspect
+import importlib
+import contextlib
+from functools import lru_cache
+
+# Caminhos rápidos: implementações aceleradas que substituem os cálculos nó a nó da árvore.
+# Cada caminho só é usado depois de liberado pelo harness de equivalência (equivalencia.py --liberar), que compara
+# o caminho com a implementação de referência e grava em equivalencia.json a assinatura (hash do código-fonte) das
+# funções aprovadas. Uma mudança no código de um caminho invalida a liberação até o harness ser executado de novo.
+# A variável de ambiente DEC_RAPIDOS=0 força a referência em todos os caminhos, e DEC_RAPIDOS=1 usa todos os
+# caminhos sem consultar a liberação.
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVO = os.path.join(RAIZ, "equivalencia.json")
+AMBIENTE = os.environ.get("DEC_RAPIDOS")
+
+# Caminho -> (módulo, objetos que o implementam).
+CAMINHOS = {
+    "indice_euler": ("src._dataclasses", [
+        "IndiceEuler", "indexar_euler", "TreeNode.indice", "TreeNode.get_level", "Chave.chaves_jusante",
+        "Chave.dic_acumulado", "Chave.fic_acumulado", "Chave.tipo", "Chave.ucs", "Alimentador.ucs",
+    ]),
+    "acumulados": ("src._dataclasses", ["Chave.acumulados"]),
+    "indice_nomes": ("src._dataclasses", ["TreeNode.find", "IndiceNomes"]),
+    "rede_compacta": ("src._rede_compacta", ["RedeCompacta"]),
+}
+
+_FORCADOS = {}
+
+
+def _objeto(modulo: str, nome: str):
+    objeto = importlib.import_module(modulo)
+    for parte in nome.split("."):
+        objeto = getattr(objeto, parte) if not isinstance(objeto, type) else objeto.__dict__[parte]
+    if isinstance(objeto, property):
+        objeto = objeto.fget
+    return inspect.unwrap(objeto)
+
+
+def assinatura(caminho: str) -> str:
+    """
+    Hash do código-fonte das funções e classes que implementam o caminho.
+    """
+    modulo, nomes = CAMINHOS[caminho]
+    hash_codigo = hashlib.blake2b(digest_size=16)
+    for nome in nomes:
+        hash_codigo.update(nome.encode())
+        hash_codigo.update(inspect.getsource(_objeto(modulo, nome)).replace("\r\n", "\n").encode())
+    return hash_codigo.hexdigest()
+
+
+def ler_liberacoes(arquivo: str = ARQUIVO) -> dict:
+    if not os.path.exists(arquivo):
+        return {}
+    with open(arquivo, encoding="utf-8") as conteudo:
+        return json.load(conteudo)
+
+
+@lru_cache(maxsize=None)
+def liberado(caminho: str) -> bool:
+    """
+    True se o caminho foi aprovado pelo harness de equivalência com o código atual.
+    """
+    registro = ler_liberacoes().get(caminho, {})
+    try:
+        return bool(registro.get("aprovado")) and registro.get("assinatura") == assinatura(caminho)
+    except (OSError, TypeError, KeyError, AttributeError):
+        return False
+
+
+def ativo(caminho: str) -> bool:
+    """
+    Se o caminho rápido deve ser usado: forçado pelo harness (forcar), pela variável DEC_RAPIDOS ou liberado.
+    """
+    if caminho in _FORCADOS:
+        return _FORCADOS[caminho]
+    if AMBIENTE in ("0", "1"):
+        return AMBIENTE == "1"
+    return liberado(caminho)
+
+
+@contextlib.contextmanager
+def forcar(ativos: bool, caminhos=None):
+    """
+    Ativa ou desativa os caminhos (todos, por padrão) dentro do bloco, independente da liberação.
+    """
+    caminhos = list(CAMINHOS) if caminhos is None else list(caminhos)
+    anteriores = {caminho: _FORCADOS.get(caminho) for caminho in caminhos}
+    _FORCADOS.update({caminho: ativos for caminho in caminhos})
+    try:
+        yield
+    finally:
+        for caminho, anterior in anteriores.items():
+            if anterior is None:
+                _FORCADOS.pop(caminho, None)
+            else:
+                _FORCADOS[caminho] = anterior
+
+
+def liberar(resultados: dict, arquivo: str = ARQUIVO):
+    """
+    Grava a liberação dos caminhos testados pelo harness: {caminho: {"aprovado": bool, "assinatura": ..., ...}},
+    com a assinatura do código comparado. Caminhos não testados mantêm o registro anterior.
+    """
+    liberacoes = ler_liberacoes(arquivo)
+    liberacoes.update(resultados)
+    with open(arquivo, "w", encoding="utf-8") as conteudo:
+        json.dump(liberacoes, conteudo, ensure_ascii=False, indent=2)
+    liberado.cache_clear()
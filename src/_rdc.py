@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+# Agregados do Relatório de Chaves (RDC) por chave, usados pelo índice da árvore (IndiceEuler) e pela atualização
+# incremental do RDC (atualizar_rdc). As regras são as de Chave.tipo e Chave.ucs: as UCs somam todas as linhas da
+# chave e o tipo só vale quando a chave aparece uma única vez no relatório.
+SEM_TIPO = None  # chave sem tipo único no RDC: Chave.tipo usa a faixa do código
+
+
+def agregar_rdc(rdc: pd.DataFrame, nomes: list) -> tuple:
+    """
+    UCs a jusante e tipo de cada chave em nomes, cruzando pelo nome da chave ("SIGLA_CODIGO").
+    Retorna (ucs, tipos): ucs com o tipo numérico da soma do RDC (0 para chaves ausentes) e tipos com SEM_TIPO
+    para as chaves ausentes ou repetidas.
+    """
+    # Como em Series.sum, as UCs inteiras (reduzidas na importação) são somadas em int64.
+    valores = rdc["Consumidores a jusante"]
+    valores = valores.astype(np.float64 if pd.api.types.is_float_dtype(valores) else np.int64)
+    somas = valores.groupby(rdc["Chave"]).sum()
+    unicos = rdc.drop_duplicates("Chave", keep=False).set_index("Chave")["Tipo"]
+    nomes = pd.Series(nomes, dtype=object)
+    ucs = nomes.map(somas).fillna(0).to_numpy(dtype=valores.dtype)
+    tipos = np.full(len(nomes), SEM_TIPO, dtype=object)
+    presentes = nomes.isin(unicos.index).to_numpy()
+    tipos[presentes] = nomes[presentes].map(unicos).to_numpy(dtype=object)
+    return ucs, tipos
+
+
+def mesmo_tipo(a, b) -> bool:
+    """
+    Compara dois tipos de agregar_rdc: SEM_TIPO só é igual a SEM_TIPO, e tipos vazios (NaN) são iguais entre si.
+    """
+    if a is SEM_TIPO or b is SEM_TIPO:
+        return a is b
+    return a == b or (pd.isna(a) and pd.isna(b))
+
+
+# Histórico dos tipos das chaves entre versões do RDC (base/RDC_HISTORICO), usado para encontrar as chaves convertidas
+# em religador (src._validacao). Como as versões diferem em poucas chaves, o histórico guarda só as mudanças:
+# {"versoes": datas das versões em ordem, "tipos": DataFrame (Chave, Tipo, DATA)} com uma linha por chave na primeira
+# versão em que aparece e em cada versão em que o tipo muda. Tipos seguem a regra de Chave.tipo (chave única no
+# relatório) e tipos vazios são "". Uma chave ausente de uma versão mantém o último tipo registrado.
+def historico_vazio() -> dict:
+    return {"versoes": [], "tipos": pd.DataFrame({"Chave": [], "Tipo": [], "DATA": pd.to_datetime([])})}
+
+
+def tipos_unicos(rdc: pd.DataFrame) -> pd.Series:
+    """
+    Tipo de cada chave que aparece uma única vez no RDC, indexado pela chave.
+    """
+    unicos = rdc.drop_duplicates("Chave", keep=False)
+    return pd.Series(unicos["Tipo"].fillna("").astype(str).to_numpy(), index=unicos["Chave"].astype(str), name="Tipo")
+
+
+def tipos_na_versao(historico: dict, data) -> pd.Series:
+    """
+    Tipo de cada chave registrado até a versão da data (inclusive), indexado pela chave.
+    """
+    tipos = historico["tipos"]
+    tipos = tipos[tipos["DATA"] <= pd.Timestamp(data)].sort_values("DATA", kind="stable")
+    return tipos.drop_duplicates("Chave", keep="last").set_index("Chave")["Tipo"]
+
+
+def registrar_versao(historico: dict, rdc: pd.DataFrame, data) -> dict:
+    """
+    Histórico com a versão do RDC na data. Uma versão já registrada na mesma data é substituída, e versões
+    registradas fora de ordem (RDCs antigos) refazem as mudanças das versões seguintes.
+    """
+    data = pd.Timestamp(data).normalize()
+    versoes = sorted({*historico["versoes"], data})
+    fotos = []
+    for versao in versoes:
+        tipos = tipos_unicos(rdc) if versao == data else tipos_na_versao(historico, versao)
+        fotos.append(pd.DataFrame({"Chave": tipos.index, "Tipo": tipos.to_numpy(), "DATA": versao}))
+    tipos = pd.concat(fotos, ignore_index=True).sort_values(["Chave", "DATA"], kind="stable")
+    anterior = tipos.groupby("Chave")["Tipo"].shift()
+    tipos = tipos[tipos["Tipo"].ne(anterior)].reset_index(drop=True)
+    return {"versoes": versoes, "tipos": tipos}
+
+
+def conversoes(historico: dict, destinos=("RA", "TS")) -> pd.DataFrame:
+    """
+    Chaves cujo tipo passou a um dos destinos (religadores) entre duas versões do RDC, na primeira conversão de cada
+    chave. Colunas: Chave, Tipo anterior, Tipo atual, Versão anterior (última versão com o tipo antigo) e Versão da
+    conversão (primeira versão com o novo tipo).
+    """
+    tipos = historico["tipos"].sort_values(["Chave", "DATA"], kind="stable")
+    anterior = tipos.groupby("Chave")["Tipo"].shift()
+    mascara = tipos["Tipo"].isin(destinos) & anterior.notna() & ~anterior.isin(destinos)
+    convertidas = tipos[mascara].drop_duplicates("Chave")
+    versoes = np.array(historico["versoes"], dtype="datetime64[ns]")
+    data = convertidas["DATA"].to_numpy(dtype="datetime64[ns]")
+    return pd.DataFrame({
+        "Chave": convertidas["Chave"].to_numpy(),
+        "Tipo anterior": anterior[mascara].loc[convertidas.index].to_numpy(),
+        "Tipo atual": convertidas["Tipo"].to_numpy(),
+        "Versão anterior": versoes[np.searchsorted(versoes, data) - 1],
+        "Versão da conversão": data,
+    })
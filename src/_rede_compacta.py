@@ -0,0 +1,544 @@
+import json
+import mmap
+import functools
+import numpy as np
+import pandas as pd
+from multiprocessing import Pool, shared_memory
+from src._rapidos import ativo
+from src._causas import normalizar_filtro, permitidas
+
+# Tipos de nó da árvore, na ordem dos códigos usados em RedeCompacta.tipo_no.
+TIPOS_NO = ("Empresa", "Nucleo", "Subestacao", "Alimentador", "Chave")
+EMPRESA, NUCLEO, SUBESTACAO, ALIMENTADOR, CHAVE = range(len(TIPOS_NO))
+
+ALINHAMENTO = 64
+SENSIBILIDADE = 2  # sensibilidade padrão do religador, como em src._dataclasses
+
+
+def _alinhar(tamanho: int) -> int:
+    return -(-tamanho // ALINHAMENTO) * ALINHAMENTO
+
+
+def _ganho_alcance(ganho: np.ndarray, pai: np.ndarray, encadeada: np.ndarray, sensibilidade: int) -> np.ndarray:
+    """
+    Ganho da substituição de cada chave por religador com a sensibilidade: ganhos da chave e das chaves encadeadas
+    até sensibilidade - 1 níveis abaixo, como em Chave.acumulados. Um passe por nível de alcance.
+    """
+    alcance = ganho.copy()
+    for _ in range(sensibilidade - 1):
+        proximo = ganho.copy()
+        np.add.at(proximo, pai[encadeada], alcance[encadeada])
+        alcance = proximo
+    return alcance
+
+
+class RedeCompacta:
+    """
+    Representação da rede em arrays NumPy, com os nós em pré-ordem (mesma ordem de TreeNode.dft).
+    A subárvore do nó i ocupa o intervalo [i, fim[i]).
+
+    Os arrays podem ser publicados em memória compartilhada ou salvos em um arquivo mapeado em memória,
+    e processos de estudo se conectam a eles sem cópia, em modo somente leitura.
+    """
+
+    def __init__(self, arrays: dict, memoria=None):
+        self.arrays = arrays
+        for nome, array in arrays.items():
+            setattr(self, nome, array)
+        # Mantém a memória compartilhada (ou o mmap) aberta enquanto os arrays existirem.
+        self._memoria = memoria
+        # Redes com filtro de causas e ganhos por sensibilidade, calculados no primeiro uso em cada processo.
+        self._filtradas = {}
+        self._alcances = {}
+
+    def __len__(self) -> int:
+        return len(self.pai)
+
+    @classmethod
+    def de_arvore(cls, raiz) -> "RedeCompacta":
+        """
+        Converte a árvore criada por CriarRede e agrega por chave os dados do Relatório de Chaves e do 1025.
+        O 1025 é guardado somado por equipamento e causa, para os estudos com filtro de causas (filtrada).
+        """
+        from src._database import RDC, OCORRENCIAS, CAUSAS
+        from src._referencias import CODIGO_POR_SIMO
+        from src._referencias import tipo_por_codigo
+
+        nos = raiz.dft()
+        n = len(nos)
+        posicao = {id(no): i for i, no in enumerate(nos)}
+        pai = np.array([posicao[id(no.parent)] if no.parent is not None else -1 for no in nos], dtype=np.int32)
+        tipo_no = np.array([TIPOS_NO.index(no.__class__.__name__) for no in nos], dtype=np.int8)
+        nome = np.array([str(no) for no in nos])
+
+        nivel = np.zeros(n, dtype=np.int16)
+        tamanho = np.ones(n, dtype=np.int32)
+        for i in range(1, n):
+            nivel[i] = nivel[pai[i]] + 1
+        for i in range(n - 1, 0, -1):
+            tamanho[pai[i]] += tamanho[i]
+        fim = np.arange(n, dtype=np.int32) + tamanho
+
+        # Chaves: sigla da regional e código, para cruzar com o 1025.
+        chaves = np.flatnonzero(tipo_no == CHAVE)
+        regional = np.zeros(n, dtype=np.int64)
+        codigo = np.zeros(n, dtype=np.int64)
+        regional[chaves] = [CODIGO_POR_SIMO.get(nos[i].sigla_simo, -1) for i in chaves]
+        codigo[chaves] = [nos[i].codigo for i in chaves]
+
+        # Relatório de Chaves: o tipo só é usado quando a chave aparece uma única vez, como em Chave.tipo.
+        grupos_rdc = RDC.groupby("Chave")
+        contagem = grupos_rdc.size()
+        tipo_rdc = grupos_rdc["Tipo"].first()[contagem == 1]
+        nomes_chaves = pd.Series(nome[chaves])
+        tipos = nomes_chaves.map(tipo_rdc).to_numpy(dtype=object)
+        for k in np.flatnonzero(pd.isna(tipos)):
+            try:
+                tipos[k] = tipo_por_codigo(int(codigo[chaves[k]]))
+            except ValueError:
+                tipos[k] = ""
+        tipo_chave = np.full(n, "", dtype=object)
+        tipo_chave[chaves] = tipos
+        categorias, tipo_chave = np.unique(tipo_chave.astype(str), return_inverse=True)
+
+        ucs = np.zeros(n, dtype=np.int64)
+        ucs[chaves] = nomes_chaves.map(grupos_rdc["Consumidores a jusante"].sum()).fillna(0).to_numpy(dtype=np.int64)
+
+        # 1025: somas por (regional, código) do equipamento responsável e causa. Cada chave aponta para o grupo do seu
+        # equipamento (-1 sem ocorrencias), como em src._database.agregar_ocorrencias.
+        agregados = OCORRENCIAS.groupby(["REGIONAL", "EQPTO.RESPONSAVEL", "CAUSA"]).agg(
+            DIC=("DIC", "sum"), FIC=("QTDE UC EQPTO INTERROMPIDA", "sum"), QTD=("DIC", "size")
+        ).reset_index()
+        equipamentos = agregados[["REGIONAL", "EQPTO.RESPONSAVEL"]]
+        agregados["GRUPO"] = equipamentos.groupby(["REGIONAL", "EQPTO.RESPONSAVEL"], sort=True).ngroup().to_numpy()
+        grupo = np.full(n, -1, dtype=np.int64)
+        grupo[chaves] = pd.MultiIndex.from_frame(equipamentos.drop_duplicates()).get_indexer(
+            pd.MultiIndex.from_arrays([regional[chaves], codigo[chaves]])
+        )
+
+        arrays = {
+            "pai": pai,
+            "fim": fim,
+            "nivel": nivel,
+            "tipo_no": tipo_no,
+            "nome": nome,
+            "regional": regional,
+            "codigo": codigo,
+            "categorias": categorias,
+            "tipo_chave": tipo_chave.astype(np.int16),
+            "ucs": ucs,
+            "grupo": grupo,
+            "causa_grupo": agregados["GRUPO"].to_numpy(dtype=np.int64),
+            "causa": agregados["CAUSA"].to_numpy(dtype=np.int64),
+            "causa_dic": agregados["DIC"].to_numpy(dtype=float),
+            "causa_fic": agregados["FIC"].to_numpy(dtype=float),
+            "causa_qtd": agregados["QTD"].to_numpy(dtype=np.int64),
+            "causa_fator": agregados["CAUSA"].map(CAUSAS.set_index("CODIGO")["MITIGACAO POR RA"])
+            .fillna(0.0).to_numpy(dtype=float),
+        }
+        arrays.update(cls._indicadores(arrays, None))
+        arrays.update(cls._derivados(arrays))
+        return cls(arrays)
+
+    @staticmethod
+    def _indicadores(a: dict, filtro: tuple | None) -> dict:
+        """
+        Dic, fic e número de ocorrencias de cada chave, e dic / fic após a substituição por religador (fator de
+        mitigação de cada causa, exceto nas chaves RA e TS), com as causas permitidas pelo filtro (src._causas).
+        """
+        mascara = permitidas(a["causa"], filtro)
+        grupos = a["causa_grupo"][mascara]
+        total = int(max(a["grupo"].max(initial=-1), a["causa_grupo"].max(initial=-1))) + 1
+        fator = 1 - a["causa_fator"][mascara]
+        somas = [
+            np.bincount(grupos, weights=pesos, minlength=total)
+            for pesos in (
+                a["causa_dic"][mascara], a["causa_dic"][mascara] * fator,
+                a["causa_fic"][mascara], a["causa_fic"][mascara] * fator, a["causa_qtd"][mascara].astype(float),
+            )
+        ]
+        grupo = a["grupo"]
+        com_grupo = grupo >= 0
+        dic, dic_mitigado, fic, fic_mitigado, qtd = (np.zeros(len(grupo)) for _ in somas)
+        for valores, soma in zip((dic, dic_mitigado, fic, fic_mitigado, qtd), somas):
+            valores[com_grupo] = soma[grupo[com_grupo]]
+        religadora = np.isin(a["categorias"][a["tipo_chave"]], ["RA", "TS"])
+        return {
+            "dic": dic,
+            "dic_pos_rl": np.where(religadora, dic, dic_mitigado),
+            "fic": fic,
+            "fic_pos_rl": np.where(religadora, fic, fic_mitigado),
+            "qtd_ocorrencias": np.rint(qtd).astype(np.int64),
+        }
+
+    def filtrada(self, causas: tuple = (), excluir_causas: tuple = ()) -> "RedeCompacta":
+        """
+        Rede com os indicadores das chaves e os acumulados calculados apenas com as ocorrencias das causas permitidas
+        (mesma topologia e mesmos arrays da rede). Sem filtro, a própria rede.
+        """
+        filtro = normalizar_filtro(causas, excluir_causas)
+        if filtro is None:
+            return self
+        if filtro not in self._filtradas:
+            arrays = dict(self.arrays)
+            arrays.update(self._indicadores(arrays, filtro))
+            arrays.update(self._derivados(arrays))
+            self._filtradas[filtro] = RedeCompacta(arrays)
+        return self._filtradas[filtro]
+
+    def ganho_acumulado(self, sensibilidade: int) -> np.ndarray:
+        """
+        Redução do dic acumulado de cada chave substituída por religador com a sensibilidade (níveis de chaves
+        alcançados, contando a própria chave).
+        """
+        if sensibilidade == SENSIBILIDADE:
+            return self.acum_dic - self.acum_dic_pos_rl
+        if sensibilidade not in self._alcances:
+            self._alcances[sensibilidade] = _ganho_alcance(
+                self.dic - self.dic_pos_rl, self.pai, self.encadeada, sensibilidade
+            )
+        return self._alcances[sensibilidade]
+
+    @staticmethod
+    def _derivados(a: dict) -> dict:
+        """
+        Arrays derivados da topologia e dos agregados por chave: ancestrais de referência,
+        somas acumuladas a jusante de cada chave e totais por alimentador / SE.
+        """
+        pai, tipo_no, nivel = a["pai"], a["tipo_no"], a["nivel"]
+        n = len(pai)
+        chave = tipo_no == CHAVE
+        pai_chave = np.zeros(n, dtype=bool)
+        pai_chave[1:] = chave[pai[1:]]
+        encadeada = chave & pai_chave  # chave cujo pai também é chave
+        fu = a["categorias"][a["tipo_chave"]] == "FU"
+
+        # Ancestrais em pré-ordem: o pai sempre vem antes do filho, então um passe por nível resolve tudo.
+        dono = np.full(n, -1, dtype=np.int32)  # primeiro ancestral que não é chave (alimentador da chave)
+        fu_acima = np.full(n, -1, dtype=np.int32)  # chave FU mais próxima a montante, dentro do alimentador
+        topo = {tipo: np.full(n, -1, dtype=np.int32) for tipo in (NUCLEO, SUBESTACAO, ALIMENTADOR)}
+        por_nivel = np.argsort(nivel, kind="stable")
+        quebras = np.searchsorted(nivel[por_nivel], np.arange(1, nivel.max() + 1))
+        for i in np.split(por_nivel, quebras)[1:]:
+            p = pai[i]
+            dono[i] = np.where(chave[i], np.where(pai_chave[i], dono[p], p), -1)
+            fu_acima[i] = np.where(encadeada[i], np.where(fu[p], p, fu_acima[p]), -1)
+            for tipo, array in topo.items():
+                # Primeiro ancestral do tipo a partir da raiz, como em Chave.get_alimentador.
+                array[i] = np.where(array[p] >= 0, array[p], np.where(tipo_no[p] == tipo, p, -1))
+
+        acum_dic = a["dic"].copy()
+        acum_fic = a["fic"].copy()
+        acum_ucs = a["ucs"].astype(np.int64)
+        for i in reversed(np.split(por_nivel, quebras)[1:]):
+            i = i[encadeada[i]]
+            np.add.at(acum_dic, pai[i], acum_dic[i])
+            np.add.at(acum_fic, pai[i], acum_fic[i])
+            np.add.at(acum_ucs, pai[i], acum_ucs[i])
+        # Sensibilidade padrão de Chave.dic_acumulado_pos_rl: a própria chave e as chaves imediatamente a jusante.
+        acum_dic_pos_rl = acum_dic - _ganho_alcance(a["dic"] - a["dic_pos_rl"], pai, encadeada, SENSIBILIDADE)
+        acum_fic_pos_rl = acum_fic - _ganho_alcance(a["fic"] - a["fic_pos_rl"], pai, encadeada, SENSIBILIDADE)
+
+        # Totais de alimentadores (chaves filhas) e de SEs (alimentadores filhos).
+        ucs_total = np.zeros(n, dtype=np.int64)
+        dic_total = np.zeros(n)
+        cabeca = chave & ~pai_chave
+        cabeca[0] = False
+        cabeca &= tipo_no[np.maximum(pai, 0)] == ALIMENTADOR
+        np.add.at(ucs_total, pai[cabeca], acum_ucs[cabeca])
+        np.add.at(dic_total, pai[cabeca], acum_dic[cabeca])
+        alimentador = tipo_no == ALIMENTADOR
+        alimentador[0] = False
+        alimentador &= tipo_no[np.maximum(pai, 0)] == SUBESTACAO
+        np.add.at(ucs_total, pai[alimentador], ucs_total[alimentador])
+        np.add.at(dic_total, pai[alimentador], dic_total[alimentador])
+
+        return {
+            "encadeada": encadeada,
+            "dono": dono,
+            "fu_acima": fu_acima,
+            "nucleo_topo": topo[NUCLEO],
+            "subestacao_topo": topo[SUBESTACAO],
+            "alimentador_topo": topo[ALIMENTADOR],
+            "acum_dic": acum_dic,
+            "acum_dic_pos_rl": acum_dic_pos_rl,
+            "acum_fic": acum_fic,
+            "acum_fic_pos_rl": acum_fic_pos_rl,
+            "acum_ucs": acum_ucs,
+            "ucs_total": ucs_total,
+            "dic_total": dic_total,
+            "ordem_nomes": np.argsort(a["nome"], kind="stable").astype(np.int32),
+        }
+
+    # Busca e navegação
+
+    def buscar(self, nome: str) -> int:
+        """
+        Posição do nó pelo nome (o primeiro em pré-ordem, como TreeNode.find), ou -1.
+        """
+        ordenados = self.nome[self.ordem_nomes]
+        k = np.searchsorted(ordenados, nome)
+        if k < len(ordenados) and ordenados[k] == nome:
+            return int(self.ordem_nomes[k])
+        return -1
+
+    def filhos(self, i: int) -> np.ndarray:
+        intervalo = np.arange(i + 1, self.fim[i])
+        return intervalo[self.pai[intervalo] == i]
+
+    def lista_chaves(self, alimentador: int) -> np.ndarray:
+        """
+        Chaves do alimentador em pré-ordem, sem as SEDs e suas chaves (Alimentador.lista_chaves).
+        """
+        intervalo = np.arange(alimentador + 1, self.fim[alimentador])
+        return intervalo[(self.tipo_no[intervalo] == CHAVE) & (self.dono[intervalo] == alimentador)]
+
+    def _nome(self, i: int) -> str:
+        return str(self.nome[i]) if i >= 0 else "None"
+
+    # Estudos
+
+    def chaves_candidatas_ts(self, alimentador: int) -> np.ndarray:
+        """
+        Versão vetorizada de Alimentador.chaves_candidatas_ts.
+        """
+        chaves = self.lista_chaves(alimentador)[::-1]
+        descartadas = np.flatnonzero(np.isin(self.categorias, ["TS", "RA", "CD"]))
+        chaves = chaves[~np.isin(self.tipo_chave[chaves], descartadas)]
+        # Chaves com FU a montante são trocadas pela FU mais próxima.
+        candidatas = np.where(self.fu_acima[chaves] >= 0, self.fu_acima[chaves], chaves)
+        candidatas = candidatas[self.acum_dic[candidatas] != 0]
+        # Sem repetições, pelo nome (TreeNode.__eq__), na ordem em que aparecem.
+        _, primeira = np.unique(self.nome[candidatas], return_index=True)
+        return candidatas[np.sort(primeira)]
+
+    @staticmethod
+    def _reducao(pos_rl: float, acumulado: float):
+        return round(100 * (1 - pos_rl / acumulado), 2) if acumulado else "NA"
+
+    def estudo_chave(self, i: int, sensibilidades: tuple = (), causas: tuple = (),
+                     excluir_causas: tuple = ()) -> pd.DataFrame:
+        """
+        Versão vetorizada de src._estudos.estudo_chave (sem reamostragens).
+        """
+        rede = self.filtrada(causas, excluir_causas)
+        dic_acumulado = rede.acum_dic[i]
+        dic_acumulado_pos_rl = rede.acum_dic_pos_rl[i]
+        fic_acumulado = rede.acum_fic[i]
+        fic_acumulado_pos_rl = rede.acum_fic_pos_rl[i]
+        df = pd.DataFrame({
+            "Núcleo / Unidade": self._nome(self.nucleo_topo[i]),
+            "Subestação": self._nome(self.subestacao_topo[i]),
+            "Alimentador": self._nome(self.alimentador_topo[i]),
+            "Chave": self._nome(i),
+            "Unidade Consumidoras": self.ucs[i],
+            "DIC Chave [h*ucs]": rede.dic[i],
+            "DIC Acumulado [h * ucs]": dic_acumulado,
+            "DIC Estimado após substituição [h * ucs]": rede.dic_pos_rl[i],
+            "DIC Acumulado estimado pós substituição [h * ucs]": dic_acumulado_pos_rl,
+            "Redução DIC Acumulado estimada [%]": self._reducao(dic_acumulado_pos_rl, dic_acumulado),
+            "FIC Chave [ucs]": rede.fic[i],
+            "FIC Acumulado [ucs]": fic_acumulado,
+            "FIC Estimado após substituição [ucs]": rede.fic_pos_rl[i],
+            "FIC Acumulado estimado pós substituição [ucs]": fic_acumulado_pos_rl,
+            "Redução FIC Acumulado estimada [%]": self._reducao(fic_acumulado_pos_rl, fic_acumulado),
+        }, index=['0'])
+        for sensibilidade in sensibilidades:
+            dic_sensibilidade = dic_acumulado - rede.ganho_acumulado(sensibilidade)[i]
+            df[f"DIC Acumulado estimado pós substituição, sensibilidade {sensibilidade} [h * ucs]"] = dic_sensibilidade
+            df[f"Redução DIC Acumulado estimada, sensibilidade {sensibilidade} [%]"] = self._reducao(
+                dic_sensibilidade, dic_acumulado
+            )
+        return df
+
+    def estudo_alimentador(self, i: int, sensibilidades: tuple = (), causas: tuple = (),
+                           excluir_causas: tuple = ()) -> pd.DataFrame:
+        """
+        Versão vetorizada de src._estudos.estudo_alimentador (sem reamostragens).
+        """
+        rede = self.filtrada(causas, excluir_causas)
+        candidatas = rede.chaves_candidatas_ts(i)
+        ucs = self.ucs_total[i]
+        df = pd.DataFrame({
+            "Chave": self.nome[candidatas].astype(object),
+            "Redução DEC estimada [HI]": (rede.dic[candidatas] - rede.dic_pos_rl[candidatas]) / ucs,
+            "Redução FEC estimada [interrupções]": (rede.fic[candidatas] - rede.fic_pos_rl[candidatas]) / ucs,
+        })
+        for sensibilidade in sensibilidades:
+            df[f"Redução DEC estimada, sensibilidade {sensibilidade} [HI]"] = (
+                rede.ganho_acumulado(sensibilidade)[candidatas] / ucs
+            )
+        df["Interrupções no periodo"] = rede.qtd_ocorrencias[candidatas]
+        df["Unidades consumidoras a jusante da Chave"] = self.ucs[candidatas]
+        df = df[df["Redução DEC estimada [HI]"] != 0]
+        df.sort_values(["Redução DEC estimada [HI]",
+                        "Unidades consumidoras a jusante da Chave"], inplace=True, ascending=False)
+        df.attrs["ucs"] = ucs
+        return df
+
+    def estudo_subestacao(self, i: int, sensibilidades: tuple = (), causas: tuple = (),
+                          excluir_causas: tuple = ()) -> pd.DataFrame:
+        """
+        Versão vetorizada de src._estudos.estudo_subestacao (sem reamostragens).
+        """
+        rede = self.filtrada(causas, excluir_causas)
+        alimentadores = self.filhos(i)
+        candidatas = np.concatenate(
+            [rede.chaves_candidatas_ts(alm) for alm in alimentadores if self.tipo_no[alm] == ALIMENTADOR] or [[]]
+        ).astype(np.int64)
+        ucs = self.ucs_total[i]
+        alimentador = self.alimentador_topo[candidatas]
+        ucs_alimentador = self.ucs_total[alimentador]
+        ganho_dic = rede.dic[candidatas] - rede.dic_pos_rl[candidatas]
+        ganho_fic = rede.fic[candidatas] - rede.fic_pos_rl[candidatas]
+        df = pd.DataFrame({
+            "Alimentador": self.nome[alimentador].astype(object),
+            "Chave": self.nome[candidatas].astype(object),
+            "Redução DEC SE estimada [HI]": ganho_dic / ucs,
+            "Redução DEC Alimentador estimada [HI]": ganho_dic / ucs_alimentador,
+            "Redução FEC SE estimada [interrupções]": ganho_fic / ucs,
+            "Redução FEC Alimentador estimada [interrupções]": ganho_fic / ucs_alimentador,
+        })
+        for sensibilidade in sensibilidades:
+            ganho = rede.ganho_acumulado(sensibilidade)[candidatas]
+            df[f"Redução DEC SE estimada, sensibilidade {sensibilidade} [HI]"] = ganho / ucs
+            df[f"Redução DEC Alimentador estimada, sensibilidade {sensibilidade} [HI]"] = ganho / ucs_alimentador
+        df["Interrupções"] = rede.qtd_ocorrencias[candidatas]
+        df["UCs a jusante da Chave"] = self.ucs[candidatas]
+        df = df[df["Redução DEC Alimentador estimada [HI]"] != 0]
+        df.sort_values(["Redução DEC SE estimada [HI]",], inplace=True, ascending=False)
+        df.attrs["ucs"] = ucs
+        return df
+
+    def estudar(self, nome: str, sensibilidades: tuple = (), causas: tuple = (), excluir_causas: tuple = ()):
+        """
+        Executa o estudo correspondente ao tipo do nó, com as sensibilidades e o filtro de causas (códigos) dos
+        estudos da árvore. Retorna None se o nó não existir ou não tiver estudo.
+        """
+        i = self.buscar(nome)
+        if i < 0:
+            return None
+        estudos = {
+            CHAVE: self.estudo_chave,
+            ALIMENTADOR: self.estudo_alimentador,
+            SUBESTACAO: self.estudo_subestacao,
+        }
+        estudo = estudos.get(int(self.tipo_no[i]))
+        return estudo(i, sensibilidades, causas, excluir_causas) if estudo else None
+
+    # Memória compartilhada e arquivo mapeado
+
+    def _layout(self) -> tuple:
+        """
+        Cabeçalho (JSON com dtype, shape e deslocamento de cada array) e tamanho total do bloco.
+        Os deslocamentos são relativos ao início dos dados, logo após o cabeçalho.
+        """
+        descricao = {}
+        deslocamento = 0
+        for nome, array in self.arrays.items():
+            descricao[nome] = [array.dtype.str, list(array.shape), deslocamento]
+            deslocamento += _alinhar(array.nbytes)
+        cabecalho = json.dumps(descricao).encode()
+        return cabecalho, _alinhar(8 + len(cabecalho)) + deslocamento
+
+    def _escrever(self, buffer, cabecalho: bytes):
+        buffer[:8] = len(cabecalho).to_bytes(8, "little")
+        buffer[8:8 + len(cabecalho)] = cabecalho
+        inicio = _alinhar(8 + len(cabecalho))
+        for nome, (dtype, shape, deslocamento) in json.loads(cabecalho).items():
+            destino = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=inicio + deslocamento)
+            destino[...] = self.arrays[nome]
+
+    @classmethod
+    def _de_buffer(cls, buffer, memoria) -> "RedeCompacta":
+        tamanho = int.from_bytes(bytes(buffer[:8]), "little")
+        descricao = json.loads(bytes(buffer[8:8 + tamanho]))
+        inicio = _alinhar(8 + tamanho)
+        arrays = {}
+        for nome, (dtype, shape, deslocamento) in descricao.items():
+            array = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=inicio + deslocamento)
+            array.flags.writeable = False
+            arrays[nome] = array
+        return cls(arrays, memoria)
+
+    def publicar(self, nome: str | None = None) -> str:
+        """
+        Copia os arrays para um bloco de memória compartilhada e retorna o nome do bloco.
+        O bloco existe enquanto o processo que publicou não chamar liberar().
+        """
+        cabecalho, tamanho = self._layout()
+        memoria = shared_memory.SharedMemory(name=nome, create=True, size=tamanho)
+        self._escrever(memoria.buf, cabecalho)
+        self._publicada = memoria
+        return memoria.name
+
+    def liberar(self):
+        """
+        Remove o bloco de memória compartilhada publicado por este processo.
+        """
+        memoria = getattr(self, "_publicada", None)
+        if memoria is not None:
+            memoria.close()
+            memoria.unlink()
+            self._publicada = None
+
+    @classmethod
+    def anexar(cls, nome: str) -> "RedeCompacta":
+        """
+        Conecta-se a uma rede publicada em memória compartilhada, sem copiar os arrays.
+        """
+        memoria = shared_memory.SharedMemory(name=nome)
+        return cls._de_buffer(memoria.buf, memoria)
+
+    def salvar(self, caminho: str):
+        """
+        Salva os arrays em um arquivo que pode ser mapeado em memória por RedeCompacta.abrir.
+        """
+        cabecalho, tamanho = self._layout()
+        buffer = bytearray(tamanho)
+        self._escrever(memoryview(buffer), cabecalho)
+        with open(caminho, "wb") as arquivo:
+            arquivo.write(buffer)
+
+    @classmethod
+    def abrir(cls, caminho: str) -> "RedeCompacta":
+        """
+        Mapeia em memória (somente leitura) um arquivo salvo por RedeCompacta.salvar.
+        """
+        with open(caminho, "rb") as arquivo:
+            memoria = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls._de_buffer(memoryview(memoria), memoria)
+
+
+# Rede do processo de estudo, conectada uma vez na inicialização do processo.
+_REDE = None
+
+
+def _iniciar_processo(origem: str):
+    global _REDE
+    _REDE = RedeCompacta.abrir(origem) if origem.endswith(".rede") else RedeCompacta.anexar(origem)
+
+
+def _estudar_no_processo(nome: str, **parametros) -> tuple:
+    return nome, _REDE.estudar(nome, **parametros)
+
+
+def estudar_em_paralelo(origem: str, nomes: list, processos: int | None = None, sensibilidades: tuple = (),
+                        causas: tuple = (), excluir_causas: tuple = ()) -> dict:
+    """
+    Executa os estudos dos nós em vários processos. "origem" é o nome do bloco de memória compartilhada
+    (RedeCompacta.publicar) ou o caminho de um arquivo ".rede" (RedeCompacta.salvar).
+    sensibilidades e causas / excluir_causas (códigos) como nos estudos de src._estudos.
+    Retorna {nome: DataFrame do estudo}.
+    Exige o caminho rápido "rede_compacta" liberado pelo harness de equivalência (src._rapidos).
+    """
+    if not ativo("rede_compacta"):
+        raise RuntimeError(
+            'Estudos pela rede compacta não liberados: execute "python equivalencia.py --liberar" com o código atual.'
+        )
+    with Pool(processos, initializer=_iniciar_processo, initargs=(origem,)) as pool:
+        estudar = functools.partial(
+            _estudar_no_processo, sensibilidades=tuple(sensibilidades), causas=tuple(causas),
+            excluir_causas=tuple(excluir_causas),
+        )
+        return dict(pool.imap_unordered(estudar, nomes))
@@ -0,0 +1,113 @@
+from types import MappingProxyType
+import pandas as pd
+from src import _constants
+from src._planilhas import compilar_referencias
+
+# Tabelas compiladas das planilhas de base/Excel_files (src._planilhas). As tabelas sem planilha (SUBESTACOES, enquanto
+# a planilha das SEs não tiver a coluna NÚCLEO) ou sem compilação disponível usam as cópias de src._constants.
+REFERENCIAS = compilar_referencias()
+REGIONAIS = REFERENCIAS.get("REGIONAIS") or _constants.REGIONAIS
+SUBESTACOES = REFERENCIAS.get("SUBESTACOES") or _constants.SUBESTACOES
+
+# Índices reversos das tabelas de referência, montados uma única vez na importação.
+# Quando um valor aparece mais de uma vez, a primeira ocorrência prevalece (mesmo resultado das buscas lineares
+# que estes índices substituem) e o valor é registrado nas ambiguidades.
+
+
+def _inverter(pares) -> tuple:
+    """
+    Inverte uma sequência de pares (chave, valor) em {valor: chave}.
+    Retorna o mapa e as ambiguidades {valor: (chaves...)} dos valores repetidos.
+    """
+    mapa = {}
+    todas = {}
+    for chave, valor in pares:
+        mapa.setdefault(valor, chave)
+        todas.setdefault(valor, []).append(chave)
+    ambiguas = {valor: tuple(chaves) for valor, chaves in todas.items() if len(chaves) > 1}
+    return MappingProxyType(mapa), MappingProxyType(ambiguas)
+
+
+# Sigla da SE -> núcleo / unidade.
+NUCLEO_POR_SE, SES_AMBIGUAS = _inverter(
+    (nucleo, sigla) for nucleo, siglas in SUBESTACOES.items() for sigla in siglas.values()
+)
+
+# Sigla SIMO da regional -> código da regional (usado na coluna REGIONAL do 1025).
+CODIGO_POR_SIMO, SIMO_AMBIGUAS = _inverter(REGIONAIS["Siglas SIMO"].items())
+
+# Núcleo / unidade -> código da regional.
+CODIGO_POR_NUCLEO, NUCLEOS_AMBIGUOS = _inverter(REGIONAIS["Núcleo"].items())
+
+
+def indexar_tabela(df: pd.DataFrame) -> MappingProxyType:
+    """
+    Índice {valor: rótulo da linha} de todas as células de uma tabela, percorrida linha a linha.
+    Equivale a get_row(df, valor) para qualquer valor presente na tabela.
+    """
+    indice = {}
+    for rotulo, linha in zip(df.index, df.itertuples(index=False)):
+        for valor in linha:
+            try:
+                indice.setdefault(valor, rotulo)
+            except TypeError:
+                continue
+    return MappingProxyType(indice)
+
+
+def ambiguidades() -> dict:
+    """
+    Valores repetidos nas tabelas de referência: {tabela: {valor: (chaves em que aparece...)}}.
+    """
+    return {
+        "SUBESTACOES": dict(SES_AMBIGUAS),
+        "Siglas SIMO": dict(SIMO_AMBIGUAS),
+        "Núcleo": dict(NUCLEOS_AMBIGUOS),
+    }
+
+
+def tipo_por_codigo(codigo: int) -> str:
+    """
+    Tipo da chave pela faixa numérica do código, conforme o Manual de Procedimentos.
+    Usado quando a chave não é encontrada no Relatório de Chaves.
+    """
+    if 1 <= codigo < 100:
+        return "Chave Tripolar Sem Corte Vsível"
+    elif 100 <= codigo < 200:
+        return "CD"
+    elif 200 <= codigo < 300 or 85000 <= codigo < 86000:
+        return "FU"
+    elif 300 <= codigo < 400:
+        return "Regulador de Tensão"
+    elif 400 <= codigo < 500:
+        return "Chave Tripolar com Corte Visível"
+    elif 500 <= codigo < 600 or 86500 <= codigo < 87000:
+        return "RA"
+    elif 600 <= codigo < 800 or 82000 <= codigo < 83000:
+        return "RA"
+    elif 800 <= codigo < 2900 or 84000 <= codigo < 85000:
+        return "Chave Faca Unipolar - Abertura com Carga"
+    elif 2900 <= codigo < 3000:
+        return "Chave Faca Unipolar - Abertura sem Carga"
+    elif (
+        3000 <= codigo < 5000
+        or 80000 <= codigo < 82000
+        or 87000 <= codigo < 89000
+    ):
+        return "FU"
+    elif 5000 <= codigo < 70000:
+        return "FU"
+    elif 70000 <= codigo < 80000:
+        return "FU"
+    elif 85200 <= codigo < 86000:
+        return "Chave Faca de Ramal Particular"
+    elif 83000 <= codigo < 84000:
+        return "Chave Base Fusível com Lâmina Seccionadora - Abertura com Carga"
+    elif 86000 <= codigo < 86500:
+        return "DJ PVO"
+    elif 89000 <= codigo < 100000:
+        return "Reserva Técnica"
+    else:
+        raise ValueError(
+            f"códgio {codigo} está fora da faixa numérica expecificada pelo Manual de Procedimentos"
+        )
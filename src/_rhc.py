@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+# Representação compacta do Relatório Hierárquico de Chaves (RHC).
+# O csv do RHC tem uma coluna por profundidade e um único rótulo por linha, então quase todas as células da tabela
+# larga são NaN. Na importação a tabela é normalizada em uma linha por nó: profundidade (coluna do rótulo), rótulo
+# e a posição do nó pai, calculada de forma vetorizada com a mesma pilha de CriarRede.
+FIM_RHC = "\x1a"
+COLUNAS = ["PROFUNDIDADE", "ROTULO", "PAI"]
+SEM_PAI = -1  # nós ligados à raiz da árvore
+
+
+def compacto(rhc: pd.DataFrame) -> bool:
+    return list(rhc.columns) == COLUNAS
+
+
+def normalizar_rhc(rhc: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte o RHC largo (uma coluna por profundidade, como lido do csv) na tabela compacta
+    PROFUNDIDADE (int8), ROTULO (category) e PAI (int32, posição do pai na tabela ou SEM_PAI).
+    A profundidade é a de CriarRede: 2 para a primeira coluna preenchida (SE), 3 para a segunda (alimentador)...
+    As linhas a partir do marcador de fim do arquivo são descartadas. O índice da tabela larga é mantido.
+    Tabelas já compactas são retornadas sem alteração.
+    """
+    if compacto(rhc):
+        return rhc
+    valores = rhc.to_numpy(dtype=object)
+    preenchidas = pd.notna(valores)
+    linhas = np.flatnonzero(preenchidas.any(axis=1))
+    coluna = preenchidas[linhas].argmax(axis=1)
+    rotulo = valores[linhas, coluna].astype(str)
+    fim = np.flatnonzero(rotulo == FIM_RHC)
+    if len(fim):
+        linhas, coluna, rotulo = linhas[:fim[0]], coluna[:fim[0]], rotulo[:fim[0]]
+    profundidade = coluna + 2
+    if len(profundidade) and profundidade.max() > np.iinfo(np.int8).max:
+        raise ValueError(f"RHC com profundidade {profundidade.max()}, acima do suportado.")
+    return pd.DataFrame({
+        "PROFUNDIDADE": profundidade.astype(np.int8),
+        "ROTULO": pd.Categorical(rotulo),
+        "PAI": pais(profundidade),
+    }, index=rhc.index[linhas])
+
+
+def pais(profundidade: np.ndarray) -> np.ndarray:
+    """
+    Posição do pai de cada linha pela pilha de CriarRede: a cada linha a pilha é desempilhada até ficar abaixo da
+    profundidade da linha, e a linha é empilhada. O nível na pilha é nivel[i] = min(nivel[i - 1] + 1, profundidade[i]),
+    com a raiz no nível 1, e o pai é a última linha anterior com um nível a menos.
+    """
+    n = len(profundidade)
+    posicoes = np.arange(n, dtype=np.int64)
+    # nivel[i] = min(i + 2, min_{k <= i} (profundidade[k] + i - k)), resolvido por mínimo acumulado.
+    nivel = np.minimum(posicoes + 2, posicoes + np.minimum.accumulate(profundidade.astype(np.int64) - posicoes))
+    pai = np.full(n, SEM_PAI, dtype=np.int32)
+    for valor in range(3, int(nivel.max(initial=2)) + 1):
+        ultima = np.maximum.accumulate(np.where(nivel == valor - 1, posicoes, SEM_PAI))
+        no_nivel = nivel == valor
+        pai[no_nivel] = ultima[no_nivel]
+    return pai
+
+
+def tipos_no(rhc: pd.DataFrame) -> np.ndarray:
+    """
+    Tipo do nó de cada linha do RHC compacto, com a classificação de CriarRede: "Subestacao" (profundidade 2),
+    "Alimentador" (profundidade 3 ou disjuntor fictício DJ_), "SED" (rótulos com "BT " ou "TT-") ou "Chave".
+    """
+    profundidade = rhc["PROFUNDIDADE"].to_numpy()
+    rotulo = rhc["ROTULO"].astype(str)
+    return np.select(
+        [
+            profundidade == 2,
+            profundidade == 3,
+            (rotulo.str.contains("BT ", regex=False) | rotulo.str.contains("TT-", regex=False)).to_numpy(),
+            rotulo.str.contains("DJ_", regex=False).to_numpy(),
+        ],
+        ["Subestacao", "Alimentador", "SED", "Alimentador"],
+        default="Chave",
+    ).astype(object)
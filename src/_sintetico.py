@@ -0,0 +1,206 @@
+import os
+import numpy as np
+import pandas as pd
+from src._referencias import SUBESTACOES, REGIONAIS, CODIGO_POR_NUCLEO
+from src._rhc import normalizar_rhc
+
+COMPRESSAO = {'method': "gzip", 'compresslevel': 1, 'mtime': 1}
+
+# Tamanho aproximado da rede estadual, usado como escala 1.0.
+SUBESTACOES_ESTADUAL = 190
+ALIMENTADORES_POR_SE = 5
+CHAVES_POR_ALIMENTADOR = 80
+
+# Tipos de chave do Relatório de Chaves e suas proporções aproximadas.
+TIPOS = ["FU", "CD", "RA", "TS", "CO"]
+PROPORCAO_TIPOS = [0.77, 0.18, 0.02, 0.02, 0.01]
+
+
+def _regional_do_nucleo(nucleo: str, rng: np.random.Generator) -> int:
+    """
+    Código da regional (chave de REGIONAIS) do núcleo, ou uma regional aleatória se o núcleo não for encontrado.
+    """
+    if nucleo in CODIGO_POR_NUCLEO:
+        return CODIGO_POR_NUCLEO[nucleo]
+    return int(rng.choice(list(REGIONAIS["Siglas SIMO"].keys())))
+
+
+def _nomes_subestacoes(quantidade: int, rng: np.random.Generator) -> list:
+    """
+    Retorna (sigla, núcleo) das subestações sintéticas. As siglas reais de SUBESTACOES são usadas primeiro,
+    em ordem aleatória, acima disso são geradas siglas que não pertencem a nenhum núcleo.
+    """
+    reais = [(sigla, nucleo) for nucleo, siglas in SUBESTACOES.items() for sigla in siglas.values()]
+    vistas = set()
+    nomes = []
+    for sigla, nucleo in reais:
+        if sigla not in vistas:
+            vistas.add(sigla)
+            nomes.append((sigla, nucleo))
+    nomes = [nomes[i] for i in rng.permutation(len(nomes))]
+    extra = 0
+    while len(nomes) < quantidade:
+        nomes.append((f"S{extra:02d}", None))
+        extra += 1
+    return nomes[:quantidade]
+
+
+def _arvore(n: int, rng: np.random.Generator, encadeamento: float, profundidade_maxima: int) -> tuple:
+    """
+    Gera uma árvore aleatória de n chaves em pré-ordem (busca em profundidade).
+    Retorna (ordem, profundidade), a ordem dos nós e a profundidade de cada nó a partir de 0.
+    """
+    pai = np.full(n, -1)
+    profundidade = np.zeros(n, dtype=np.int64)
+    encadeia = rng.random(n) < encadeamento
+    for i in range(1, n):
+        if rng.random() < 0.03:
+            continue
+        p = i - 1 if encadeia[i] else int(rng.integers(0, i))
+        if profundidade[p] + 1 >= profundidade_maxima:
+            p = pai[p] if pai[p] >= 0 else -1
+        pai[i] = p
+        profundidade[i] = profundidade[p] + 1 if p >= 0 else 0
+
+    filhos = [[] for _ in range(n)]
+    raizes = []
+    for i in range(n):
+        (filhos[pai[i]] if pai[i] >= 0 else raizes).append(i)
+    ordem = []
+    pilha = list(reversed(raizes))
+    while pilha:
+        no = pilha.pop()
+        ordem.append(no)
+        pilha.extend(reversed(filhos[no]))
+    return np.array(ordem), profundidade
+
+
+def gerar_base(
+    destino: str,
+    escala: float = 1.0,
+    semente: int = 0,
+    taxa_ocorrencias: float = 2.4,
+    encadeamento: float = 0.6,
+    profundidade_maxima: int = 80,
+    proporcao_sed: float = 0.05,
+    ano: int = 2022,
+) -> dict:
+    """
+    Gera uma base sintética (RHC, RDC, OCORRENCIAS, CAUSAS e CODIGOS_SE) com a forma da base real,
+    e salva os arquivos em "destino/base/" no mesmo formato usado por src._database.
+
+    Núcleos -> SEs -> alimentadores -> árvores de chaves profundas, com SEDs ("BT ") e disjuntores
+    fictícios ("DJ_..._FICT") embutidos, e uma quantidade de ocorrencias por chave com distribuição de Poisson.
+    escala = 1.0 corresponde aproximadamente ao tamanho da rede estadual.
+    Retorna um resumo com a quantidade de objetos gerados.
+    """
+    rng = np.random.default_rng(semente)
+    siglas_simo = REGIONAIS["Siglas SIMO"]
+
+    causas = pd.DataFrame({
+        "CAUSA": [f"CAUSA SINTETICA {codigo}" for codigo in range(1, 100)],
+        "CODIGO": np.arange(1, 100),
+        "MITIGACAO POR RA": rng.choice([0.0, 0.25, 0.5, 0.75, 0.9], 99),
+        "MITIGACAO TA MESMA SE": rng.choice([0.0, 0.5, 0.8], 99),
+        "MITIGACAO TA SE DIFERENTE": rng.choice([0.0, 0.5], 99),
+    })
+
+    subestacoes = _nomes_subestacoes(max(1, round(SUBESTACOES_ESTADUAL * escala)), rng)
+    codigos_se = pd.DataFrame({
+        "CÓD._SE": np.arange(101, 101 + len(subestacoes)),
+        "SIGLA_SE": [sigla for sigla, _ in subestacoes],
+        "CÓD._SE.1": [str(codigo) for codigo in range(101, 101 + len(subestacoes))],
+        "NOME_SE": [f"SUBESTACAO {sigla}" for sigla, _ in subestacoes],
+    })
+
+    linhas = []  # (profundidade em colunas do RHC, rótulo)
+    chaves = []  # (nome, regional, codigo, tipo, nível, código SE, número do alimentador)
+    codigos_livres = {}
+    tipos_cumulativos = np.cumsum(PROPORCAO_TIPOS)
+
+    def nova_chave(regional: int) -> tuple:
+        if regional not in codigos_livres:
+            codigos_livres[regional] = list(rng.permutation(np.arange(1000, 89000)))
+        codigo = int(codigos_livres[regional].pop())
+        tipo = TIPOS[int(np.searchsorted(tipos_cumulativos, rng.random()))]
+        return f"{siglas_simo[regional]}_{codigo}", codigo, tipo
+
+    for (sigla, nucleo), codigo_se in zip(subestacoes, codigos_se["CÓD._SE"]):
+        regional = _regional_do_nucleo(nucleo, rng)
+        linhas.append((0, sigla))
+        for numero in range(1, 1 + 1 + rng.poisson(ALIMENTADORES_POR_SE - 1)):
+            n = max(1, int(rng.lognormal(np.log(CHAVES_POR_ALIMENTADOR), 0.6)))
+            ordem, profundidade = _arvore(n, rng, encadeamento, profundidade_maxima)
+            feeder = []
+            for no in ordem:
+                nome, codigo, tipo = nova_chave(regional)
+                feeder.append((3 + int(profundidade[no]), f"{nome} ({tipo})"))
+                chaves.append([nome, regional, codigo, tipo, int(profundidade[no]), int(codigo_se), numero])
+            if rng.random() < proporcao_sed:
+                # SED com um disjuntor fictício e algumas chaves abaixo de uma chave qualquer do alimentador.
+                posicao = int(rng.integers(0, len(feeder)))
+                coluna = feeder[posicao][0]
+                sed = f"{sigla[:2]}X"
+                embutido = [(coluna + 1, f"{sed} BT TT-1 (CH)"), (coluna + 2, f"DJ_{sed}01_FICT (CH)")]
+                for k in range(int(rng.integers(1, 6))):
+                    nome, codigo, tipo = nova_chave(regional)
+                    embutido.append((coluna + 3 + k, f"{nome} ({tipo})"))
+                    chaves.append([nome, regional, codigo, tipo, coluna + k, int(codigo_se), numero])
+                feeder[posicao + 1:posicao + 1] = embutido
+            linhas.append((1, f"{sigla}{numero:02d} (Total de Chaves: {len(feeder)})"))
+            linhas.extend(feeder)
+    linhas.append((0, "\x1a"))
+
+    # RHC: uma coluna por profundidade, a coluna 2 do csv original não existe.
+    largura = max(coluna for coluna, _ in linhas) + 1
+    matriz = np.full((len(linhas), largura), np.nan, dtype=object)
+    colunas = np.array([coluna for coluna, _ in linhas])
+    matriz[np.arange(len(linhas)), colunas] = [rotulo for _, rotulo in linhas]
+    # Salvo na forma compacta, como na importação (src._rhc).
+    rhc = normalizar_rhc(pd.DataFrame(matriz, dtype=object).drop(columns=2))
+
+    chaves = pd.DataFrame(chaves, columns=["Chave", "REGIONAL", "CODIGO", "Tipo", "NIVEL", "SUBESTACAO", "ALIMENTADOR"])
+    # Consumidores a jusante decrescem com a profundidade da chave.
+    chaves["Consumidores a jusante"] = (
+        rng.lognormal(np.log(2000), 1.0, len(chaves)) / (1 + chaves["NIVEL"]) ** 1.5
+    ).astype(np.int32)
+    # Uma pequena parte das chaves fica fora do Relatório de Chaves, como na base real.
+    rdc = chaves.loc[rng.random(len(chaves)) > 0.02, ["Chave", "Tipo", "Consumidores a jusante"]]
+
+    quantidade = rng.poisson(taxa_ocorrencias, len(chaves))
+    origem = np.repeat(np.arange(len(chaves)), quantidade)
+    n = len(origem)
+    inicio = pd.Timestamp(f"{ano}-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+    duracao = np.round(rng.lognormal(np.log(1.8), 0.9, n), 6)
+    ucs = np.maximum(1, (chaves["Consumidores a jusante"].to_numpy()[origem] * rng.random(n)).astype(np.int64))
+    ocorrencias = pd.DataFrame({
+        "REGIONAL": chaves["REGIONAL"].to_numpy()[origem],
+        "CAUSA": rng.choice(causas["CODIGO"].to_numpy(), n),
+        "SUBESTACAO": chaves["SUBESTACAO"].to_numpy()[origem].astype(float),
+        "ALIMENTADOR": chaves["ALIMENTADOR"].to_numpy()[origem].astype(float),
+        "EQPTO.RESPONSAVEL": chaves["CODIGO"].to_numpy()[origem],
+        "DATA INICIO": inicio.strftime("%d/%m/%Y"),
+        "DATA FIM": (inicio + pd.to_timedelta(duracao, unit="h")).strftime("%d/%m/%Y"),
+        "DURACAO": duracao,
+        "QTDE UC EQPTO INTERROMPIDA": ucs,
+    })
+    ocorrencias["DIC"] = ocorrencias["QTDE UC EQPTO INTERROMPIDA"] * ocorrencias["DURACAO"]
+
+    pasta = os.path.join(destino, "base")
+    os.makedirs(pasta, exist_ok=True)
+    for nome, df in [
+        ("CAUSAS", causas),
+        ("RHC", rhc),
+        ("RDC", rdc.reset_index(drop=True)),
+        ("OCORRENCIAS", ocorrencias),
+        ("CODIGOS_SE", codigos_se),
+    ]:
+        df.to_pickle(os.path.join(pasta, nome), compression=COMPRESSAO)
+
+    return {
+        "subestacoes": len(subestacoes),
+        "alimentadores": sum(1 for coluna, _ in linhas if coluna == 1),
+        "chaves": len(chaves),
+        "ocorrencias": n,
+        "linhas_rhc": len(linhas),
+    }
@@ -0,0 +1,105 @@
+import pandas as pd
+from src._dataclasses import TreeNode, Alimentador
+
+# Comparação de duas versões da rede (ex.: antes e depois de importar um novo RHC) pelos hashes de subárvore
+# calculados em CriarRede. Subárvores com o mesmo hash são descartadas sem serem percorridas.
+
+
+def _chave(no: TreeNode) -> tuple:
+    return no.__class__.__name__, str(no)
+
+
+def _alimentador(no: TreeNode) -> str:
+    """
+    Nome do alimentador mais próximo acima do nó (o próprio nó, se for um alimentador).
+    """
+    while no is not None:
+        if isinstance(no, Alimentador):
+            return str(no)
+        no = no.parent
+    return ""
+
+
+def _subarvore(no: TreeNode, destino: dict):
+    for item in no.dft():
+        destino.setdefault(_chave(item), item)
+
+
+def _comparar(antigo: TreeNode, novo: TreeNode, removidos: dict, adicionados: dict):
+    """
+    Percorre as duas árvores em paralelo, casando os filhos pelo tipo e nome, e descendo apenas nas subárvores com
+    hash diferente. Os nós que existem só de um lado são acumulados em removidos / adicionados.
+    """
+    if antigo.hash_subarvore == novo.hash_subarvore:
+        return
+    filhos_antigos = {}
+    for filho in antigo.children:
+        filhos_antigos.setdefault(_chave(filho), filho)
+    filhos_novos = {}
+    for filho in novo.children:
+        filhos_novos.setdefault(_chave(filho), filho)
+    for chave, filho in filhos_antigos.items():
+        if chave in filhos_novos:
+            _comparar(filho, filhos_novos[chave], removidos, adicionados)
+        else:
+            _subarvore(filho, removidos)
+    for chave, filho in filhos_novos.items():
+        if chave not in filhos_antigos:
+            _subarvore(filho, adicionados)
+
+
+def diferencas(antiga: TreeNode, nova: TreeNode) -> pd.DataFrame:
+    """
+    Lista os nós adicionados, removidos e movidos entre duas versões da rede, com o alimentador e o nó pai de
+    cada lado. Um nó é movido quando existe nas duas versões com outro pai; os nós que apenas acompanham um ramo
+    movido (mesmo pai nas duas versões) não são listados.
+    """
+    removidos, adicionados = {}, {}
+    _comparar(antiga, nova, removidos, adicionados)
+
+    linhas = []
+    for chave, no in removidos.items():
+        destino = adicionados.get(chave)
+        if destino is None:
+            linhas.append((chave, "Removido", no, None))
+        elif str(no.parent) != str(destino.parent):
+            linhas.append((chave, "Movido", no, destino))
+    for chave, no in adicionados.items():
+        if chave not in removidos:
+            linhas.append((chave, "Adicionado", None, no))
+
+    df = pd.DataFrame([
+        {
+            "Tipo": tipo,
+            "Nó": nome,
+            "Mudança": mudanca,
+            "Alimentador anterior": _alimentador(antes) if antes is not None else "",
+            "Pai anterior": str(antes.parent) if antes is not None and antes.parent is not None else "",
+            "Alimentador atual": _alimentador(depois) if depois is not None else "",
+            "Pai atual": str(depois.parent) if depois is not None and depois.parent is not None else "",
+        }
+        for (tipo, nome), mudanca, antes, depois in linhas
+    ], columns=["Tipo", "Nó", "Mudança", "Alimentador anterior", "Pai anterior", "Alimentador atual", "Pai atual"])
+    df["Alimentador"] = df["Alimentador atual"].where(df["Alimentador atual"] != "", df["Alimentador anterior"])
+    df.sort_values(["Alimentador", "Mudança", "Nó"], inplace=True, ignore_index=True)
+    return df
+
+
+def hashes_alimentadores(raiz: TreeNode) -> dict:
+    """
+    Hash de subárvore de cada alimentador, {nome: hash}. O primeiro alimentador em profundidade prevalece,
+    como em TreeNode.find.
+    """
+    hashes = {}
+    for no in raiz.dft():
+        if isinstance(no, Alimentador):
+            hashes.setdefault(str(no), no.hash_subarvore)
+    return hashes
+
+
+def alimentadores_inalterados(antiga: TreeNode, nova: TreeNode) -> set:
+    """
+    Alimentadores com a mesma topologia nas duas versões, cujos estudos podem ser reaproveitados.
+    """
+    hashes_antigos = hashes_alimentadores(antiga)
+    return {nome for nome, hash_novo in hashes_alimentadores(nova).items() if hashes_antigos.get(nome) == hash_novo}
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+import src._database as database
+from src._database import CAUSAS, agregados_por_mes, simo_to_code
+from src._dataclasses import TreeNode, Chave, IndiceEuler, SENSIBILIDADE
+from src._causas import com_filtro_causas, filtro_atual, permitidas
+from src._rdc import conversoes, tipos_na_versao
+
+# Validação do estimado contra o realizado das chaves já convertidas em religador: para cada chave cujo tipo passou a
+# RA/TS entre duas versões do RDC, o DIC acumulado a jusante na janela antes da conversão dá a previsão de
+# Chave.dic_acumulado_pos_rl (com os tipos da versão anterior), comparada ao DIC acumulado na janela depois da conversão.
+# Todas as conversões são calculadas em uma passagem: os pares (conversão, chave a jusante) são cruzados com os
+# agregados por chave, causa e mês (agregados_por_mes), e as janelas são máscaras sobre os meses.
+RELIGADORES = ("RA", "TS")
+JANELA_MESES = 12
+
+
+def _mes(datas) -> np.ndarray:
+    """
+    Número sequencial do mês (ano * 12 + mês - 1) de datas ou de inteiros AAAAMM.
+    """
+    datas = np.asarray(datas)
+    if np.issubdtype(datas.dtype, np.datetime64):
+        datas = pd.DatetimeIndex(datas)
+        return (datas.year * 12 + datas.month - 1).to_numpy()
+    return datas // 100 * 12 + datas % 100 - 1
+
+
+def _pares(raiz: TreeNode, convertidas: pd.DataFrame, historico: dict, sensibilidade: int) -> pd.DataFrame:
+    """
+    Chaves a jusante de cada conversão (Chave.chaves_jusante da primeira ocorrência da chave na rede), com a regional
+    e o código do 1025, se estão no alcance do religador e se a sua falta seria mitigada (tipo na versão anterior
+    diferente de RA/TS, como em Chave.indicadores_pos_rl).
+    """
+    indice = raiz.euler if getattr(raiz, "euler", None) is not None and raiz.euler.valido else IndiceEuler(raiz)
+    tipos_versao = {}
+    pares = []
+    for conversao, (nome, versao) in enumerate(zip(convertidas["Chave"], convertidas["Versão anterior"])):
+        posicao = indice.nomes.primeira(nome, raiz.entrada, indice.saida[raiz.entrada])
+        if posicao < 0:
+            continue
+        if versao not in tipos_versao:
+            tipos_versao[versao] = tipos_na_versao(historico, versao)
+        jusante = np.concatenate([np.arange(a, b) for a, b in indice.intervalos_jusante(posicao)])
+        chaves = [indice.ordem[i] for i in jusante if isinstance(indice.ordem[i], Chave)]
+        niveis = indice.nivel[[no.entrada for no in chaves]] - indice.nivel[posicao]
+        nomes = [str(no) for no in chaves]
+        tipos = tipos_versao[versao].reindex(nomes).to_numpy(dtype=object)
+        for k, no in enumerate(chaves):
+            if pd.isna(tipos[k]):  # chave sem tipo único na versão anterior: tipo atual
+                tipos[k] = no.tipo
+        pares.append(pd.DataFrame({
+            "CONVERSAO": conversao,
+            "REGIONAL": [simo_to_code(no.sigla_simo) for no in chaves],
+            "EQPTO.RESPONSAVEL": [no.codigo for no in chaves],
+            "ALCANCE": niveis < sensibilidade,
+            "MITIGAVEL": ~pd.Series(tipos, dtype=object).isin(RELIGADORES).to_numpy(),
+        }))
+    if not pares:
+        return pd.DataFrame(columns=["CONVERSAO", "REGIONAL", "EQPTO.RESPONSAVEL", "ALCANCE", "MITIGAVEL"])
+    return pd.concat(pares, ignore_index=True)
+
+
+@com_filtro_causas
+def validar_conversoes(
+    raiz: TreeNode,
+    historico: dict,
+    janela: int = JANELA_MESES,
+    sensibilidade: int = SENSIBILIDADE,
+    causas=(),
+    excluir_causas=(),
+) -> tuple:
+    """
+    Compara a redução de DIC prevista para as chaves convertidas em religador (RA/TS) com a redução realizada.
+    A janela antes tem os meses anteriores ao mês da última versão do RDC com o tipo antigo e a janela depois os meses
+    seguintes ao mês da primeira versão com o religador, ambas com até janela meses dentro do período do 1025. Os DICs
+    são anualizados pelos meses de cada janela.
+    Retorna (conversões, calibração): uma linha por chave convertida na rede da raiz, e uma linha por causa com a
+    mitigação atual (CAUSAS["MITIGACAO POR RA"]) e a realizada nas chaves alcançadas pelos religadores, também
+    ajustada pela variação do DIC das chaves a jusante fora do alcance.
+    """
+    convertidas = conversoes(historico, RELIGADORES)
+    pares = _pares(raiz, convertidas, historico, sensibilidade)
+    agregados, equipamentos = agregados_por_mes()
+    pares["GRUPO"] = equipamentos.get_indexer(pd.MultiIndex.from_frame(pares[["REGIONAL", "EQPTO.RESPONSAVEL"]]))
+    linhas = pares[pares["GRUPO"] >= 0].merge(agregados[["GRUPO", "CAUSA", "MES", "DIC"]], on="GRUPO")
+    linhas = linhas[permitidas(linhas["CAUSA"].to_numpy(), filtro_atual())]
+
+    # Janelas de cada conversão, limitadas ao período do 1025.
+    datas = database.OCORRENCIAS["DATA INICIO"].astype(str)
+    meses_1025 = _mes((datas.str[6:10] + datas.str[3:5]).astype(np.int64).to_numpy())
+    primeiro, ultimo = meses_1025.min(), meses_1025.max()
+    fim_antes = _mes(convertidas["Versão anterior"].to_numpy()) - 1
+    inicio_depois = _mes(convertidas["Versão da conversão"].to_numpy()) + 1
+    inicio_antes = np.maximum(fim_antes - janela + 1, primeiro)
+    fim_depois = np.minimum(inicio_depois + janela - 1, ultimo)
+    meses_antes = np.clip(fim_antes - inicio_antes + 1, 0, None)
+    meses_depois = np.clip(fim_depois - inicio_depois + 1, 0, None)
+
+    conversao = linhas["CONVERSAO"].to_numpy()
+    mes = _mes(linhas["MES"].to_numpy(dtype=np.int64))
+    linhas["JANELA"] = np.select(
+        [(mes >= inicio_antes[conversao]) & (mes <= fim_antes[conversao]),
+         (mes >= inicio_depois[conversao]) & (mes <= fim_depois[conversao])],
+        ["ANTES", "DEPOIS"], default="",
+    )
+    linhas = linhas[linhas["JANELA"] != ""]
+    linhas["FATOR"] = linhas["CAUSA"].map(CAUSAS.set_index("CODIGO")["MITIGACAO POR RA"]).fillna(0.0).to_numpy()
+    linhas["GANHO"] = linhas["DIC"] * linhas["FATOR"] * (linhas["ALCANCE"] & linhas["MITIGAVEL"])
+    anos = np.where(linhas["JANELA"] == "ANTES", meses_antes[linhas["CONVERSAO"]], meses_depois[linhas["CONVERSAO"]]) / 12
+    linhas["DIC"] = linhas["DIC"] / anos
+    linhas["GANHO"] = linhas["GANHO"] / anos
+
+    somas = linhas.groupby(["CONVERSAO", "JANELA"])[["DIC", "GANHO"]].sum().unstack("JANELA", fill_value=0.0)
+    somas = somas.reindex(range(len(convertidas)), fill_value=0.0)
+    antes = somas.get(("DIC", "ANTES"), pd.Series(0.0, index=somas.index)).to_numpy()
+    ganho = somas.get(("GANHO", "ANTES"), pd.Series(0.0, index=somas.index)).to_numpy()
+    depois = somas.get(("DIC", "DEPOIS"), pd.Series(0.0, index=somas.index)).to_numpy()
+    na_rede = np.isin(np.arange(len(convertidas)), pares["CONVERSAO"].to_numpy())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reducao_prevista = np.where(antes > 0, ganho / antes * 100, np.nan)
+        reducao_realizada = np.where(antes > 0, (1 - depois / antes) * 100, np.nan)
+    df_conversoes = pd.DataFrame({
+        "Chave": convertidas["Chave"],
+        "Tipo anterior": convertidas["Tipo anterior"],
+        "Tipo atual": convertidas["Tipo atual"],
+        "Versão anterior": convertidas["Versão anterior"],
+        "Versão da conversão": convertidas["Versão da conversão"],
+        "Meses antes": meses_antes,
+        "Meses depois": meses_depois,
+        "DIC Acumulado antes [h * ucs/ano]": antes,
+        "DIC Acumulado previsto pós RL [h * ucs/ano]": antes - ganho,
+        "DIC Acumulado realizado pós RL [h * ucs/ano]": depois,
+        "Redução prevista [%]": reducao_prevista,
+        "Redução realizada [%]": reducao_realizada,
+        "Diferença [p.p.]": reducao_realizada - reducao_prevista,
+    })
+    validas = na_rede & (meses_antes > 0) & (meses_depois > 0)
+    df_conversoes = df_conversoes[validas].reset_index(drop=True)
+
+    # Calibração: DIC por causa das chaves que seriam mitigadas, nas conversões com as duas janelas.
+    linhas = linhas[validas[linhas["CONVERSAO"].to_numpy()]]
+    grupo = np.where(linhas["ALCANCE"] & linhas["MITIGAVEL"], "MITIGADAS", "FORA")
+    calibracao = linhas.groupby([grupo, "JANELA", "CAUSA"])["DIC"].sum().unstack([0, 1], fill_value=0.0)
+    colunas = pd.MultiIndex.from_product([["MITIGADAS", "FORA"], ["ANTES", "DEPOIS"]])
+    calibracao = calibracao.reindex(columns=colunas, fill_value=0.0)
+    calibracao = calibracao[calibracao[("MITIGADAS", "ANTES")] > 0]
+    quantidade = linhas[grupo == "MITIGADAS"].groupby("CAUSA")["CONVERSAO"].nunique()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        razao = calibracao[("MITIGADAS", "DEPOIS")] / calibracao[("MITIGADAS", "ANTES")]
+        controle = calibracao[("FORA", "DEPOIS")] / calibracao[("FORA", "ANTES")].where(calibracao[("FORA", "ANTES")] > 0)
+    causas_1025 = CAUSAS.set_index("CODIGO")
+    df_calibracao = pd.DataFrame({
+        "Código": calibracao.index.astype(int),
+        "Causa": causas_1025["CAUSA"].reindex(calibracao.index).to_numpy(),
+        "Conversões": quantidade.reindex(calibracao.index).fillna(0).astype(int).to_numpy(),
+        "DIC antes [h * ucs/ano]": calibracao[("MITIGADAS", "ANTES")].to_numpy(),
+        "DIC depois [h * ucs/ano]": calibracao[("MITIGADAS", "DEPOIS")].to_numpy(),
+        "Mitigação por RA atual": causas_1025["MITIGACAO POR RA"].reindex(calibracao.index).fillna(0.0).to_numpy(),
+        "Mitigação realizada": (1 - razao).to_numpy(),
+        "Variação fora do alcance": controle.to_numpy(),
+        "Mitigação realizada ajustada": (1 - razao / controle).to_numpy(),
+    })
+    return df_conversoes, df_calibracao.reset_index(drop=True)